@@ -8,8 +8,30 @@ from flask_cors import CORS
 
 from gateway_service import __version__
 from gateway_service.flask_config import config
+from gateway_service.middleware import PreflightMiddleware, cors_headers
 from gateway_service.routes import create_routes
+from gateway_service.service import (
+    AllocationTracker,
+    BandwidthShaper,
+    BufferBudget,
+    ChunkCache,
+    ConfigRegistry,
+    JWKSCache,
+    RateLimiter,
+    ResponseSpooler,
+    RevocationList,
+    SamplingProfiler,
+    SharedState,
+    StreamLimiter,
+    Tracer,
+    TrafficMirror,
+    UpstreamMetrics,
+    Warmup,
+)
 from gateway_service.utils import setup_logging
+from gateway_service.utils.access_log import AccessLog
+from gateway_service.utils.capture import TrafficCapture
+from gateway_service.utils.json_provider import init_json_provider
 
 
 def create_app(config_name: Optional[str] = None) -> Flask:
@@ -27,9 +49,55 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     # Instantiate the config class (since we added __init__ methods)
     config_class = config.get(config_name, config["default"])
     app.config.from_object(config_class())
+    init_json_provider(app)
+
+    # Compile the routing configuration into an immutable, swappable snapshot
+    app.extensions["config_registry"] = ConfigRegistry(app.config)
+    app.extensions["upstream_metrics"] = UpstreamMetrics()
+    app.extensions["traffic_mirror"] = TrafficMirror(app)
+    app.extensions["response_spooler"] = ResponseSpooler(
+        BufferBudget(
+            app.config.get("BUFFER_MAX_MEMORY_BYTES", 64 * 1024 * 1024),
+            app.config.get("BUFFER_MAX_DISK_BYTES", 1024 * 1024 * 1024),
+        ),
+        memory_threshold=app.config.get("BUFFER_MEMORY_THRESHOLD", 1024 * 1024),
+        spool_dir=app.config.get("BUFFER_SPOOL_DIR"),
+    )
+    app.extensions["range_cache"] = ChunkCache(
+        app.config.get("RANGE_CACHE_MAX_BYTES", 512 * 1024 * 1024),
+        chunk_size=app.config.get("RANGE_CACHE_CHUNK_SIZE", 1024 * 1024),
+        min_object_bytes=app.config.get("RANGE_CACHE_MIN_OBJECT_BYTES", 1024 * 1024),
+        default_ttl=app.config.get("RANGE_CACHE_TTL", 300),
+        directory=app.config.get("RANGE_CACHE_DIR"),
+    )
+    # Shared by all workers when gunicorn preloads the app (the default)
+    app.extensions["shared_state"] = SharedState(app)
+    app.extensions["token_revocations"] = RevocationList(app.config)
+    app.extensions["jwks_cache"] = JWKSCache(app)
+    app.extensions["rate_limiter"] = RateLimiter()
+    app.extensions["bandwidth"] = BandwidthShaper(
+        app.config.get("BANDWIDTH_SLOTS", 4096)
+    )
+    app.extensions["stream_limiter"] = StreamLimiter(
+        app.config.get("STREAM_MAX_CONCURRENT", 1000)
+    )
+    # Run per worker by the gunicorn post_worker_init hook (gunicorn_conf)
+    app.extensions["warmup"] = Warmup(app)
+    app.extensions["profiler"] = SamplingProfiler(
+        app.config.get("PROFILER_MAX_SECONDS", 60),
+        app.config.get("PROFILER_INTERVAL", 0.005),
+    )
+    app.extensions["allocations"] = AllocationTracker()
+    app.extensions["access_log"] = AccessLog(app.config)
+    app.extensions["traffic_capture"] = TrafficCapture(app.config)
+    app.extensions["tracer"] = Tracer(app.config)
 
     # Initialize extensions
     CORS(app, origins=app.config.get("CORS_ORIGINS", ["*"]))
+    app.extensions["cors_headers"] = cors_headers(app.config)
+
+    # Answer CORS preflights before any Flask, logging or Redis work
+    app.wsgi_app = PreflightMiddleware(app.wsgi_app, app.config)
 
     # Set up logging
     with app.app_context():
@@ -39,6 +107,7 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     @app.before_request
     def before_request():
         g.app_start_time = app.config["APP_START_TIME"]
+        app.extensions["config_registry"].ensure_watching()
 
     # Register blueprints
     app.register_blueprint(create_routes())
@@ -87,9 +156,112 @@ def cli():
 def run(host: str, port: int, debug: bool):
     """Run the development server."""
     app = create_app("dev" if debug else "prod")
+    app.extensions["warmup"].run()
     app.run(host=host, port=port, debug=debug)
 
 
+@cli.command("startup-report")
+@click.option("--pid", type=int, help="Gunicorn master PID to report worker memory for")
+@click.option("--top", default=10, help="Number of packages to list")
+def startup_report(pid: Optional[int], top: int):
+    """Report import time and per-worker memory."""
+    from gateway_service.utils.startup import (
+        child_pids,
+        measure_startup,
+        process_memory,
+    )
+
+    startup = measure_startup()
+    click.echo(
+        f"Imports: {startup['import_seconds'] * 1000:.0f} ms "
+        f"({startup['modules']} modules), "
+        f"create_app: {startup['create_app_seconds'] * 1000:.0f} ms"
+    )
+    for package, cumulative_us in startup["packages"][:top]:
+        click.echo(f"  {package:<24} {cumulative_us / 1000:8.1f} ms")
+
+    if pid is None:
+        return
+
+    def mb(value: int) -> str:
+        return f"{value / 1024 / 1024:7.1f} MB"
+
+    click.echo("\nProcess       RSS         PSS         shared      private")
+    for label, process in [("master", pid)] + [
+        (f"worker {child}", child) for child in child_pids(pid)
+    ]:
+        memory = process_memory(process)
+        if memory is None:
+            click.echo(f"{label:<12} unavailable")
+            continue
+        click.echo(
+            f"{label:<12} {mb(memory['rss'])} {mb(memory['pss'])} "
+            f"{mb(memory['shared'])} {mb(memory['private'])}"
+        )
+
+
+@cli.command()
+@click.argument("capture_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--speed", default=1.0, help="Replay N times faster than captured")
+@click.option("--concurrency", default=64, help="Maximum requests in flight")
+@click.option("--target", help="Gateway URL to replay against instead of one built here")
+@click.option("--stub-port", default=0, help="Port of the stub upstream (0: any)")
+@click.option("--limit", type=int, help="Replay only the first N records")
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+def replay(
+    capture_file: str,
+    speed: float,
+    concurrency: int,
+    target: Optional[str],
+    stub_port: int,
+    limit: Optional[int],
+    as_json: bool,
+):
+    """Replay a traffic capture against stub upstreams and report latency."""
+    import itertools
+    import json
+
+    from gateway_service.utils import replay as replayer
+    from gateway_service.utils.capture import read_capture
+
+    records = list(itertools.islice(read_capture(capture_file), limit))
+    stub = replayer.StubBackend(port=stub_port).start()
+    try:
+        if target:
+            click.echo(f"Stub upstream: {stub.url} (point the target's services here)")
+            report = replayer.replay(
+                records,
+                target,
+                secret=os.environ.get("SECRET_KEY"),
+                speed=speed,
+                concurrency=concurrency,
+            )
+        else:
+            report = replayer.replay_in_process(
+                records, stub.url, speed=speed, concurrency=concurrency
+            )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        stub.stop()
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    click.echo(
+        f"{report['requests']} requests in {report.get('seconds', 0)} s "
+        f"({report.get('rate')} req/s), {report.get('errors', 0)} errors, "
+        f"{report.get('status_mismatches', 0)} status mismatches"
+    )
+    for label, key in [("latency", "latency_ms"), ("overhead", "overhead_ms")]:
+        values = report.get(key) or {}
+        if values:
+            click.echo(
+                f"  {label:<9} "
+                + "  ".join(f"{name} {value:8.2f} ms" for name, value in values.items())
+            )
+
+
 @cli.command()
 def health():
     """Check gateway health."""
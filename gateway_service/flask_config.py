@@ -1,3 +1,4 @@
+import json
 import os
 from dataclasses import dataclass
 from typing import Dict
@@ -11,6 +12,8 @@ class ServiceConfig:
     health_endpoint: str = "/health"
     timeout: int = 30
     enabled: bool = False
+    # Multiplex requests over HTTP/2 (h2c for http://); needs httpx[http2]
+    http2: bool = False
 
 
 class Config:
@@ -43,16 +46,144 @@ class Config:
     # Redis settings
     REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
     REDIS_ENABLED = os.environ.get("REDIS_ENABLED", "true").lower() == "true"
+    # Commands issued concurrently by a worker's requests are sent as one
+    # pipeline of up to REDIS_PIPELINE_MAX_BATCH commands, after waiting
+    # REDIS_PIPELINE_WINDOW seconds (0: just yield to other greenlets)
+    REDIS_AUTO_PIPELINE = (
+        os.environ.get("REDIS_AUTO_PIPELINE", "true").lower() == "true"
+    )
+    REDIS_PIPELINE_WINDOW = float(os.environ.get("REDIS_PIPELINE_WINDOW", "0"))
+    REDIS_PIPELINE_MAX_BATCH = int(os.environ.get("REDIS_PIPELINE_MAX_BATCH", "100"))
 
     # Gateway settings
     API_VERSION = "v1"
     GATEWAY_NAME = "TurboGate"
     RATE_LIMIT_PER_MINUTE = int(os.environ.get("RATE_LIMIT_PER_MINUTE", "100"))
+    # Rate limit policies; every matching policy applies and the per-minute
+    # default covers requests no policy matches, e.g.
+    # [{"name": "login", "route": "auth/login", "methods": ["POST"],
+    #   "key": "ip", "limits": ["5/m", "50/h"]},
+    #  {"name": "free", "plan": "free", "limits": ["10/s", "1000/h"]},
+    #  {"name": "partners", "api_key": "...", "key": "api_key", "limits": ["100/s"]}]
+    RATE_LIMIT_POLICIES = json.loads(os.environ.get("RATE_LIMIT_POLICIES", "[]"))
+    RATE_LIMIT_PLAN_CLAIM = os.environ.get("RATE_LIMIT_PLAN_CLAIM", "plan")
+    RATE_LIMIT_API_KEY_HEADER = os.environ.get("RATE_LIMIT_API_KEY_HEADER", "X-API-Key")
+    # Number of proxies in front of the gateway whose X-Forwarded-For entries
+    # are trusted; 0 uses the socket peer address. Set it to the number of
+    # hops in the deployment (2 behind Traefik and ModSecurity), otherwise
+    # every client is seen as the last proxy and shares its IP rate limits.
+    # Too high a count lets clients pick their own IP with a forged header
+    TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
     REQUEST_TIMEOUT = int(os.environ.get("REQUEST_TIMEOUT", "30"))
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    # One JSON access record per proxied request on stdout. 2xx/3xx and 4xx
+    # are sampled at these rates; 5xx and requests slower than
+    # ACCESS_LOG_SLOW_MS are always logged. Records are written in batches
+    ACCESS_LOG_ENABLED = os.environ.get("ACCESS_LOG_ENABLED", "true").lower() == "true"
+    ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_CLIENT_ERROR_SAMPLE_RATE = float(
+        os.environ.get("ACCESS_LOG_CLIENT_ERROR_SAMPLE_RATE", "1.0")
+    )
+    ACCESS_LOG_SLOW_MS = float(os.environ.get("ACCESS_LOG_SLOW_MS", "1000"))
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.environ.get("ACCESS_LOG_FLUSH_INTERVAL", "0.5"))
+    ACCESS_LOG_QUEUE_SIZE = int(os.environ.get("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+    # Traffic capture for `turbogate replay`: a sampled, redacted record of
+    # each request's shape and timing, appended to CAPTURE_FILE in batches
+    CAPTURE_ENABLED = os.environ.get("CAPTURE_ENABLED", "false").lower() == "true"
+    CAPTURE_FILE = os.environ.get("CAPTURE_FILE", "capture.jsonl")
+    CAPTURE_SAMPLE_RATE = float(os.environ.get("CAPTURE_SAMPLE_RATE", "0.01"))
+    CAPTURE_FLUSH_INTERVAL = float(os.environ.get("CAPTURE_FLUSH_INTERVAL", "1.0"))
+    CAPTURE_QUEUE_SIZE = int(os.environ.get("CAPTURE_QUEUE_SIZE", "10000"))
+
+    # W3C trace context. New traces are head-sampled at TRACE_SAMPLE_RATE;
+    # unsampled ones are still exported when they fail or exceed
+    # TRACE_SLOW_MS. TRACE_EXPORTER: none, otlp (OTLP/HTTP JSON) or file
+    TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "none")
+    TRACE_OTLP_ENDPOINT = os.environ.get(
+        "TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+    )
+    TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+    TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "turbogate")
+    TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+    TRACE_TAIL_ERRORS = os.environ.get("TRACE_TAIL_ERRORS", "true").lower() == "true"
+    TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "1000"))
+    TRACE_EXPORT_BATCH_SIZE = int(os.environ.get("TRACE_EXPORT_BATCH_SIZE", "512"))
+    TRACE_EXPORT_INTERVAL = float(os.environ.get("TRACE_EXPORT_INTERVAL", "2"))
+    TRACE_EXPORT_TIMEOUT = float(os.environ.get("TRACE_EXPORT_TIMEOUT", "5"))
+    TRACE_QUEUE_SIZE = int(os.environ.get("TRACE_QUEUE_SIZE", "4096"))
+    # "auto" uses orjson when installed, "json" forces the standard library
+    JSON_SERIALIZER = os.environ.get("JSON_SERIALIZER", "auto")
+
+    # Dynamic gateway configuration - a JSON file or Redis key whose
+    # services/route_mappings/public_endpoints/aggregation_routes/... override
+    # the environment defaults below and are hot-reloaded on change
+    GATEWAY_CONFIG_FILE = os.environ.get("GATEWAY_CONFIG_FILE")
+    GATEWAY_CONFIG_REDIS_KEY = os.environ.get("GATEWAY_CONFIG_REDIS_KEY")
+    GATEWAY_CONFIG_CHANNEL = os.environ.get("GATEWAY_CONFIG_CHANNEL", "turbogate:config")
+    GATEWAY_CONFIG_POLL_INTERVAL = float(
+        os.environ.get("GATEWAY_CONFIG_POLL_INTERVAL", "5")
+    )
+    GATEWAY_CONFIG_HISTORY = int(os.environ.get("GATEWAY_CONFIG_HISTORY", "5"))
+
+    # Upstream keep-alive connections per service and worker
+    SERVICE_POOL_SIZE = int(os.environ.get("SERVICE_POOL_SIZE", "10"))
+    # Services with "http2": true share a few multiplexed connections instead,
+    # with at most this many requests in flight per service and worker
+    SERVICE_HTTP2_MAX_STREAMS = int(os.environ.get("SERVICE_HTTP2_MAX_STREAMS", "100"))
+    SERVICE_HTTP2_CONNECTIONS = int(os.environ.get("SERVICE_HTTP2_CONNECTIONS", "2"))
+    # Upstream DNS answers are reused (and refreshed in the background) for
+    # this many seconds; 0 disables the cache. Stale answers are served for
+    # up to DNS_CACHE_STALE_TTL seconds while the resolver is failing
+    DNS_CACHE_TTL = int(os.environ.get("DNS_CACHE_TTL", "30"))
+    DNS_CACHE_STALE_TTL = int(os.environ.get("DNS_CACHE_STALE_TTL", "300"))
+
+    # Per-worker warmup before accepting traffic: resolve upstreams, open
+    # WARMUP_CONNECTIONS keep-alive connections each and prime auth caches
+    WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_CONNECTIONS = int(os.environ.get("WARMUP_CONNECTIONS", "2"))
+    WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", "10"))
+
+    # Node-wide state shared by all workers in memory (needs GUNICORN_PRELOAD).
+    # One worker probes upstream health every HEALTH_CHECK_INTERVAL seconds;
+    # requests fall back to their own probe when no answer is fresher than
+    # HEALTH_CACHE_TTL. BREAKER_FAILURE_THRESHOLD consecutive upstream
+    # failures stop traffic to a service for BREAKER_COOLDOWN seconds
+    HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", "5"))
+    HEALTH_CACHE_TTL = float(os.environ.get("HEALTH_CACHE_TTL", "15"))
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+    SHARED_STATE_SLOTS = int(os.environ.get("SHARED_STATE_SLOTS", "1024"))
+    # Bandwidth token buckets shared by the node's workers; one per client,
+    # route class and direction while it is refilling
+    BANDWIDTH_SLOTS = int(os.environ.get("BANDWIDTH_SLOTS", "4096"))
+    # Validated token payloads are reused by every worker for up to this
+    # many seconds (never past the token's exp); 0 disables
+    AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "60"))
+    AUTH_CACHE_SLOTS = int(os.environ.get("AUTH_CACHE_SLOTS", "4096"))
+    AUTH_CACHE_VALUE_SIZE = int(os.environ.get("AUTH_CACHE_VALUE_SIZE", "512"))
+
+    # On-demand sampling profiles of a live worker (/gateway/admin/profile)
+    PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+    PROFILER_INTERVAL = float(os.environ.get("PROFILER_INTERVAL", "0.005"))
+
+    # Roles allowed to call /gateway/admin endpoints
+    ADMIN_ROLES = os.environ.get("ADMIN_ROLES", "admin").split(",")
+
+    # Batch endpoint settings
+    BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+    BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "8"))
 
     # CORS settings
     CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",")
+    CORS_ALLOW_HEADERS = os.environ.get(
+        "CORS_ALLOW_HEADERS", "Content-Type, Authorization, X-Request-ID, X-API-Key"
+    )
+    CORS_MAX_AGE = int(os.environ.get("CORS_MAX_AGE", "3600"))
+    # Preflights under these prefixes are answered before reaching Flask
+    CORS_PREFLIGHT_PREFIXES = os.environ.get(
+        "CORS_PREFLIGHT_PREFIXES", "/api/"
+    ).split(",")
 
     # Microservices configuration
     SERVICES: Dict[str, ServiceConfig] = {
@@ -105,6 +236,79 @@ class Config:
         "chat": "communication",
     }
 
+    # Aggregation routes - parallel fan-out to several services merged into
+    # one response, e.g.
+    # {"screens/job": {"merge": "nest", "legs": [
+    #     {"name": "job", "path": "jobs/{job_id}", "timeout": 2, "required": true},
+    #     {"name": "partner", "path": "partners/{partner_id}", "timeout": 2}]}}
+    AGGREGATION_ROUTES = json.loads(os.environ.get("AGGREGATION_ROUTES", "{}"))
+
+    # Per-route proxy policies keyed by path prefix, e.g.
+    # {"payments": {"mirror": {"service": "payments-shadow", "sample_rate": 0.1}},
+    #  "documents": {"buffer": true}, "notifications": {"stream": true},
+    #  "jobs": {"project": true}}
+    # "project" lets clients trim JSON responses with ?fields=id,company.name;
+    # "ranges" serves Range/If-Range requests, large objects from RANGE_CACHE_*
+    # "bandwidth" paces bodies per client and route class with token buckets,
+    # e.g. {"class": "bulk", "download": "2MB/s", "upload": "512KB/s",
+    #       "burst": "8MB", "key": "user"} (key as in RATE_LIMIT_POLICIES)
+    ROUTE_POLICIES = json.loads(
+        os.environ.get(
+            "ROUTE_POLICIES",
+            '{"documents": {"ranges": true}, "uploads": {"ranges": true}}',
+        )
+    )
+
+    # Traffic mirroring - bounded, fire-and-forget shadow requests
+    MIRROR_QUEUE_SIZE = int(os.environ.get("MIRROR_QUEUE_SIZE", "1000"))
+    MIRROR_WORKERS = int(os.environ.get("MIRROR_WORKERS", "2"))
+    MIRROR_MAX_BODY_BYTES = int(os.environ.get("MIRROR_MAX_BODY_BYTES", "65536"))
+    MIRROR_TIMEOUT = int(os.environ.get("MIRROR_TIMEOUT", "5"))
+
+    # Response buffering for routes with {"buffer": true} - frees the upstream
+    # connection immediately and drains slow clients from memory/disk
+    BUFFER_MEMORY_THRESHOLD = int(os.environ.get("BUFFER_MEMORY_THRESHOLD", "1048576"))
+    BUFFER_MAX_MEMORY_BYTES = int(os.environ.get("BUFFER_MAX_MEMORY_BYTES", "67108864"))
+    BUFFER_MAX_DISK_BYTES = int(os.environ.get("BUFFER_MAX_DISK_BYTES", "1073741824"))
+    BUFFER_SPOOL_DIR = os.environ.get("BUFFER_SPOOL_DIR")
+
+    # Per-worker disk cache of large downloads on {"ranges": true} routes,
+    # kept as fixed-size chunks of strong-ETag objects, LRU within the budget
+    RANGE_CACHE_MAX_BYTES = int(os.environ.get("RANGE_CACHE_MAX_BYTES", "536870912"))
+    RANGE_CACHE_CHUNK_SIZE = int(os.environ.get("RANGE_CACHE_CHUNK_SIZE", "1048576"))
+    RANGE_CACHE_MIN_OBJECT_BYTES = int(
+        os.environ.get("RANGE_CACHE_MIN_OBJECT_BYTES", "1048576")
+    )
+    # Freshness of objects whose Cache-Control gives no max-age
+    RANGE_CACHE_TTL = int(os.environ.get("RANGE_CACHE_TTL", "300"))
+    RANGE_CACHE_DIR = os.environ.get("RANGE_CACHE_DIR")
+
+    # Long-lived SSE/WebSocket passthrough for routes with {"stream": true}
+    STREAM_MAX_CONCURRENT = int(os.environ.get("STREAM_MAX_CONCURRENT", "1000"))
+    STREAM_CONNECT_TIMEOUT = int(os.environ.get("STREAM_CONNECT_TIMEOUT", "5"))
+
+    # Token revocation - revoked JWT IDs in a Redis sorted set, mirrored into
+    # a per-worker Bloom filter through pub/sub
+    REVOCATION_REDIS_KEY = os.environ.get("REVOCATION_REDIS_KEY", "turbogate:revoked")
+    REVOCATION_CHANNEL = os.environ.get("REVOCATION_CHANNEL", "turbogate:revoked")
+    REVOCATION_BLOOM_CAPACITY = int(os.environ.get("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE = float(
+        os.environ.get("REVOCATION_BLOOM_ERROR_RATE", "0.001")
+    )
+    REVOCATION_REBUILD_INTERVAL = int(os.environ.get("REVOCATION_REBUILD_INTERVAL", "300"))
+    REVOCATION_DEFAULT_TTL = int(os.environ.get("REVOCATION_DEFAULT_TTL", "86400"))
+
+    # RS256/ES256 tokens are verified against the auth service's JWKS
+    # (JWKS_URL, or JWKS_PATH on the "auth" service); needs pyjwt[crypto]
+    JWT_ASYMMETRIC_ALGORITHMS = os.environ.get(
+        "JWT_ASYMMETRIC_ALGORITHMS", "RS256,ES256"
+    ).split(",")
+    JWKS_URL = os.environ.get("JWKS_URL")
+    JWKS_PATH = os.environ.get("JWKS_PATH", "/.well-known/jwks.json")
+    JWKS_TIMEOUT = int(os.environ.get("JWKS_TIMEOUT", "5"))
+    JWKS_REFRESH_INTERVAL = int(os.environ.get("JWKS_REFRESH_INTERVAL", "300"))
+    JWKS_MIN_REFRESH_INTERVAL = int(os.environ.get("JWKS_MIN_REFRESH_INTERVAL", "30"))
+
     # Public endpoints that don't require authentication
     PUBLIC_ENDPOINTS = [
         "auth/login",
@@ -0,0 +1,42 @@
+"""Gunicorn server hooks, loaded with ``--config python:gateway_service.gunicorn_conf``.
+
+With ``GUNICORN_PRELOAD`` (the default) the app is imported and built once in
+the master and shared copy-on-write with the workers. Everything fork-unsafe
+is created lazily in the worker: upstream pools and background threads check
+their pid, redis-py connection pools reset themselves after fork, and warmup
+runs in ``post_worker_init``. Shared state is the deliberate exception: its
+memory is mapped in the master so that every worker sees the same bytes.
+"""
+
+import gc
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+if preload_app:
+    try:
+        # Locks and queues built in the master must be gevent-aware before
+        # the app is imported, or a contended lock would block the whole worker
+        from gevent import monkey
+
+        monkey.patch_all()
+    except ImportError:  # pragma: no cover - sync/gthread workers
+        pass
+
+
+def when_ready(server):
+    """Freeze the preloaded heap so collections in workers do not copy it."""
+    if server.cfg.preload_app:
+        gc.collect()
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """Warm the worker up before it starts accepting connections.
+
+    Runs in each worker after fork and app loading, so the connections it
+    opens belong to that worker alone.
+    """
+    warmup = getattr(worker.wsgi, "extensions", {}).get("warmup")
+    if warmup is not None:
+        warmup.run()
@@ -1,11 +1,18 @@
 from gateway_service.middleware.middleware import (
+    admin_middleware,
     cors_middleware,
+    rate_limit_identity,
     rate_limit_middleware,
     request_middleware,
 )
+from gateway_service.middleware.preflight import PreflightMiddleware, cors_headers
 
 __all__ = [
     "request_middleware",
     "rate_limit_middleware",
+    "rate_limit_identity",
     "cors_middleware",
+    "admin_middleware",
+    "PreflightMiddleware",
+    "cors_headers",
 ]
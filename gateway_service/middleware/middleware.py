@@ -3,7 +3,42 @@ from functools import wraps
 
 from flask import current_app, g, jsonify, request
 
-from gateway_service.utils import generate_request_id, get_redis_client, setup_logging
+from gateway_service.service import (
+    AuthService,
+    RateLimitIdentity,
+    get_config_snapshot,
+    trace_span,
+)
+from gateway_service.utils import (
+    generate_request_id,
+    get_client_ip,
+    get_redis_client,
+    setup_logging,
+)
+from gateway_service.utils.capture import auth_state, redact_path
+from gateway_service.utils.responses import RATE_LIMIT_EXCEEDED
+
+
+def capture_request(status_code: int, duration: float, response, path) -> None:
+    """Record the request's shape for ``turbogate replay``, if sampled."""
+    capture = current_app.extensions["traffic_capture"]
+    if not capture.sample():
+        return
+    capture.record(
+        ts=round(g.start_time, 4),
+        m=request.method,
+        p=redact_path(request.path),
+        svc=g.get("service_name"),
+        pub=get_config_snapshot().is_public(path) if path is not None else None,
+        st=status_code,
+        ms=round(duration * 1000, 2),
+        up=g.get("upstream_ms"),
+        rq=request.content_length or 0,
+        rs=getattr(response, "content_length", None),
+        h=sorted(name.lower() for name in request.headers.keys()),
+        q=sorted(request.args.keys()),
+        a=auth_state(request.headers.get("Authorization"), g.get("user")),
+    )
 
 
 def request_middleware():
@@ -15,57 +50,63 @@ def request_middleware():
             # Setup request context
             g.request_id = generate_request_id()
             g.start_time = time.time()
+            status_code = 500
+            response = None
 
-            # Get logger
-            logger = setup_logging()
-
-            # Log request start
-            logger.info(
-                "Request started",
-                request_id=g.request_id,
-                method=request.method,
-                path=request.path,
-                remote_addr=request.remote_addr,
-                user_agent=request.headers.get("User-Agent", "")[
-                    :100
-                ],  # Truncate long user agents
+            # Continue the caller's W3C trace, or start one
+            tracer = current_app.extensions["tracer"]
+            g.trace = tracer.start(
+                request.environ, f"{request.method} {request.url_rule.rule}"
             )
+            g.trace.root.set("http.method", request.method)
+            g.trace.root.set("http.target", request.path)
 
             try:
                 # Execute the request
-                response = f(*args, **kwargs)
-                status_code = getattr(response, "status_code", 200)
-
-                # Log successful request
-                duration = time.time() - g.start_time
-                logger.info(
-                    "Request completed",
-                    request_id=g.request_id,
-                    status_code=status_code,
-                    duration=f"{duration:.3f}s",
-                )
-
+                # Views may return (body, status) tuples; finalize them so the
+                # status recorded below is the one actually sent
+                response = current_app.make_response(f(*args, **kwargs))
+                status_code = response.status_code
                 return response
 
             except Exception as e:
                 # Log error
-                duration = time.time() - g.start_time
-                logger.error(
+                setup_logging().error(
                     "Request failed",
                     request_id=g.request_id,
                     error=str(e),
-                    duration=f"{duration:.3f}s",
+                    duration=f"{time.time() - g.start_time:.3f}s",
                     exc_info=True,
                 )
                 raise
 
+            finally:
+                tracer.finish(g.trace, status_code)
+                duration = time.time() - g.start_time
+
+                # One sampled access record per request, written in batches
+                current_app.extensions["access_log"].record(
+                    status_code,
+                    duration,
+                    request_id=g.request_id,
+                    trace_id=g.trace.trace_id,
+                    method=request.method,
+                    path=request.path,
+                    service=g.get("service_name"),
+                    remote_addr=request.remote_addr,
+                    user_agent=request.headers.get("User-Agent", "")[
+                        :100
+                    ],  # Truncate long user agents
+                )
+                capture_request(status_code, duration, response, kwargs.get("path"))
+
         return decorated_function
 
     return decorator
 
 
 def rate_limit_middleware():
-    """Rate limiting middleware using Redis."""
+    """Rate limiting middleware using Redis and the policy table."""
 
     def decorator(f):
         @wraps(f)
@@ -84,38 +125,30 @@ def rate_limit_middleware():
                     )
                     return f(*args, **kwargs)
 
-                # Use IP address as rate limit key
-                client_ip = request.environ.get(
-                    "HTTP_X_FORWARDED_FOR", request.remote_addr
-                )
-                rate_limit_key = f"rate_limit:{client_ip}"
-
-                # Check current request count
-                current_requests = redis_client.get(rate_limit_key)
-                limit = current_app.config["RATE_LIMIT_PER_MINUTE"]
+                path = kwargs.get("path") or request.path.lstrip("/")
+                with trace_span("rate_limit") as span:
+                    table = get_config_snapshot().rate_limits
+                    identity = rate_limit_identity(with_claims=table.matches_claims)
+                    policies = table.match(path, request.method, identity)
+                    if any(policy.key == "user" for policy in policies):
+                        identity = rate_limit_identity()
+                    exceeded = current_app.extensions["rate_limiter"].check(
+                        redis_client, policies, identity
+                    )
+                    span.set("rate_limit.exceeded", exceeded is not None)
 
-                if current_requests is None:
-                    # First request from this IP
-                    redis_client.setex(rate_limit_key, 60, 1)
-                elif int(current_requests) >= limit:
-                    # Rate limit exceeded
+                if exceeded:
                     current_app.logger.warning(
-                        f"Rate limit exceeded for {client_ip}: {current_requests}/{limit}"
+                        f"Rate limit exceeded for {identity.bucket(exceeded.policy.key)}: "
+                        f"{exceeded.policy.name} {exceeded.window}"
                     )
-                    return (
-                        jsonify(
-                            {
-                                "error": "Rate limit exceeded",
-                                "message": f"Maximum {limit} requests per minute allowed",
-                                "retry_after": 60,
-                                "request_id": getattr(g, "request_id", "unknown"),
-                            }
-                        ),
-                        429,
+                    response = RATE_LIMIT_EXCEEDED.response(
+                        f"Maximum {exceeded.window} requests allowed",
+                        policy=exceeded.policy.name,
+                        retry_after=exceeded.retry_after,
                     )
-                else:
-                    # Increment counter
-                    redis_client.incr(rate_limit_key)
+                    response.headers["Retry-After"] = str(exceeded.retry_after)
+                    return response
 
                 return f(*args, **kwargs)
 
@@ -129,6 +162,44 @@ def rate_limit_middleware():
     return decorator
 
 
+def rate_limit_identity(with_claims: bool = True) -> RateLimitIdentity:
+    """Identify the caller from verified token claims, API key and client IP.
+
+    Token claims are only resolved ``with_claims``, so requests no claim-based
+    policy applies to skip token validation. API keys count only when a
+    policy names them; unknown keys are treated as anonymous.
+    """
+    # Shared by rate limiting and bandwidth shaping within a request
+    cached = g.get("rate_limit_identity")
+    if cached is not None and (cached[1] or not with_claims):
+        return cached[0]
+
+    claims = {}
+    auth_header = request.headers.get("Authorization", "")
+    if with_claims and auth_header.startswith("Bearer ") and auth_header[7:].strip():
+        # Only verified claims are trusted; invalid tokens count as anonymous
+        claims = AuthService.validate_request_token(auth_header[7:].strip()) or {}
+
+    api_key = request.headers.get(
+        current_app.config.get("RATE_LIMIT_API_KEY_HEADER", "X-API-Key")
+    )
+    if api_key not in get_config_snapshot().rate_limits.api_keys:
+        api_key = None
+
+    user_id = claims.get("user_id")
+    role = claims.get("role")
+    plan = claims.get(current_app.config.get("RATE_LIMIT_PLAN_CLAIM", "plan"))
+    identity = RateLimitIdentity(
+        ip=get_client_ip(),
+        user_id=str(user_id) if user_id is not None else None,
+        role=str(role) if role else None,
+        plan=str(plan) if plan else None,
+        api_key=api_key,
+    )
+    g.rate_limit_identity = (identity, with_claims)
+    return identity
+
+
 def cors_middleware():
     """CORS middleware."""
 
@@ -149,17 +220,48 @@ def cors_middleware():
                 if "*" in allowed_origins or origin in allowed_origins:
                     response.headers["Access-Control-Allow-Origin"] = origin or "*"
 
-                response.headers[
-                    "Access-Control-Allow-Methods"
-                ] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
-                response.headers[
-                    "Access-Control-Allow-Headers"
-                ] = "Content-Type, Authorization, X-Request-ID"
-                response.headers["Access-Control-Expose-Headers"] = "X-Request-ID"
-                response.headers["Access-Control-Max-Age"] = "3600"
+                # Shared with the preflight fast path, computed once per app
+                response.headers.update(current_app.extensions["cors_headers"])
 
             return response
 
         return decorated_function
 
     return decorator
+
+
+def admin_middleware():
+    """Restrict an endpoint to authenticated gateway administrators."""
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            auth_header = request.headers.get("Authorization", "")
+            token = auth_header[7:].strip() if auth_header.startswith("Bearer ") else ""
+            user_data = AuthService.validate_token(token) if token else None
+
+            if not user_data:
+                return {
+                    "error": "Invalid token",
+                    "message": "Admin endpoints require a valid Bearer token",
+                    "request_id": getattr(g, "request_id", "unknown"),
+                }, 401
+
+            if user_data.get("role") not in current_app.config.get(
+                "ADMIN_ROLES", ["admin"]
+            ):
+                current_app.logger.warning(
+                    f"Admin access denied for user {user_data.get('user_id')}"
+                )
+                return {
+                    "error": "Forbidden",
+                    "message": "Admin role required",
+                    "request_id": getattr(g, "request_id", "unknown"),
+                }, 403
+
+            g.user = user_data
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
@@ -1,3 +1,4 @@
+import json
 import os
 import time
 from typing import Optional
@@ -16,12 +17,73 @@ from flask_restx import Api, Namespace, Resource
 
 from gateway_service import __version__
 from gateway_service.middleware import (
+    admin_middleware,
     cors_middleware,
+    rate_limit_identity,
     rate_limit_middleware,
     request_middleware,
 )
-from gateway_service.service import AuthService, HealthChecker, ServiceClient
+from gateway_service.service import (
+    SPAN_KIND_CLIENT,
+    AggregationError,
+    AuthService,
+    BatchError,
+    BatchExecutor,
+    ConfigValidationError,
+    FileRange,
+    HealthChecker,
+    JSONProjector,
+    MirrorJob,
+    ProfilerBusy,
+    ProjectionError,
+    ServiceClient,
+    StreamBody,
+    SubRequest,
+    ThrottledBody,
+    ThrottledInput,
+    TrafficSplit,
+    TunnelResponse,
+    WebSocketTunnel,
+    client_socket,
+    collapsed_text,
+    current_trace,
+    fields_key,
+    file_body,
+    get_config_snapshot,
+    is_websocket_upgrade,
+    open_stream,
+    parse_batch,
+    parse_fields,
+    project_body,
+    projected_etag,
+    trace_span,
+    upstream_etags,
+)
 from gateway_service.utils import get_redis_client, setup_logging
+from gateway_service.utils.autopipeline import AutoPipelineRedis
+from gateway_service.utils.headers import (
+    STREAM_RESPONSE_ALLOW,
+    forward_environ_headers,
+    forward_headers,
+    response_headers,
+)
+from gateway_service.utils.responses import (
+    AGGREGATION_NOT_FOUND,
+    INTERNAL_ERROR,
+    INVALID_AGGREGATION,
+    INVALID_AUTHORIZATION,
+    INVALID_BATCH,
+    INVALID_FIELDS,
+    INVALID_TOKEN,
+    MISSING_AUTHORIZATION,
+    SERVICE_CONNECTION_FAILED,
+    SERVICE_NOT_AVAILABLE,
+    SERVICE_NOT_FOUND,
+    SERVICE_TIMEOUT,
+    SERVICE_UNHEALTHY,
+    TOO_MANY_STREAMS,
+    WEBSOCKET_NOT_SUPPORTED,
+)
 
 
 def create_routes() -> Blueprint:
@@ -63,6 +125,17 @@ def create_routes() -> Blueprint:
                 "uptime": time.time() - getattr(g, "app_start_time", time.time()),
             }
 
+    @gateway_ns.route("/ready")
+    class GatewayReady(Resource):
+        """Worker readiness endpoint."""
+
+        def get(self):
+            """Report ready once this worker has finished warming up."""
+            warmup = current_app.extensions["warmup"]
+            if not warmup.ready:
+                return {"status": "warming_up"}, 503
+            return {"status": "ready", "warmup": warmup.report}
+
     @gateway_ns.route("/health/services")
     class ServicesHealth(Resource):
         """All services health check."""
@@ -93,11 +166,9 @@ def create_routes() -> Blueprint:
 
         def get(self):
             """Get gateway information and configuration."""
-            from flask import current_app
-
-            services = current_app.config.get("SERVICES", {})
+            snapshot = get_config_snapshot()
             enabled_services = [
-                name for name, config in services.items() if config.enabled
+                name for name, config in snapshot.services.items() if config.enabled
             ]
 
             return {
@@ -107,9 +178,156 @@ def create_routes() -> Blueprint:
                 "environment": "dev" if current_app.debug else "prod",
                 "enabled_services": enabled_services,
                 "rate_limit": current_app.config.get("RATE_LIMIT_PER_MINUTE", 100),
-                "routes": list(current_app.config.get("ROUTE_MAPPINGS", {}).keys()),
+                "routes": list(snapshot.spec.get("route_mappings", {})),
+                "config_version": snapshot.version,
             }
 
+    # Admin namespace
+    admin_ns = api.namespace("admin", description="Gateway administration")
+
+    @admin_ns.route("/config")
+    class AdminConfig(Resource):
+        """Active gateway configuration snapshot."""
+
+        method_decorators = [admin_middleware()]
+
+        def get(self):
+            """Describe the active configuration and its rollback history."""
+            registry = current_app.extensions["config_registry"]
+            return {
+                "active": registry.snapshot.describe(),
+                "history": registry.history(),
+            }
+
+    @admin_ns.route("/config/reload")
+    class AdminConfigReload(Resource):
+        """Reload configuration from its source."""
+
+        method_decorators = [admin_middleware()]
+
+        def post(self):
+            """Re-read and validate the configuration source."""
+            registry = current_app.extensions["config_registry"]
+            try:
+                snapshot = registry.reload()
+            except ConfigValidationError as e:
+                return {"error": "Invalid configuration", "message": str(e)}, 422
+            return {"active": snapshot.describe()}
+
+    @admin_ns.route("/config/rollback")
+    class AdminConfigRollback(Resource):
+        """Roll back to the previous configuration."""
+
+        method_decorators = [admin_middleware()]
+
+        def post(self):
+            """Re-activate the previous configuration snapshot."""
+            registry = current_app.extensions["config_registry"]
+            try:
+                snapshot = registry.rollback()
+            except ConfigValidationError as e:
+                return {"error": "Rollback unavailable", "message": str(e)}, 409
+            return {"active": snapshot.describe()}
+
+    @admin_ns.route("/tokens/revoke")
+    class AdminTokenRevoke(Resource):
+        """Revoke issued tokens by ID."""
+
+        method_decorators = [admin_middleware()]
+
+        def get(self):
+            """Describe the local revocation filter."""
+            return current_app.extensions["token_revocations"].stats()
+
+        def post(self):
+            """Revoke a token ID (``jti``) until its expiry (``exp``)."""
+            payload = request.get_json(silent=True) or {}
+            jti = payload.get("jti")
+            expires_at = payload.get("exp")
+            if not isinstance(jti, str) or not jti:
+                return {"error": "Invalid request", "message": "'jti' is required"}, 400
+            if expires_at is not None and not isinstance(expires_at, (int, float)):
+                return {"error": "Invalid request", "message": "'exp' must be a number"}, 400
+
+            current_app.extensions["token_revocations"].revoke(jti, expires_at)
+            return {"revoked": jti}
+
+    @admin_ns.route("/profile")
+    class AdminProfile(Resource):
+        """Sampling CPU profile of the worker serving the request."""
+
+        method_decorators = [admin_middleware()]
+
+        def get(self):
+            """Sample for ``seconds`` and return collapsed stacks.
+
+            The text output feeds ``flamegraph.pl`` or speedscope directly;
+            ``format=json`` returns the counts with run details.
+            """
+            try:
+                seconds = float(request.args.get("seconds", 10))
+                interval = request.args.get("interval", type=float)
+                result = current_app.extensions["profiler"].profile(seconds, interval)
+            except ValueError:
+                return {"error": "Invalid request", "message": "'seconds' must be a finite number"}, 400
+            except ProfilerBusy as e:
+                return {"error": "Profiler busy", "message": str(e)}, 409
+
+            if request.args.get("format") == "json":
+                result["stacks"] = dict(result["stacks"].most_common())
+                return result
+            return Response(
+                collapsed_text(result["stacks"]),
+                mimetype="text/plain",
+                headers={
+                    "X-Profile-PID": str(result["pid"]),
+                    "X-Profile-Samples": str(result["samples"]),
+                },
+            )
+
+    @admin_ns.route("/memory")
+    class AdminMemory(Resource):
+        """tracemalloc allocation sites of the worker serving the request."""
+
+        method_decorators = [admin_middleware()]
+
+        def get(self):
+            """Top allocation sites, and growth since the last ``mark``."""
+            tracker = current_app.extensions["allocations"]
+            if not tracker.tracing:
+                return {
+                    "error": "Not tracing",
+                    "message": "POST {\"action\": \"start\"} first",
+                }, 409
+            group_by = request.args.get("group_by", "lineno")
+            if group_by not in ("lineno", "filename", "traceback"):
+                return {"error": "Invalid request", "message": "Invalid 'group_by'"}, 400
+            return tracker.report(request.args.get("limit", 20, type=int), group_by)
+
+        def post(self):
+            """``start`` (with ``frames``), ``mark`` a baseline, or ``stop``."""
+            tracker = current_app.extensions["allocations"]
+            payload = request.get_json(silent=True) or {}
+            action = payload.get("action")
+
+            if action == "start":
+                frames = payload.get("frames", 1)
+                if not isinstance(frames, int) or not 1 <= frames <= 100:
+                    return {"error": "Invalid request", "message": "'frames' must be 1-100"}, 400
+                tracker.start(frames)
+            elif action == "mark":
+                if not tracker.tracing:
+                    return {"error": "Not tracing", "message": "Start tracing first"}, 409
+                tracker.mark()
+            elif action == "stop":
+                tracker.stop()
+            else:
+                return {
+                    "error": "Invalid request",
+                    "message": "'action' must be start, mark or stop",
+                }, 400
+            return {"action": action, "tracing": tracker.tracing, "pid": os.getpid()}
+
     # Main proxy route for API requests
     @gateway_bp.route(
         "/api/v1/<path:path>",
@@ -126,53 +344,42 @@ def create_routes() -> Blueprint:
         if request.method == "OPTIONS":
             return "", 200
 
-        # Determine target service
-        service_name = determine_target_service(path)
-        if not service_name:
+        # Determine target route
+        with trace_span("route") as span:
+            route = get_config_snapshot().resolve_route(path)
+            span.set("route.found", route is not None)
+        if not route:
             logger.warning(f"No service found for path: {path}")
-            return (
-                jsonify(
-                    {
-                        "error": "Service not found",
-                        "message": f"No service configured for endpoint: {path}",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                404,
+            return SERVICE_NOT_FOUND.response(
+                f"No service configured for endpoint: {path}"
             )
 
+        # Check authentication if required - done before picking the service
+        # version so weighted routes can stick to the authenticated user
+        if requires_authentication(path):
+            with trace_span("auth") as span:
+                auth_result = check_authentication()
+                span.set("auth.ok", auth_result is None)
+            if auth_result is not None:
+                return auth_result  # Return error response
+
+        service_name = select_service(route, request.headers)
+
         # Check if service is enabled
         if not ServiceClient.is_service_enabled(service_name):
             logger.warning(f"Service {service_name} is not enabled")
-            return (
-                jsonify(
-                    {
-                        "error": "Service not available",
-                        "message": f"The {service_name} service is currently not available",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                503,
+            return SERVICE_NOT_AVAILABLE.response(
+                f"The {service_name} service is currently not available"
             )
 
-        # Check authentication if required
-        if requires_authentication(path):
-            auth_result = check_authentication()
-            if auth_result:
-                return auth_result  # Return error response
-
         # Check if service is healthy
-        if not HealthChecker.check_service_health(service_name):
+        with trace_span("health_check", service=service_name) as span:
+            healthy = HealthChecker.check_service_health(service_name)
+            span.set("healthy", healthy)
+        if not healthy:
             logger.error(f"Service {service_name} is unhealthy")
-            return (
-                jsonify(
-                    {
-                        "error": "Service unhealthy",
-                        "message": f"The {service_name} service is currently unavailable",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                503,
+            return SERVICE_UNHEALTHY.response(
+                f"The {service_name} service is currently unavailable"
             )
 
         # Forward request to microservice
@@ -180,70 +387,45 @@ def create_routes() -> Blueprint:
             return forward_request(service_name, path)
         except requests.exceptions.Timeout:
             logger.error(f"Service timeout: {service_name}")
-            return (
-                jsonify(
-                    {
-                        "error": "Service timeout",
-                        "message": "The request timed out",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                504,
-            )
+            return SERVICE_TIMEOUT.response()
         except requests.exceptions.ConnectionError:
             logger.error(f"Service connection failed: {service_name}")
-            return (
-                jsonify(
-                    {
-                        "error": "Service connection failed",
-                        "message": "Unable to connect to service",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                503,
-            )
+            return SERVICE_CONNECTION_FAILED.response()
         except Exception as e:
             logger.error(f"Request forwarding error: {e}", exc_info=True)
-            return (
-                jsonify(
-                    {
-                        "error": "Internal server error",
-                        "message": "An unexpected error occurred",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                500,
-            )
+            return INTERNAL_ERROR.response()
 
-    def determine_target_service(path: str) -> Optional[str]:
+    def determine_target_service(path: str, headers=None) -> Optional[str]:
         """Determine which service should handle the request."""
-        from flask import current_app
+        # Longest matching prefix from the precompiled route trie
+        route = get_config_snapshot().resolve_route(path)
+        if not route:
+            return None
+
+        service_name = select_service(route, headers or {})
+        logger = setup_logging()
+        logger.debug(f"Mapped path '{path}' to service '{service_name}'")
+        return service_name
 
-        route_mappings = current_app.config.get("ROUTE_MAPPINGS", {})
+    def select_service(route, headers) -> str:
+        """Pick the service version for a route, honouring weighted splits."""
+        if not isinstance(route, TrafficSplit):
+            return route
 
-        # Find the service based on path prefix
-        for prefix, service_name in route_mappings.items():
-            if path.startswith(prefix):
-                logger = setup_logging()
-                logger.debug(f"Mapped path '{path}' to service '{service_name}'")
-                return service_name
+        sticky_key = None
+        if route.sticky == "user" and hasattr(g, "user"):
+            sticky_key = str(g.user.get("user_id", "")) or None
+        elif route.sticky_header:
+            sticky_key = headers.get(route.sticky_header)
 
-        return None
+        return route.choose(sticky_key)
 
     def requires_authentication(path: str) -> bool:
         """Check if the endpoint requires authentication."""
-        from flask import current_app
-
-        public_endpoints = current_app.config.get("PUBLIC_ENDPOINTS", [])
-
         # Check if path matches any public endpoint
-        for endpoint in public_endpoints:
-            if path.startswith(endpoint):
-                return False
+        return not get_config_snapshot().is_public(path)
 
-        return True
-
-    def check_authentication() -> Optional[tuple]:
+    def check_authentication() -> Optional[Response]:
         """Check request authentication."""
         logger = setup_logging()
 
@@ -251,16 +433,7 @@ def create_routes() -> Blueprint:
 
         if not auth_header or not auth_header.startswith("Bearer "):
             logger.warning("Missing or invalid authorization header")
-            return (
-                jsonify(
-                    {
-                        "error": "Missing authorization",
-                        "message": "Authorization header with Bearer token required",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                401,
-            )
+            return MISSING_AUTHORIZATION.response()
 
         try:
             token = auth_header.split(" ")[1]
@@ -268,111 +441,560 @@ def create_routes() -> Blueprint:
                 raise ValueError("Empty token")
         except (IndexError, ValueError):
             logger.warning("Malformed authorization header")
-            return (
-                jsonify(
-                    {
-                        "error": "Invalid authorization",
-                        "message": "Authorization header must contain 'Bearer <token>'",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                401,
-            )
+            return INVALID_AUTHORIZATION.response()
         
-        user_data = AuthService.validate_token(token)
+        # Usually already validated by the rate limiter for this request
+        user_data = AuthService.validate_request_token(token)
 
         if not user_data:
             logger.warning("Invalid or expired token")
-            return (
-                jsonify(
-                    {
-                        "error": "Invalid token",
-                        "message": "Token is invalid or expired",
-                        "request_id": getattr(g, "request_id", "unknown"),
-                    }
-                ),
-                401,
-            )
+            return INVALID_TOKEN.response()
 
         # Store user data in request context
         g.user = user_data
         logger.debug(f"Authenticated user: {user_data.get('user_id')}")
         return None
 
+    def build_forward_headers(headers: dict) -> dict:
+        """Add gateway context to the filtered client headers sent upstream."""
+
+        # Add user context if authenticated
+        if hasattr(g, "user"):
+            headers["X-User-ID"] = str(g.user.get("user_id", ""))
+            headers["X-User-Role"] = g.user.get("role", "")
+            headers["X-User-Email"] = g.user.get("email", "")
+
+        # Add request context
+        if hasattr(g, "request_id"):
+            headers["X-Request-ID"] = g.request_id
+
+        # The gateway's span becomes the upstream's parent
+        trace = current_trace()
+        if trace is not None:
+            headers.update(trace.headers())
+
+        return headers
+
     def forward_request(service_name: str, path: str) -> Response:
         """Forward request to the target microservice."""
         logger = setup_logging()
+        g.service_name = service_name
 
         # Get service URL
         service_config = ServiceClient.get_service_config(service_name)
         service_url = service_config.url
         target_url = f"{service_url.rstrip('/')}/{path}"
 
-        # Prepare headers (remove host header)
-        headers = dict(request.headers)
-        headers.pop("Host", None)
+        # Hop-by-hop, Host and client-supplied identity headers are dropped
+        headers = build_forward_headers(forward_environ_headers(request.environ))
 
-        # Add user context if authenticated
-        if hasattr(g, "user"):
-            headers["X-User-ID"] = str(g.user.get("user_id", ""))
-            headers["X-User-Role"] = g.user.get("role", "")
-            headers["X-User-Email"] = g.user.get("email", "")
+        policy = get_config_snapshot().policy_for(path)
+        download = shape_bandwidth(policy)
+        if policy.stream:
+            return forward_stream(service_name, path, headers, download)
 
-        # Add request context
-        if hasattr(g, "request_id"):
-            headers["X-Request-ID"] = g.request_id
+        # Byte ranges: large downloads are answered from the chunk cache
+        cache_key = None
+        if policy.ranges and request.method in ("GET", "HEAD"):
+            # Ranges address the stored bytes, which must not be re-encoded
+            headers["Accept-Encoding"] = "identity"
+            cache_key = f"{service_name}:{path}?{request.query_string.decode()}"
+            hit = current_app.extensions["range_cache"].serve(cache_key, headers)
+            if hit is not None:
+                return cached_range_response(hit, download)
+
+        # Sparse fieldsets: the gateway owns ?fields= on projecting routes
+        params = request.args
+        selection = None
+        fields = request.args.get("fields") if policy.project else None
+        if fields is not None:
+            try:
+                selection = parse_fields(fields)
+            except ProjectionError as e:
+                return INVALID_FIELDS.response(str(e))
+            projection_key = fields_key(selection)
+            params = {k: v for k, v in request.args.lists() if k != "fields"}
+            if "If-None-Match" in headers:
+                headers["If-None-Match"] = upstream_etags(
+                    headers["If-None-Match"], projection_key
+                )
 
         # Make request to microservice
+        span = trace_span(
+            "upstream",
+            SPAN_KIND_CLIENT,
+            **{"peer.service": service_name, "http.method": request.method},
+        )
+        if span.traceparent:
+            headers["traceparent"] = span.traceparent
+        started = time.monotonic()
+        response = None
         try:
-            response = requests.request(
+            response = ServiceClient.get_session(service_name).request(
                 method=request.method,
                 url=target_url,
                 headers=headers,
                 data=request.get_data(),
-                params=request.args,
+                params=params,
                 timeout=service_config.timeout,
                 stream=True,
             )
+            record_upstream(service_name, started, response.status_code >= 500)
+            # Time to response headers; the body is streamed afterwards
+            span.set("http.status_code", response.status_code)
+            span.end(error=response.status_code >= 500)
+
+            # Copy a sample of the traffic to the route's shadow service
+            mirror_policy = policy.mirror
+            if mirror_policy and mirror_policy.sampled():
+                current_app.extensions["traffic_mirror"].submit(
+                    MirrorJob(
+                        service=mirror_policy.service,
+                        method=request.method,
+                        path=path,
+                        headers={**headers, "X-Mirrored-By": "TurboGate"},
+                        params=request.args.to_dict(flat=False),
+                        body=request.get_data(),
+                        primary_service=service_name,
+                        primary_status=response.status_code,
+                        primary_latency=time.monotonic() - started,
+                    )
+                )
 
-            logger.info(
+            logger.debug(
                 "Request forwarded successfully",
                 service=service_name,
                 target_url=target_url,
                 status_code=response.status_code,
             )
 
-            # Stream response back to client
-            def generate():
-                for chunk in response.iter_content(chunk_size=8192):
-                    yield chunk
+            # Buffered routes read the upstream body right away so its
+            # connection is freed before a slow client starts draining
+            body = None
+            if policy.buffer:
+                body = current_app.extensions["response_spooler"].spool(response)
 
-            # Create response with proper headers
-            flask_response = Response(
-                stream_with_context(generate()),
-                status=response.status_code,
-                content_type=response.headers.get("content-type"),
-            )
+            if body is None:
+                # Stream response back to client
+                def generate():
+                    for chunk in response.iter_content(chunk_size=8192):
+                        yield chunk
 
-            # Copy relevant headers from microservice response
-            headers_to_copy = [
-                "Content-Type",
-                "Content-Length",
-                "Cache-Control",
-                "ETag",
-                "Last-Modified",
-                "X-Request-ID",
-            ]
+                body = stream_with_context(generate())
+
+            if cache_key is not None and request.method == "GET":
+                body = current_app.extensions["range_cache"].capture(
+                    cache_key,
+                    response.status_code,
+                    response.headers,
+                    "Authorization" in headers,
+                    body,
+                )
 
-            for header in headers_to_copy:
-                if header in response.headers:
-                    flask_response.headers[header] = response.headers[header]
+            headers = response_headers(response.headers)
+            if selection is not None:
+                body, headers = project_response(
+                    response, body, headers, selection, projection_key
+                )
+            if download is not None:
+                body = ThrottledBody(body, download)
 
-            return flask_response
+            # Create response with the relevant microservice headers
+            return Response(body, status=response.status_code, headers=headers)
 
         except Exception as e:
+            if response is None:
+                # A call that got a response has been recorded already
+                record_upstream(service_name, started, True)
+            else:
+                # Give back its connection, or its stream slot on HTTP/2
+                response.close()
+            span.end(error=True)
             logger.error(f"Error forwarding request to {service_name}: {e}")
             raise
 
+    def shape_bandwidth(policy):
+        """Pace the request body to the route's upload rate.
+
+        Returns the throttle for the response body, if downloads are shaped.
+        """
+        if policy.bandwidth is None:
+            return None
+        shaper = current_app.extensions["bandwidth"]
+        key = policy.bandwidth.key
+        client = rate_limit_identity(with_claims=key == "user").bucket(key)
+        upload = shaper.throttle(policy.bandwidth, "upload", client)
+        if upload is not None:
+            # Nothing has read the body yet; Flask reads it through this
+            request.environ["wsgi.input"] = ThrottledInput(
+                request.environ["wsgi.input"], upload
+            )
+        return shaper.throttle(policy.bandwidth, "download", client)
+
+    def cached_range_response(hit, download=None) -> Response:
+        """Serve a whole object or a range of it from the chunk cache."""
+        if hit.file is None:
+            return Response(status=hit.status, headers=hit.headers)
+        if request.method == "HEAD":
+            hit.file.close()
+            response = Response(status=hit.status, headers=hit.headers)
+        else:
+            if download is None:
+                body = file_body(request.environ, hit)
+            else:
+                # Paced bodies cannot be handed to sendfile
+                body = ThrottledBody(
+                    FileRange(hit.file, hit.start, hit.length), download
+                )
+            response = Response(
+                body,
+                status=hit.status,
+                headers=hit.headers,
+                direct_passthrough=True,
+            )
+        response.headers["Content-Length"] = str(hit.length)
+        return response
+
+    def project_response(response, body, headers, selection, projection_key):
+        """Trim a JSON response to the requested fields while it streams."""
+        status = response.status_code
+        content_type = response.headers.get("Content-Type", "").split(";")[0]
+        is_json = content_type == "application/json" or content_type.endswith("+json")
+        if status not in (200, 304) or (status == 200 and not is_json):
+            return body, headers
+
+        # Each projection is its own representation for caches
+        projected = []
+        for name, value in headers:
+            key = name.lower()
+            if key == "etag":
+                projected.append((name, projected_etag(value, projection_key)))
+            elif key != "content-length":
+                projected.append((name, value))
+        if status == 200:
+            body = project_body(body, JSONProjector(selection))
+        return body, projected
+
+    def forward_stream(
+        service_name: str, path: str, headers: dict, download=None
+    ) -> Response:
+        """Pass a long-lived SSE or WebSocket stream through to a service."""
+        logger = setup_logging()
+
+        limiter = current_app.extensions["stream_limiter"]
+        if not limiter.try_acquire():
+            logger.warning(f"Stream limit reached, rejecting stream to {service_name}")
+            return TOO_MANY_STREAMS.response()
+
+        service_config = ServiceClient.get_service_config(service_name)
+        connect_timeout = current_app.config.get("STREAM_CONNECT_TIMEOUT", 5)
+        started = time.monotonic()
+
+        if is_websocket_upgrade(request.headers):
+            try:
+                return tunnel_websocket(
+                    service_name, service_config, path, headers, connect_timeout
+                )
+            finally:
+                limiter.release()
+
+        try:
+            response = open_stream(
+                method=request.method,
+                url=f"{service_config.url.rstrip('/')}/{path}",
+                headers=headers,
+                params=request.args,
+                data=request.get_data(),
+                connect_timeout=connect_timeout,
+            )
+        except Exception:
+            limiter.release()
+            record_upstream(service_name, started, True)
+            raise
+
+        # Time to first byte; the stream itself may stay open for hours
+        record_upstream(service_name, started, response.status_code >= 500)
+        logger.info(
+            "Stream opened",
+            service=service_name,
+            path=path,
+            status_code=response.status_code,
+        )
+
+        body = StreamBody(response, limiter)
+        flask_response = Response(
+            body if download is None else ThrottledBody(body, download),
+            status=response.status_code,
+            headers=response_headers(response.headers, STREAM_RESPONSE_ALLOW),
+        )
+
+        if flask_response.mimetype == "text/event-stream":
+            flask_response.headers.setdefault("Cache-Control", "no-cache")
+            # Stop reverse proxies in front of the gateway buffering events
+            flask_response.headers["X-Accel-Buffering"] = "no"
+
+        return flask_response
+
+    def tunnel_websocket(
+        service_name, service_config, path: str, headers: dict, connect_timeout
+    ) -> Response:
+        """Relay a WebSocket connection until either side closes it."""
+        logger = setup_logging()
+
+        sock = client_socket(request.environ)
+        if sock is None:
+            return WEBSOCKET_NOT_SUPPORTED.response()
+
+        tunnel = WebSocketTunnel(
+            sock,
+            service_config.url,
+            path,
+            request.args.to_dict(flat=False),
+            headers,
+            connect_timeout,
+        )
+        try:
+            tunnel.run()
+        finally:
+            # Handshake latency only; the tunnel itself may stay open for hours
+            current_app.extensions["upstream_metrics"].record(
+                service_name,
+                tunnel.handshake_seconds,
+                (tunnel.upstream_status or 502) >= 500,
+            )
+        logger.info(
+            "WebSocket closed",
+            service=service_name,
+            path=path,
+            status_code=tunnel.upstream_status,
+        )
+        return TunnelResponse()
+
+    def record_upstream(service_name: str, started: float, error: bool) -> None:
+        """Record per-version upstream latency and errors."""
+        latency = time.monotonic() - started
+        current_app.extensions["upstream_metrics"].record(service_name, latency, error)
+        g.upstream_ms = round(latency * 1000, 2)
+        current_app.extensions["shared_state"].record_result(service_name, error)
+
+    # Batch endpoint - several API calls in one client round-trip
+    @gateway_bp.route("/api/v1/_batch", methods=["POST", "OPTIONS"])
+    @cors_middleware()
+    @request_middleware()
+    @rate_limit_middleware()
+    def batch_requests():
+        """Fan out sub-requests concurrently and stream back their results."""
+        logger = setup_logging()
+
+        # Handle preflight CORS requests
+        if request.method == "OPTIONS":
+            return "", 200
+
+        try:
+            subrequests = parse_batch(
+                request.get_json(silent=True),
+                current_app.config.get("BATCH_MAX_REQUESTS", 20),
+            )
+        except BatchError as e:
+            logger.warning(f"Invalid batch request: {e}")
+            return INVALID_BATCH.response(str(e))
+
+        # Authenticate once for the whole batch
+        if any(requires_authentication(sub.path) for sub in subrequests):
+            auth_result = check_authentication()
+            if auth_result is not None:
+                return auth_result
+
+        executor = BatchExecutor(
+            make_subrequest_handler(),
+            max_concurrency=current_app.config.get("BATCH_MAX_CONCURRENCY", 8),
+        )
+
+        logger.debug(f"Executing batch of {len(subrequests)} requests")
+
+        def generate():
+            for result in executor.run(subrequests):
+                yield current_app.json.dumps(result) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            status=200,
+            mimetype="application/x-ndjson",
+            headers={"X-Request-ID": g.request_id},
+        )
+
+    # Aggregation routes - one parallel fan-out merged at the edge
+    @gateway_bp.route("/api/v1/_aggregate/<path:name>", methods=["GET", "OPTIONS"])
+    @cors_middleware()
+    @request_middleware()
+    @rate_limit_middleware()
+    def aggregate(name):
+        """Call every leg of an aggregation route in parallel and merge them."""
+        logger = setup_logging()
+
+        # Handle preflight CORS requests
+        if request.method == "OPTIONS":
+            return "", 200
+
+        route = get_config_snapshot().aggregation_routes.get(name.strip("/"))
+        if not route:
+            return AGGREGATION_NOT_FOUND.response(
+                f"No aggregation configured for: {name}"
+            )
+
+        try:
+            subrequests = route.build_subrequests(request.args)
+        except AggregationError as e:
+            return INVALID_AGGREGATION.response(str(e))
+
+        if any(requires_authentication(sub.path) for sub in subrequests):
+            auth_result = check_authentication()
+            if auth_result is not None:
+                return auth_result
+
+        executor = BatchExecutor(
+            make_subrequest_handler(), max_concurrency=len(subrequests)
+        )
+        results = {
+            result["id"]: result
+            for result in executor.run(subrequests, deadline=route.deadline)
+        }
+
+        payload, status = route.merge_results(results)
+        if payload["errors"]:
+            logger.warning(
+                f"Aggregation {route.name} returned partial results",
+                failed_legs=list(payload["errors"]),
+            )
+
+        payload["request_id"] = g.request_id
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+
+    def make_subrequest_handler():
+        """Bind the current request's context to a sub-request handler."""
+        app = current_app._get_current_object()
+        parent_request_id = g.request_id
+        user = getattr(g, "user", None)
+        trace = current_trace()
+
+        # Sub-requests inherit the parent's headers, minus its own body framing
+        parent_headers = {
+            key: value
+            for key, value in request.headers.items()
+            if key not in ("Content-Length", "Content-Type")
+        }
+
+        def handle(sub: SubRequest) -> dict:
+            # Worker threads need their own app context for g and config
+            with app.app_context():
+                g.request_id = f"{parent_request_id}:{sub.id}"
+                if user is not None:
+                    g.user = user
+                if trace is not None:
+                    g.trace = trace
+                return execute_subrequest(sub, parent_headers)
+
+        return handle
+
+    def execute_subrequest(sub: SubRequest, parent_headers: dict) -> dict:
+        """Route a single batch sub-request and return its buffered result."""
+        request_headers = {**parent_headers, **sub.headers}
+        service_name = determine_target_service(sub.path, request_headers)
+        if not service_name:
+            return {
+                "id": sub.id,
+                "status": 404,
+                "body": {
+                    "error": "Service not found",
+                    "message": f"No service configured for endpoint: {sub.path}",
+                },
+            }
+
+        if not ServiceClient.is_service_enabled(service_name):
+            return {
+                "id": sub.id,
+                "status": 503,
+                "body": {
+                    "error": "Service not available",
+                    "message": f"The {service_name} service is currently not available",
+                },
+            }
+
+        if not HealthChecker.check_service_health(service_name):
+            return {
+                "id": sub.id,
+                "status": 503,
+                "body": {
+                    "error": "Service unhealthy",
+                    "message": f"The {service_name} service is currently unavailable",
+                },
+            }
+
+        service_config = ServiceClient.get_service_config(service_name)
+        target_url = f"{service_config.url.rstrip('/')}/{sub.path}"
+        headers = build_forward_headers(
+            forward_headers(request_headers.items(), request_headers.get("Connection"))
+        )
+
+        data = sub.body
+        if data is not None and not isinstance(data, (str, bytes)):
+            data = json.dumps(data)
+            headers["Content-Type"] = "application/json"
+
+        span = trace_span(
+            "upstream",
+            SPAN_KIND_CLIENT,
+            **{"peer.service": service_name, "http.method": sub.method, "batch.id": sub.id},
+        )
+        if span.traceparent:
+            headers["traceparent"] = span.traceparent
+        started = time.monotonic()
+        try:
+            response = ServiceClient.get_session(service_name).request(
+                method=sub.method,
+                url=target_url,
+                headers=headers,
+                data=data,
+                params=sub.params,
+                timeout=sub.timeout or service_config.timeout,
+            )
+        except requests.exceptions.Timeout:
+            record_upstream(service_name, started, True)
+            span.end(error=True)
+            return {
+                "id": sub.id,
+                "status": 504,
+                "body": {"error": "Service timeout", "message": "The request timed out"},
+            }
+        except requests.exceptions.ConnectionError:
+            record_upstream(service_name, started, True)
+            span.end(error=True)
+            return {
+                "id": sub.id,
+                "status": 503,
+                "body": {
+                    "error": "Service connection failed",
+                    "message": "Unable to connect to service",
+                },
+            }
+        record_upstream(service_name, started, response.status_code >= 500)
+        span.set("http.status_code", response.status_code)
+        span.end(error=response.status_code >= 500)
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+
+        return {
+            "id": sub.id,
+            "status": response.status_code,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            "body": body,
+        }
+
     # Simple metrics endpoint
     @gateway_bp.route("/metrics")
     def metrics():
@@ -389,6 +1011,23 @@ def create_routes() -> Blueprint:
                 "uptime": time.time() - getattr(g, "app_start_time", time.time()),
                 "redis_connected": redis_client is not None,
                 "services_health": HealthChecker.check_all_services(),
+                "upstreams": current_app.extensions["upstream_metrics"].snapshot(),
+                "mirror": current_app.extensions["traffic_mirror"].stats(),
+                "buffering": current_app.extensions["response_spooler"].stats(),
+                "range_cache": current_app.extensions["range_cache"].stats(),
+                "bandwidth": current_app.extensions["bandwidth"].stats(),
+                "streaming": current_app.extensions["stream_limiter"].stats(),
+                "revocations": current_app.extensions["token_revocations"].stats(),
+                "jwks": current_app.extensions["jwks_cache"].stats(),
+                "access_log": current_app.extensions["access_log"].stats(),
+                "capture": current_app.extensions["traffic_capture"].stats(),
+                "tracing": current_app.extensions["tracer"].stats(),
+                "shared_state": current_app.extensions["shared_state"].stats(),
+                "dns": (
+                    current_app.extensions["config_registry"].pools.dns_cache.stats()
+                    if current_app.extensions["config_registry"].pools.dns_cache
+                    else None
+                ),
             }
 
             # Add Redis stats if available
@@ -403,6 +1042,8 @@ def create_routes() -> Blueprint:
                     }
                 except Exception as e:
                     logger.error(f"Error getting Redis info: {e}")
+                if isinstance(redis_client, AutoPipelineRedis):
+                    stats["redis_pipeline"] = redis_client.pipeline_stats()
 
             return jsonify(stats)
 
@@ -1,7 +1,157 @@
+from gateway_service.service.aggregation import (
+    AggregationError,
+    AggregationRoute,
+    compile_aggregation_routes,
+)
+from gateway_service.service.bandwidth import (
+    BandwidthPolicy,
+    BandwidthShaper,
+    ThrottledBody,
+    ThrottledInput,
+)
+from gateway_service.service.batch import (
+    BatchError,
+    BatchExecutor,
+    SubRequest,
+    parse_batch,
+)
+from gateway_service.service.buffering import BufferBudget, ResponseSpooler
+from gateway_service.service.config_registry import (
+    ConfigRegistry,
+    ConfigSnapshot,
+    ConfigValidationError,
+    get_config_snapshot,
+)
+from gateway_service.service.dns import CachedDNSAdapter, DNSCache
+from gateway_service.service.http2 import HTTP2_AVAILABLE, HTTP2Adapter
+from gateway_service.service.jwks import JWKSCache
+from gateway_service.service.mirror import MirrorJob, MirrorPolicy, TrafficMirror
+from gateway_service.service.profiler import (
+    AllocationTracker,
+    ProfilerBusy,
+    SamplingProfiler,
+    collapsed_text,
+)
+from gateway_service.service.projection import (
+    JSONProjector,
+    ProjectionError,
+    fields_key,
+    parse_fields,
+    project_body,
+    projected_etag,
+    upstream_etags,
+)
+from gateway_service.service.range_cache import (
+    CacheHit,
+    ChunkCache,
+    FileRange,
+    RangeNotSatisfiable,
+    file_body,
+    parse_range,
+)
+from gateway_service.service.ratelimit import (
+    RateLimiter,
+    RateLimitIdentity,
+    RateLimitPolicy,
+    RateLimitTable,
+    compile_rate_limits,
+)
+from gateway_service.service.revocation import BloomFilter, RevocationList
 from gateway_service.service.services import AuthService, HealthChecker, ServiceClient
+from gateway_service.service.shared_state import SharedState
+from gateway_service.service.streaming import (
+    StreamBody,
+    StreamLimiter,
+    TunnelResponse,
+    WebSocketTunnel,
+    client_socket,
+    is_websocket_upgrade,
+    open_stream,
+)
+from gateway_service.service.tracing import (
+    SPAN_KIND_CLIENT,
+    RequestTrace,
+    Tracer,
+    current_trace,
+    parse_traceparent,
+    trace_span,
+)
+from gateway_service.service.traffic import (
+    TrafficSplit,
+    TrafficSplitError,
+    UpstreamMetrics,
+)
+from gateway_service.service.warmup import Warmup
 
-_all__ = [
+__all__ = [
     "ServiceClient",
     "AuthService",
     "HealthChecker",
+    "SharedState",
+    "BatchError",
+    "BatchExecutor",
+    "SubRequest",
+    "parse_batch",
+    "AggregationError",
+    "AggregationRoute",
+    "compile_aggregation_routes",
+    "ConfigRegistry",
+    "ConfigSnapshot",
+    "ConfigValidationError",
+    "get_config_snapshot",
+    "TrafficSplit",
+    "TrafficSplitError",
+    "UpstreamMetrics",
+    "MirrorJob",
+    "MirrorPolicy",
+    "TrafficMirror",
+    "BufferBudget",
+    "ResponseSpooler",
+    "ChunkCache",
+    "CacheHit",
+    "FileRange",
+    "RangeNotSatisfiable",
+    "file_body",
+    "parse_range",
+    "HTTP2Adapter",
+    "BandwidthPolicy",
+    "BandwidthShaper",
+    "ThrottledBody",
+    "ThrottledInput",
+    "HTTP2_AVAILABLE",
+    "JWKSCache",
+    "RateLimitIdentity",
+    "RateLimiter",
+    "RateLimitPolicy",
+    "RateLimitTable",
+    "compile_rate_limits",
+    "BloomFilter",
+    "RevocationList",
+    "StreamBody",
+    "StreamLimiter",
+    "TunnelResponse",
+    "WebSocketTunnel",
+    "client_socket",
+    "is_websocket_upgrade",
+    "open_stream",
+    "CachedDNSAdapter",
+    "DNSCache",
+    "Warmup",
+    "AllocationTracker",
+    "ProfilerBusy",
+    "SamplingProfiler",
+    "collapsed_text",
+    "JSONProjector",
+    "ProjectionError",
+    "fields_key",
+    "parse_fields",
+    "project_body",
+    "projected_etag",
+    "upstream_etags",
+    "SPAN_KIND_CLIENT",
+    "RequestTrace",
+    "Tracer",
+    "current_trace",
+    "parse_traceparent",
+    "trace_span",
 ]
@@ -0,0 +1,136 @@
+import string
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from gateway_service.service.batch import SubRequest
+
+MERGE_STRATEGIES = ("nest", "merge")
+
+
+class AggregationError(ValueError):
+    """Raised for invalid aggregation routes or requests."""
+
+
+@dataclass(frozen=True)
+class AggregationLeg:
+    """One upstream call of an aggregation route."""
+
+    name: str
+    path: str
+    method: str = "GET"
+    timeout: float = 5.0
+    required: bool = False
+
+
+@dataclass(frozen=True)
+class AggregationRoute:
+    """A declarative fan-out of parallel upstream calls merged into one body."""
+
+    name: str
+    legs: Tuple[AggregationLeg, ...]
+    merge: str = "nest"
+
+    @property
+    def deadline(self) -> float:
+        """Overall time budget - the slowest leg's timeout."""
+        return max(leg.timeout for leg in self.legs)
+
+    def build_subrequests(self, params: Mapping[str, str]) -> List[SubRequest]:
+        """Expand ``{placeholders}`` in leg paths from the request params."""
+        # Quote values so a parameter can never escape its path segment
+        values = {key: quote(str(value), safe="") for key, value in params.items()}
+
+        subrequests = []
+        for leg in self.legs:
+            try:
+                path = leg.path.format_map(values)
+            except KeyError as e:
+                raise AggregationError(f"Missing required parameter: {e.args[0]}")
+
+            subrequests.append(
+                SubRequest(
+                    id=leg.name,
+                    method=leg.method,
+                    path=path.lstrip("/"),
+                    timeout=leg.timeout,
+                )
+            )
+        return subrequests
+
+    def merge_results(
+        self, results: Dict[str, Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], int]:
+        """Merge leg results into one response body and pick the status code.
+
+        Failed optional legs are reported under ``errors`` and the response is
+        flagged ``partial``; a failed required leg turns the whole response
+        into a 502.
+        """
+        data: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        required_failed = False
+
+        for leg in self.legs:
+            result = results.get(leg.name, {"status": 504, "body": None})
+            status = result.get("status", 500)
+
+            if status >= 400:
+                errors[leg.name] = {"status": status, "body": result.get("body")}
+                required_failed = required_failed or leg.required
+                continue
+
+            body = result.get("body")
+            if self.merge == "merge" and isinstance(body, dict):
+                data.update(body)
+            else:
+                data[leg.name] = body
+
+        payload = {"data": data, "partial": bool(errors), "errors": errors}
+        return payload, 502 if required_failed else 200
+
+
+def compile_aggregation_routes(
+    routes: Optional[Mapping[str, Any]],
+) -> Dict[str, AggregationRoute]:
+    """Validate raw aggregation config and build immutable route objects."""
+    compiled: Dict[str, AggregationRoute] = {}
+
+    for name, spec in (routes or {}).items():
+        if isinstance(spec, AggregationRoute):
+            compiled[name] = spec
+            continue
+
+        merge = spec.get("merge", "nest")
+        if merge not in MERGE_STRATEGIES:
+            raise AggregationError(f"Aggregation {name}: unknown merge '{merge}'")
+
+        legs = []
+        for leg_spec in spec.get("legs", []):
+            try:
+                leg = AggregationLeg(
+                    name=leg_spec["name"],
+                    path=leg_spec["path"],
+                    method=leg_spec.get("method", "GET").upper(),
+                    timeout=float(leg_spec.get("timeout", 5.0)),
+                    required=bool(leg_spec.get("required", False)),
+                )
+                # Reject malformed templates up front rather than per request
+                list(string.Formatter().parse(leg.path))
+            except (KeyError, TypeError, ValueError) as e:
+                raise AggregationError(f"Aggregation {name}: invalid leg - {e}")
+
+            if leg.timeout <= 0:
+                raise AggregationError(f"Aggregation {name}: timeout must be > 0")
+            legs.append(leg)
+
+        if not legs:
+            raise AggregationError(f"Aggregation {name}: at least one leg required")
+        if len({leg.name for leg in legs}) != len(legs):
+            raise AggregationError(f"Aggregation {name}: leg names must be unique")
+
+        compiled[name.strip("/")] = AggregationRoute(
+            name=name.strip("/"), legs=tuple(legs), merge=merge
+        )
+
+    return compiled
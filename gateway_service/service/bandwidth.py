@@ -0,0 +1,262 @@
+import io
+import re
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from gateway_service.service.ratelimit import KEY_TYPES
+from gateway_service.utils.shared_memory import SharedTable
+
+DIRECTIONS = ("download", "upload")
+SIZE_UNITS = {"": 1, "b": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3}
+# Bodies are paced in pieces of at most this many bytes
+PIECE_SIZE = 65536
+# Seconds of traffic the per-class bytes/s figure is averaged over
+RATE_WINDOW = 10
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?b?)\s*(/\s*s)?\s*$", re.I)
+# Token bucket: available bytes (negative while in debt), last refill time
+_BUCKET = struct.Struct("<dd")
+
+
+class BandwidthError(ValueError):
+    """Raised for invalid bandwidth shaping configuration."""
+
+
+def parse_size(text: Any) -> int:
+    """Parse ``"4MB"``, ``"512KB/s"`` or a plain byte count (binary units)."""
+    match = _SIZE_PATTERN.match(str(text))
+    if not match:
+        raise BandwidthError(f"Invalid size '{text}'")
+    number, unit, _ = match.groups()
+    size = int(float(number) * SIZE_UNITS[unit.lower()])
+    if size <= 0:
+        raise BandwidthError(f"Invalid size '{text}'")
+    return size
+
+
+@dataclass(frozen=True)
+class BandwidthPolicy:
+    """Byte rates for a route class, per client in each direction.
+
+    Routes naming the same class share its buckets. ``burst`` bytes may be
+    sent at full speed before the rate applies; it defaults to one second
+    of the rate.
+    """
+
+    name: str
+    download: Optional[int] = None
+    upload: Optional[int] = None
+    burst: Optional[int] = None
+    key: str = "user"
+
+    @classmethod
+    def from_spec(cls, prefix: str, spec: Mapping[str, Any]) -> "BandwidthPolicy":
+        try:
+            rates = {
+                direction: parse_size(spec[direction])
+                for direction in DIRECTIONS
+                if spec.get(direction) is not None
+            }
+            burst = parse_size(spec["burst"]) if spec.get("burst") else None
+        except BandwidthError as e:
+            raise BandwidthError(f"Route '{prefix}': invalid bandwidth - {e}")
+        if not rates:
+            raise BandwidthError(
+                f"Route '{prefix}': bandwidth needs a download or upload rate"
+            )
+
+        key = spec.get("key", "user")
+        if key not in KEY_TYPES:
+            raise BandwidthError(
+                f"Route '{prefix}': bandwidth key must be one of {', '.join(KEY_TYPES)}"
+            )
+        return cls(name=str(spec.get("class") or prefix), burst=burst, key=key, **rates)
+
+    def rate(self, direction: str) -> Optional[int]:
+        return self.download if direction == "download" else self.upload
+
+
+class _ClassStats:
+    __slots__ = ("bytes", "delays", "delay_seconds", "recent")
+
+    def __init__(self):
+        self.bytes = 0
+        self.delays = 0
+        self.delay_seconds = 0.0
+        # [second, bytes] for the last RATE_WINDOW seconds
+        self.recent: Deque[List[int]] = deque()
+
+    def add(self, size: int, delay: float, now: float) -> None:
+        self.bytes += size
+        if delay > 0:
+            self.delays += 1
+            self.delay_seconds += delay
+        second = int(now)
+        if self.recent and self.recent[-1][0] == second:
+            self.recent[-1][1] += size
+        else:
+            self.recent.append([second, size])
+        while self.recent[0][0] <= second - RATE_WINDOW:
+            self.recent.popleft()
+
+    def rate(self, now: float) -> float:
+        since = int(now) - RATE_WINDOW
+        return sum(size for second, size in self.recent if second > since) / RATE_WINDOW
+
+
+class Throttle:
+    """Paces one request's bytes in one direction through a shared bucket."""
+
+    def __init__(
+        self,
+        shaper: "BandwidthShaper",
+        key: str,
+        rate: int,
+        burst: int,
+        stats: _ClassStats,
+    ):
+        self.shaper = shaper
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.stats = stats
+        self.piece_size = min(PIECE_SIZE, burst)
+
+    def wait(self, size: int) -> None:
+        """Account ``size`` bytes and wait until the bucket allows them."""
+        delay = self.shaper.consume(self.key, size, self.rate, self.burst)
+        self.shaper.record(self.stats, size, delay)
+        if delay > 0:
+            # Looked up per call: gevent's patched sleep only parks this
+            # greenlet, the worker keeps serving other requests
+            time.sleep(delay)
+
+    def pieces(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        size = self.piece_size
+        for chunk in chunks:
+            for start in range(0, len(chunk), size):
+                piece = chunk[start : start + size]
+                self.wait(len(piece))
+                yield piece
+
+
+class ThrottledBody:
+    """Response iterable paced by a :class:`Throttle`; closes the body it wraps."""
+
+    def __init__(self, body: Iterable[bytes], throttle: Throttle):
+        self.body = body
+        self.throttle = throttle
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.throttle.pieces(self.body)
+
+    def close(self) -> None:
+        close = getattr(self.body, "close", None)
+        if close is not None:
+            close()
+
+
+class ThrottledInput(io.RawIOBase):
+    """``wsgi.input`` read no faster than a :class:`Throttle` allows.
+
+    Reading slowly lets the socket's receive window fill up, so TCP slows
+    the client's upload down without the gateway buffering any more of it.
+    """
+
+    def __init__(self, stream: Any, throttle: Throttle):
+        super().__init__()
+        self.stream = stream
+        self.throttle = throttle
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.stream.read(min(len(buffer), self.throttle.piece_size))
+        if data:
+            self.throttle.wait(len(data))
+            buffer[: len(data)] = data
+        return len(data)
+
+
+class BandwidthShaper:
+    """Node-wide byte-rate token buckets per route class, direction and client.
+
+    Buckets live in :class:`SharedTable` memory so every worker of a node
+    draws from the same budget, and expire once they would have refilled,
+    so idle clients cost nothing. A bucket may go into debt: a request
+    sends what it has read and then waits for the debt to be paid off,
+    which queues concurrent requests of one client fairly.
+    """
+
+    def __init__(self, slots: int = 4096):
+        self.table = SharedTable(slots, _BUCKET.size)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _ClassStats]] = {}
+
+    def throttle(
+        self, policy: BandwidthPolicy, direction: str, client: str
+    ) -> Optional[Throttle]:
+        """The throttle for a client's traffic, or None if it is not shaped."""
+        rate = policy.rate(direction)
+        if rate is None:
+            return None
+        with self._lock:
+            classes = self._stats.setdefault(policy.name, {})
+            stats = classes.get(direction)
+            if stats is None:
+                stats = classes[direction] = _ClassStats()
+        return Throttle(
+            self,
+            f"bw:{policy.name}:{direction}:{client}",
+            rate,
+            policy.burst or rate,
+            stats,
+        )
+
+    def consume(self, key: str, size: int, rate: int, burst: int) -> float:
+        """Take ``size`` bytes from a bucket; seconds to wait before sending."""
+        delay = 0.0
+
+        def take(current: Optional[bytes]) -> bytes:
+            nonlocal delay
+            now = time.time()
+            if current is None:
+                tokens = float(burst)
+            else:
+                tokens, updated = _BUCKET.unpack(current)
+                tokens = min(float(burst), tokens + (now - updated) * rate)
+            tokens -= size
+            if tokens < 0:
+                delay = -tokens / rate
+            return _BUCKET.pack(tokens, now)
+
+        # Kept until the bucket would be full again, then it starts afresh
+        current = self.table.get(key)
+        missing = burst - _BUCKET.unpack(current)[0] if current else 0.0
+        self.table.update(key, take, (missing + size) / rate + 1)
+        return delay
+
+    def record(self, stats: _ClassStats, size: int, delay: float) -> None:
+        with self._lock:
+            stats.add(size, delay, time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    direction: {
+                        "bytes": stats.bytes,
+                        "bytes_per_second": round(stats.rate(now), 1),
+                        "delays": stats.delays,
+                        "delay_seconds": round(stats.delay_seconds, 3),
+                    }
+                    for direction, stats in classes.items()
+                }
+                for name, classes in self._stats.items()
+            }
@@ -0,0 +1,224 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ALLOWED_METHODS = {"GET", "POST", "PUT", "DELETE", "PATCH"}
+
+logger = logging.getLogger(__name__)
+
+
+class BatchError(ValueError):
+    """Raised when a batch payload is malformed."""
+
+
+@dataclass
+class SubRequest:
+    """A single request inside a batch."""
+
+    id: str
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    body: Any = None
+    depends_on: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+
+
+def parse_batch(payload: Any, max_requests: int) -> List[SubRequest]:
+    """Validate a batch payload and build the list of sub-requests."""
+    if isinstance(payload, dict):
+        payload = payload.get("requests")
+
+    if not isinstance(payload, list) or not payload:
+        raise BatchError("Batch must contain a non-empty 'requests' list")
+
+    if len(payload) > max_requests:
+        raise BatchError(f"Batch may contain at most {max_requests} requests")
+
+    subrequests: List[SubRequest] = []
+    seen = set()
+
+    for index, item in enumerate(payload):
+        if not isinstance(item, dict):
+            raise BatchError(f"Request #{index} must be an object")
+
+        request_id = str(item.get("id", index))
+        if request_id in seen:
+            raise BatchError(f"Duplicate request id: {request_id}")
+        seen.add(request_id)
+
+        method = str(item.get("method", "GET")).upper()
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f"Request {request_id}: unsupported method {method}")
+
+        path = item.get("path")
+        if not isinstance(path, str) or not path.strip("/"):
+            raise BatchError(f"Request {request_id}: 'path' is required")
+
+        headers = item.get("headers") or {}
+        params = item.get("params") or {}
+        if not isinstance(headers, dict) or not isinstance(params, dict):
+            raise BatchError(
+                f"Request {request_id}: 'headers' and 'params' must be objects"
+            )
+
+        depends_on = item.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+
+        timeout = item.get("timeout")
+        if timeout is not None:
+            if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+                raise BatchError(f"Request {request_id}: 'timeout' must be a number")
+            if timeout <= 0:
+                raise BatchError(f"Request {request_id}: 'timeout' must be positive")
+            timeout = float(timeout)
+
+        subrequests.append(
+            SubRequest(
+                id=request_id,
+                method=method,
+                path=path.lstrip("/"),
+                headers={str(k): str(v) for k, v in headers.items()},
+                params=params,
+                body=item.get("body"),
+                depends_on=[str(dep) for dep in depends_on],
+                timeout=timeout,
+            )
+        )
+
+    _check_dependencies(subrequests)
+    return subrequests
+
+
+def _check_dependencies(subrequests: List[SubRequest]) -> None:
+    """Ensure every dependency exists and the dependency graph is acyclic."""
+    by_id = {sub.id: sub for sub in subrequests}
+
+    for sub in subrequests:
+        for dep in sub.depends_on:
+            if dep not in by_id:
+                raise BatchError(f"Request {sub.id} depends on unknown request {dep}")
+            if dep == sub.id:
+                raise BatchError(f"Request {sub.id} cannot depend on itself")
+
+    # Kahn's algorithm - anything left over is part of a cycle
+    remaining = {sub.id: set(sub.depends_on) for sub in subrequests}
+    while remaining:
+        ready = [sub_id for sub_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise BatchError(
+                f"Dependency cycle between requests: {', '.join(sorted(remaining))}"
+            )
+        for sub_id in ready:
+            del remaining[sub_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+class BatchExecutor:
+    """Run sub-requests concurrently, yielding results as they complete.
+
+    ``handler`` receives a :class:`SubRequest` and returns a result dict with at
+    least a ``status`` key. Sub-requests wait for their ``depends_on`` entries;
+    if any dependency fails (status >= 400) the dependent request is skipped
+    with a 424 result instead of being sent upstream.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[SubRequest], Dict[str, Any]],
+        max_concurrency: int = 8,
+    ):
+        self.handler = handler
+        self.max_concurrency = max(1, max_concurrency)
+
+    def run(
+        self, subrequests: List[SubRequest], deadline: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Execute all sub-requests and yield each result when it is ready.
+
+        If ``deadline`` (seconds) passes before everything finishes, the
+        outstanding sub-requests are reported as 504 and abandoned.
+        """
+        pending = {sub.id: sub for sub in subrequests}
+        statuses: Dict[str, int] = {}
+        running: Dict[Future, SubRequest] = {}
+        expires_at = time.monotonic() + deadline if deadline else None
+
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while pending or running:
+                # Schedule everything whose dependencies have finished
+                for sub_id in list(pending):
+                    sub = pending[sub_id]
+                    if any(dep not in statuses for dep in sub.depends_on):
+                        continue
+
+                    del pending[sub_id]
+                    failed = [dep for dep in sub.depends_on if statuses[dep] >= 400]
+                    if failed:
+                        statuses[sub.id] = 424
+                        yield {
+                            "id": sub.id,
+                            "status": 424,
+                            "body": {
+                                "error": "Failed dependency",
+                                "message": f"Dependencies failed: {', '.join(failed)}",
+                            },
+                        }
+                        continue
+
+                    running[pool.submit(self._call, sub)] = sub
+
+                if not running:
+                    # Only skipped requests were resolved this round
+                    continue
+
+                timeout = None
+                if expires_at is not None:
+                    timeout = max(0.0, expires_at - time.monotonic())
+
+                done, _ = wait(
+                    list(running), timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    # Deadline hit - give up on everything still outstanding
+                    for sub in list(running.values()) + list(pending.values()):
+                        yield {
+                            "id": sub.id,
+                            "status": 504,
+                            "body": {
+                                "error": "Service timeout",
+                                "message": "The request timed out",
+                            },
+                        }
+                    return
+
+                for future in done:
+                    sub = running.pop(future)
+                    result = future.result()
+                    statuses[sub.id] = int(result.get("status", 500))
+                    yield result
+        finally:
+            # Never block the caller on abandoned sub-requests
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _call(self, sub: SubRequest) -> Dict[str, Any]:
+        """Invoke the handler, turning unexpected errors into a 500 result."""
+        try:
+            result = self.handler(sub)
+        except Exception:
+            logger.exception(f"Batch request {sub.id} failed")
+            result = {
+                "status": 500,
+                "body": {
+                    "error": "Internal server error",
+                    "message": "An unexpected error occurred",
+                },
+            }
+        result.setdefault("id", sub.id)
+        return result
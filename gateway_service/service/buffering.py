@@ -0,0 +1,231 @@
+import io
+import tempfile
+import threading
+from typing import IO, Any, Dict, Iterator, Optional
+
+import requests
+
+CHUNK_SIZE = 65536
+
+
+class BufferBudget:
+    """Per-worker caps on bytes held by buffered responses in memory and on disk."""
+
+    def __init__(self, max_memory_bytes: int, max_disk_bytes: int):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, memory: int = 0, disk: int = 0) -> bool:
+        """Claim bytes against the caps; all-or-nothing."""
+        with self._lock:
+            if self.memory_bytes + memory > self.max_memory_bytes:
+                return False
+            if self.disk_bytes + disk > self.max_disk_bytes:
+                return False
+            self.memory_bytes += memory
+            self.disk_bytes += disk
+            return True
+
+    def release(self, memory: int = 0, disk: int = 0) -> None:
+        with self._lock:
+            self.memory_bytes -= memory
+            self.disk_bytes -= disk
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class SpooledBody:
+    """WSGI response iterable over a spooled upstream body.
+
+    Yields the spooled bytes and then, if the budget ran out part-way, the
+    rest of the upstream stream. ``close`` (called by the WSGI server once the
+    client is done) gives the reserved bytes back and deletes the temp file.
+    """
+
+    def __init__(
+        self,
+        spool: IO[bytes],
+        budget: BufferBudget,
+        memory: int,
+        disk: int,
+        remainder: Optional[Iterator[bytes]] = None,
+        upstream: Optional[requests.Response] = None,
+    ):
+        self.spool = spool
+        self.budget = budget
+        self.memory = memory
+        self.disk = disk
+        self.remainder = remainder
+        self.upstream = upstream
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.spool.seek(0)
+        while True:
+            chunk = self.spool.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+        if self.remainder is not None:
+            yield from self.remainder
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.spool.close()
+        self.budget.release(memory=self.memory, disk=self.disk)
+        if self.upstream is not None:
+            self.upstream.close()
+
+
+class ResponseSpooler:
+    """Read upstream responses quickly so their connection is freed at once.
+
+    Bodies are held in memory up to ``memory_threshold`` bytes and spilled to
+    an anonymous temp file beyond that; the client is then served from the
+    spool at its own pace. When the worker's :class:`BufferBudget` is
+    exhausted the response falls back to plain pass-through streaming.
+    """
+
+    def __init__(
+        self,
+        budget: BufferBudget,
+        memory_threshold: int,
+        spool_dir: Optional[str] = None,
+    ):
+        self.budget = budget
+        self.memory_threshold = memory_threshold
+        self.spool_dir = spool_dir
+
+    def spool(self, response: requests.Response) -> Optional[SpooledBody]:
+        """Buffer ``response``; ``None`` means stream it directly instead."""
+        content_length = response.headers.get("Content-Length")
+        # Content-Length counts the bytes on the wire, but iter_content yields
+        # them decoded: a compressed body's real size is only known as it comes
+        encoding = response.headers.get("Content-Encoding", "identity").lower()
+        if content_length and content_length.isdigit() and encoding == "identity":
+            size = int(content_length)
+            in_memory = size <= self.memory_threshold
+            reserved = self.budget.reserve(
+                memory=size if in_memory else 0, disk=0 if in_memory else size
+            )
+            if not reserved:
+                self.budget.fallbacks += 1
+                return None
+            return self._spool_known(response, size, in_memory)
+
+        return self._spool_unknown(response)
+
+    def _spool_known(
+        self, response: requests.Response, size: int, in_memory: bool
+    ) -> SpooledBody:
+        spool: IO[bytes] = (
+            io.BytesIO() if in_memory else tempfile.TemporaryFile(dir=self.spool_dir)
+        )
+        memory = size if in_memory else 0
+        disk = 0 if in_memory else size
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        written = 0
+
+        try:
+            for chunk in chunks:
+                written += len(chunk)
+                if written > size:
+                    # More than announced - never write past the reservation
+                    return self._partial(spool, memory, disk, chunk, chunks, response)
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            self.budget.release(memory=memory, disk=disk)
+            response.close()
+            raise
+
+        # Fully read - the connection goes straight back to the pool
+        response.close()
+        return SpooledBody(spool, self.budget, memory=memory, disk=disk)
+
+    def _spool_unknown(self, response: requests.Response) -> Optional[SpooledBody]:
+        # Length unknown (chunked): reserve as we go, spilling to disk past the
+        # threshold and handing the rest over to streaming if the caps run out
+        spool: IO[bytes] = io.BytesIO()
+        memory = disk = 0
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+
+        try:
+            for chunk in chunks:
+                size = len(chunk)
+                if isinstance(spool, io.BytesIO):
+                    if memory + size <= self.memory_threshold and self.budget.reserve(
+                        memory=size
+                    ):
+                        spool.write(chunk)
+                        memory += size
+                        continue
+
+                    if not self.budget.reserve(disk=memory + size):
+                        return self._partial(
+                            spool, memory, disk, chunk, chunks, response
+                        )
+
+                    spilled = tempfile.TemporaryFile(dir=self.spool_dir)
+                    spilled.write(spool.getvalue())
+                    spilled.write(chunk)
+                    spool.close()
+                    spool = spilled
+                    self.budget.release(memory=memory)
+                    disk, memory = memory + size, 0
+                    continue
+
+                if not self.budget.reserve(disk=size):
+                    return self._partial(spool, memory, disk, chunk, chunks, response)
+                spool.write(chunk)
+                disk += size
+        except Exception:
+            spool.close()
+            self.budget.release(memory=memory, disk=disk)
+            response.close()
+            raise
+
+        response.close()
+        return SpooledBody(spool, self.budget, memory=memory, disk=disk)
+
+    def _partial(
+        self,
+        spool: IO[bytes],
+        memory: int,
+        disk: int,
+        pending: bytes,
+        chunks: Iterator[bytes],
+        response: requests.Response,
+    ) -> SpooledBody:
+        """Serve what was spooled, then keep streaming from upstream."""
+        self.budget.fallbacks += 1
+
+        def remainder() -> Iterator[bytes]:
+            yield pending
+            yield from chunks
+
+        return SpooledBody(
+            spool,
+            self.budget,
+            memory=memory,
+            disk=disk,
+            remainder=remainder(),
+            upstream=response,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory_threshold": self.memory_threshold, **self.budget.stats()}
@@ -0,0 +1,558 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import redis
+import requests
+from flask import current_app, g, has_request_context
+from requests.adapters import HTTPAdapter
+
+from gateway_service.flask_config import ServiceConfig
+from gateway_service.service.aggregation import (
+    AggregationError,
+    AggregationRoute,
+    compile_aggregation_routes,
+)
+from gateway_service.service.bandwidth import BandwidthError, BandwidthPolicy
+from gateway_service.service.dns import CachedDNSAdapter, DNSCache
+from gateway_service.service.http2 import HTTP2_AVAILABLE, HTTP2Adapter
+from gateway_service.service.mirror import MirrorPolicy, MirrorPolicyError
+from gateway_service.service.ratelimit import (
+    RateLimitError,
+    RateLimitTable,
+    compile_rate_limits,
+)
+from gateway_service.service.traffic import (
+    TrafficSplit,
+    TrafficSplitError,
+    compile_traffic_split,
+)
+from gateway_service.service.trie import RouteTrie
+from gateway_service.utils.background import BackgroundThread
+from gateway_service.utils.utils import create_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a gateway configuration fails validation."""
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Per-route proxy behaviour, keyed by path prefix like ROUTE_MAPPINGS."""
+
+    mirror: Optional[MirrorPolicy] = None
+    buffer: bool = False
+    stream: bool = False
+    project: bool = False
+    ranges: bool = False
+    bandwidth: Optional[BandwidthPolicy] = None
+
+
+DEFAULT_ROUTE_POLICY = RoutePolicy()
+
+
+def compile_route_policy(
+    prefix: str, spec: Mapping[str, Any], services: Mapping[str, ServiceConfig]
+) -> RoutePolicy:
+    """Validate one ROUTE_POLICIES entry."""
+    mirror = None
+    if spec.get("mirror"):
+        try:
+            mirror = MirrorPolicy.from_spec(prefix, spec["mirror"])
+        except MirrorPolicyError as e:
+            raise ConfigValidationError(str(e))
+        if mirror.service not in services:
+            raise ConfigValidationError(
+                f"Route '{prefix}' mirrors to unknown service '{mirror.service}'"
+            )
+
+    buffer = bool(spec.get("buffer", False))
+    stream = bool(spec.get("stream", False))
+    if buffer and stream:
+        raise ConfigValidationError(
+            f"Route '{prefix}' cannot be both buffered and streamed"
+        )
+    project = bool(spec.get("project", False))
+    if project and stream:
+        raise ConfigValidationError(
+            f"Route '{prefix}' cannot project fields of a stream"
+        )
+
+    ranges = bool(spec.get("ranges", False))
+    if ranges and (stream or project):
+        raise ConfigValidationError(
+            f"Route '{prefix}' cannot serve byte ranges of a stream or projection"
+        )
+
+    bandwidth = None
+    if spec.get("bandwidth"):
+        try:
+            bandwidth = BandwidthPolicy.from_spec(prefix, spec["bandwidth"])
+        except BandwidthError as e:
+            raise ConfigValidationError(str(e))
+
+    return RoutePolicy(
+        mirror=mirror,
+        buffer=buffer,
+        stream=stream,
+        project=project,
+        ranges=ranges,
+        bandwidth=bandwidth,
+    )
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable, precompiled view of the gateway's routing configuration."""
+
+    version: int
+    source: str
+    checksum: str
+    services: Mapping[str, ServiceConfig]
+    routes: RouteTrie
+    public_endpoints: RouteTrie
+    aggregation_routes: Mapping[str, AggregationRoute]
+    policies: RouteTrie
+    rate_limits: RateLimitTable
+    spec: Mapping[str, Any] = field(repr=False)
+    loaded_at: float = field(default_factory=time.time)
+
+    def resolve_route(self, path: str) -> Optional[Union[str, TrafficSplit]]:
+        """Map a request path to its service name or weighted split."""
+        return self.routes.match(path)
+
+    def policy_for(self, path: str) -> RoutePolicy:
+        """Proxy policy of the longest matching prefix, or the default."""
+        return self.policies.match(path) or DEFAULT_ROUTE_POLICY
+
+    def is_public(self, path: str) -> bool:
+        """Check whether ``path`` is a public (unauthenticated) endpoint."""
+        return self.public_endpoints.match(path) is not None
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary suitable for admin endpoints."""
+        return {
+            "version": self.version,
+            "source": self.source,
+            "checksum": self.checksum,
+            "loaded_at": self.loaded_at,
+            "services": sorted(self.services),
+            "routes": len(self.routes),
+            "public_endpoints": len(self.public_endpoints),
+            "aggregation_routes": sorted(self.aggregation_routes),
+            "route_policies": len(self.policies),
+            "rate_limit_policies": len(self.rate_limits),
+        }
+
+
+def spec_from_app_config(app_config: Mapping[str, Any]) -> Dict[str, Any]:
+    """Build a raw config spec from the environment-driven Flask config."""
+    return {
+        "services": {
+            name: asdict(service) if isinstance(service, ServiceConfig) else service
+            for name, service in app_config.get("SERVICES", {}).items()
+        },
+        "route_mappings": dict(app_config.get("ROUTE_MAPPINGS", {})),
+        "public_endpoints": list(app_config.get("PUBLIC_ENDPOINTS", [])),
+        "aggregation_routes": dict(app_config.get("AGGREGATION_ROUTES", {})),
+        "route_policies": dict(app_config.get("ROUTE_POLICIES", {})),
+        "rate_limit_policies": list(app_config.get("RATE_LIMIT_POLICIES", [])),
+        "rate_limit_default": [f"{app_config.get('RATE_LIMIT_PER_MINUTE', 100)}/m"],
+    }
+
+
+def compile_snapshot(
+    spec: Mapping[str, Any], version: int, source: str
+) -> ConfigSnapshot:
+    """Validate a raw spec and compile it into a :class:`ConfigSnapshot`."""
+    services: Dict[str, ServiceConfig] = {}
+    for name, service_spec in (spec.get("services") or {}).items():
+        try:
+            service = ServiceConfig(**service_spec)
+        except TypeError as e:
+            raise ConfigValidationError(f"Service {name}: {e}")
+
+        if not service.url.startswith(("http://", "https://")):
+            raise ConfigValidationError(f"Service {name}: url must be http(s)")
+        if service.timeout <= 0:
+            raise ConfigValidationError(f"Service {name}: timeout must be > 0")
+        if not service.health_endpoint.startswith("/"):
+            raise ConfigValidationError(
+                f"Service {name}: health_endpoint must start with '/'"
+            )
+        services[name] = service
+
+    routes: Dict[str, Union[str, TrafficSplit]] = {}
+    for prefix, target in (spec.get("route_mappings") or {}).items():
+        if not prefix:
+            raise ConfigValidationError("Route prefixes must not be empty")
+
+        # A route maps to one service, or to weighted versions of it
+        if isinstance(target, Mapping):
+            try:
+                target = compile_traffic_split(prefix, target)
+            except TrafficSplitError as e:
+                raise ConfigValidationError(str(e))
+            service_names = target.targets
+        else:
+            service_names = (target,)
+
+        for service_name in service_names:
+            if service_name not in services:
+                raise ConfigValidationError(
+                    f"Route '{prefix}' targets unknown service '{service_name}'"
+                )
+        routes[prefix] = target
+
+    public_endpoints = spec.get("public_endpoints") or []
+    if not all(isinstance(endpoint, str) and endpoint for endpoint in public_endpoints):
+        raise ConfigValidationError("Public endpoints must be non-empty strings")
+
+    try:
+        aggregation_routes = compile_aggregation_routes(spec.get("aggregation_routes"))
+    except AggregationError as e:
+        raise ConfigValidationError(str(e))
+
+    policies = {
+        prefix: compile_route_policy(prefix, policy_spec or {}, services)
+        for prefix, policy_spec in (spec.get("route_policies") or {}).items()
+    }
+    # Routes of one bandwidth class share its buckets, so they must agree
+    bandwidth_classes: Dict[str, BandwidthPolicy] = {}
+    for prefix, policy in policies.items():
+        if policy.bandwidth is None:
+            continue
+        known = bandwidth_classes.setdefault(policy.bandwidth.name, policy.bandwidth)
+        if known != policy.bandwidth:
+            raise ConfigValidationError(
+                f"Route '{prefix}': bandwidth class '{known.name}' is defined "
+                "differently on another route"
+            )
+
+    try:
+        rate_limits = compile_rate_limits(
+            spec.get("rate_limit_policies"), spec.get("rate_limit_default") or []
+        )
+    except RateLimitError as e:
+        raise ConfigValidationError(str(e))
+
+    canonical = json.dumps(spec, sort_keys=True, default=str)
+
+    return ConfigSnapshot(
+        version=version,
+        source=source,
+        checksum=hashlib.sha256(canonical.encode()).hexdigest()[:16],
+        services=MappingProxyType(services),
+        routes=RouteTrie(routes),
+        public_endpoints=RouteTrie({endpoint: True for endpoint in public_endpoints}),
+        aggregation_routes=MappingProxyType(aggregation_routes),
+        policies=RouteTrie(policies),
+        rate_limits=rate_limits,
+        spec=MappingProxyType(json.loads(canonical)),
+    )
+
+
+class ServicePools:
+    """Per-service keep-alive connection pools, kept warm across config swaps."""
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        dns_cache: Optional[DNSCache] = None,
+        http2_max_streams: int = 100,
+        http2_connections: int = 2,
+    ):
+        self.pool_size = pool_size
+        self.dns_cache = dns_cache
+        self.http2_max_streams = http2_max_streams
+        self.http2_connections = http2_connections
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sessions: Dict[str, requests.Session] = {}
+        # service -> (url, http2) the session was built for
+        self._targets: Dict[str, Tuple[str, bool]] = {}
+
+    def session_for(
+        self, service_name: str, url: str, http2: bool = False
+    ) -> requests.Session:
+        """Return the pooled session for a service, creating it on demand."""
+        if self._pid != os.getpid():
+            # Sockets must never be shared with the parent process after fork
+            with self._lock:
+                self._sessions, self._targets, self._pid = {}, {}, os.getpid()
+
+        target = (url, http2)
+        session = self._sessions.get(service_name)
+        if session is not None and self._targets.get(service_name) == target:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(service_name)
+            if session is not None and self._targets.get(service_name) == target:
+                return session
+
+            session = requests.Session()
+            if http2 and not HTTP2_AVAILABLE:
+                logger.warning(
+                    f"Service {service_name} asks for HTTP/2 but httpx[http2] "
+                    "is not installed; using HTTP/1.1"
+                )
+            if http2 and HTTP2_AVAILABLE:
+                adapter = HTTP2Adapter(
+                    url, self.http2_max_streams, self.http2_connections
+                )
+            elif self.dns_cache is not None:
+                adapter = CachedDNSAdapter(
+                    self.dns_cache, pool_connections=1, pool_maxsize=self.pool_size
+                )
+            else:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            stale = self._sessions.get(service_name)
+            self._sessions[service_name] = session
+            self._targets[service_name] = target
+
+        if stale is not None:
+            stale.close()
+        return session
+
+    def reconcile(self, services: Mapping[str, ServiceConfig]) -> None:
+        """Drop pools whose service was removed, moved or changed protocol."""
+        with self._lock:
+            stale = [
+                name
+                for name, target in self._targets.items()
+                if name not in services
+                or (services[name].url, services[name].http2) != target
+            ]
+            sessions = [self._sessions.pop(name) for name in stale]
+            for name in stale:
+                self._targets.pop(name)
+
+        for session in sessions:
+            session.close()
+
+
+class ConfigRegistry:
+    """Holds the active :class:`ConfigSnapshot` and swaps it atomically.
+
+    Snapshots are loaded from the Flask config at startup and, optionally,
+    from a JSON file (``GATEWAY_CONFIG_FILE``) or a Redis key
+    (``GATEWAY_CONFIG_REDIS_KEY``). Keys present in the external source
+    override the environment-driven defaults. Invalid configs are rejected
+    and the current snapshot stays active; previous snapshots are kept for
+    rollback.
+    """
+
+    def __init__(self, app_config: Mapping[str, Any]):
+        self.base_spec = spec_from_app_config(app_config)
+        self.config_file = app_config.get("GATEWAY_CONFIG_FILE")
+        self.redis_key = app_config.get("GATEWAY_CONFIG_REDIS_KEY")
+        self.redis_channel = app_config.get(
+            "GATEWAY_CONFIG_CHANNEL", "turbogate:config"
+        )
+        self.redis_url = app_config.get("REDIS_URL")
+        self.poll_interval = app_config.get("GATEWAY_CONFIG_POLL_INTERVAL", 5)
+        dns_ttl = app_config.get("DNS_CACHE_TTL", 30)
+        self.pools = ServicePools(
+            app_config.get("SERVICE_POOL_SIZE", 10),
+            DNSCache(dns_ttl, app_config.get("DNS_CACHE_STALE_TTL", 300))
+            if dns_ttl > 0
+            else None,
+            http2_max_streams=app_config.get("SERVICE_HTTP2_MAX_STREAMS", 100),
+            http2_connections=app_config.get("SERVICE_HTTP2_CONNECTIONS", 2),
+        )
+
+        self._swap_lock = threading.Lock()
+        self._history: Deque[ConfigSnapshot] = deque(
+            maxlen=app_config.get("GATEWAY_CONFIG_HISTORY", 5)
+        )
+        self._version = 0
+        self._file_mtime: Optional[float] = None
+        self._watcher: Optional[BackgroundThread] = None
+        self._redis: Optional[redis.Redis] = None
+        self._redis_pid: Optional[int] = None
+
+        self.snapshot = self._compile(self.base_spec, "env")
+        self.reload()
+
+        if self.config_file:
+            self._watcher = BackgroundThread(self._watch_file, "config-file-watcher")
+        elif self.redis_key and self.redis_url:
+            self._watcher = BackgroundThread(self._watch_redis, "config-redis-watcher")
+
+    @property
+    def source(self) -> str:
+        if self.config_file:
+            return f"file:{self.config_file}"
+        if self.redis_key:
+            return f"redis:{self.redis_key}"
+        return "env"
+
+    @property
+    def redis(self) -> redis.Redis:
+        """This process's client for the config key and channel."""
+        if self._redis is None or self._redis_pid != os.getpid():
+            # Connections must never be shared with the parent process after fork
+            self._redis = create_redis_client(self.redis_url)
+            self._redis_pid = os.getpid()
+        return self._redis
+
+    def _compile(self, spec: Mapping[str, Any], source: str) -> ConfigSnapshot:
+        self._version += 1
+        return compile_snapshot(spec, self._version, source)
+
+    def _swap(self, snapshot: ConfigSnapshot, remember: bool = True) -> None:
+        with self._swap_lock:
+            if remember:
+                self._history.append(self.snapshot)
+            # A single attribute assignment - readers see old or new, never mixed
+            self.snapshot = snapshot
+        self.pools.reconcile(snapshot.services)
+        logger.info(
+            f"Gateway config v{snapshot.version} active "
+            f"(source={snapshot.source}, checksum={snapshot.checksum})"
+        )
+
+    def load(self, overrides: Mapping[str, Any], source: str = "api") -> ConfigSnapshot:
+        """Validate ``overrides`` on top of the base spec and activate them."""
+        spec = {**self.base_spec, **overrides}
+        with self._swap_lock:
+            snapshot = self._compile(spec, source)
+        if snapshot.checksum != self.snapshot.checksum:
+            self._swap(snapshot)
+        return self.snapshot
+
+    def reload(self) -> ConfigSnapshot:
+        """Re-read the external source, keeping the current config on error."""
+        try:
+            overrides = self._read_source()
+        except Exception as e:
+            logger.error(f"Could not read gateway config from {self.source}: {e}")
+            return self.snapshot
+
+        if overrides is None:
+            return self.snapshot
+
+        try:
+            return self.load(overrides, source=self.source)
+        except ConfigValidationError as e:
+            logger.error(f"Rejected invalid gateway config from {self.source}: {e}")
+            raise
+
+    def rollback(self) -> ConfigSnapshot:
+        """Re-activate the previous snapshot and persist it to the source.
+
+        Writing the previous spec back to the file or Redis key makes every
+        worker converge on it, not just the one that served this call.
+        """
+        with self._swap_lock:
+            if not self._history:
+                raise ConfigValidationError("No previous configuration to roll back to")
+            previous = self._history.pop()
+
+        self._swap(previous, remember=False)
+        self._write_source(previous.spec)
+        return previous
+
+    def history(self) -> Iterable[Dict[str, Any]]:
+        return [snapshot.describe() for snapshot in reversed(self._history)]
+
+    def ensure_watching(self) -> None:
+        """Start the change watcher in this process if one is configured."""
+        if self._watcher is not None:
+            self._watcher.ensure_running()
+
+    def session_for(self, service_name: str) -> Optional[requests.Session]:
+        """Pooled session for ``service_name`` under the active snapshot."""
+        service = self.snapshot.services.get(service_name)
+        if service is None:
+            return None
+        return self.pools.session_for(service_name, service.url, service.http2)
+
+    # Sources
+
+    def _read_source(self) -> Optional[Dict[str, Any]]:
+        if self.config_file:
+            if not os.path.exists(self.config_file):
+                return None
+            self._file_mtime = os.path.getmtime(self.config_file)
+            with open(self.config_file) as f:
+                return json.load(f)
+
+        if self.redis_key and self.redis_url:
+            raw = self.redis.get(self.redis_key)
+            return json.loads(raw) if raw else None
+
+        return None
+
+    def _write_source(self, spec: Mapping[str, Any]) -> None:
+        payload = json.dumps(dict(spec), indent=2, sort_keys=True)
+
+        if self.config_file:
+            tmp_path = f"{self.config_file}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.config_file)
+            self._file_mtime = os.path.getmtime(self.config_file)
+        elif self.redis_key and self.redis_url:
+            self.redis.set(self.redis_key, payload)
+            self.redis.publish(self.redis_channel, "reload")
+
+    def _watch_file(self, stop: threading.Event) -> None:
+        while not stop.wait(self.poll_interval):
+            try:
+                mtime = os.path.getmtime(self.config_file)
+            except OSError:
+                continue
+            if mtime != self._file_mtime:
+                try:
+                    self.reload()
+                except ConfigValidationError:
+                    # Remember the bad file so it is not re-read every poll
+                    self._file_mtime = mtime
+
+    def _watch_redis(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.redis_channel)
+                # Catch up on anything published while we were disconnected
+                self._reload_quietly()
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=self.poll_interval)
+                    if message:
+                        self._reload_quietly()
+            except Exception as e:
+                logger.warning(f"Config subscription error, retrying: {e}")
+                stop.wait(self.poll_interval)
+            finally:
+                # Hands its connection back to the pool for the next attempt
+                pubsub.close()
+
+    def _reload_quietly(self) -> None:
+        try:
+            self.reload()
+        except ConfigValidationError:
+            pass
+
+
+def get_config_snapshot() -> ConfigSnapshot:
+    """Active snapshot, pinned for the duration of the current request."""
+    if has_request_context():
+        snapshot = g.get("config_snapshot")
+        if snapshot is None:
+            snapshot = current_app.extensions["config_registry"].snapshot
+            g.config_snapshot = snapshot
+        return snapshot
+    return current_app.extensions["config_registry"].snapshot
@@ -0,0 +1,189 @@
+import ipaddress
+import logging
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NameResolutionError,
+    NewConnectionError,
+)
+from urllib3.util import connection
+
+from gateway_service.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before retrying a failed lookup while serving stale answers
+_RETRY_INTERVAL = 5.0
+
+
+class DNSCache:
+    """Resolved upstream addresses, reused for ``ttl`` seconds per worker.
+
+    A background thread re-resolves known hosts before their answers
+    expire, so new upstream connections do not wait on DNS. When a lookup
+    fails the last good answer keeps being served for up to ``stale_ttl``
+    seconds, so a resolver blip does not take healthy upstreams down.
+    """
+
+    def __init__(self, ttl: float = 30, stale_ttl: float = 300):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # (host, port) -> (expires_at, resolved_at, addresses)
+        self._entries: Dict[Tuple[str, int], Tuple[float, float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.lookups = 0
+        self.errors = 0
+        self.pool_classes = _pool_classes(self)
+        self._refresher = BackgroundThread(self._refresh_loop, "dns-refresh")
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Addresses for ``host``, from the cache while the answer is fresh."""
+        if _is_ip(host):
+            return [host]
+        self._refresher.ensure_running()
+
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[2]
+        return self._refresh(key, entry)
+
+    def _refresh(self, key: Tuple[str, int], entry) -> List[str]:
+        self.lookups += 1
+        try:
+            addresses = _lookup(*key)
+        except socket.gaierror:
+            self.errors += 1
+            now = time.monotonic()
+            if entry is None or now - entry[1] > self.stale_ttl:
+                raise
+            logger.warning(f"DNS lookup for {key[0]} failed, using cached addresses")
+            with self._lock:
+                self._entries[key] = (now + _RETRY_INTERVAL, entry[1], entry[2])
+            return entry[2]
+
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, now, addresses)
+        return addresses
+
+    def _refresh_loop(self, stop: threading.Event) -> None:
+        while not stop.wait(max(self.ttl / 2, 1.0)):
+            soon = time.monotonic() + self.ttl / 2
+            for key, entry in list(self._entries.items()):
+                if entry[0] <= soon:
+                    try:
+                        self._refresh(key, entry)
+                    except socket.gaierror as e:
+                        logger.warning(f"DNS refresh for {key[0]} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hosts": len(self._entries),
+            "hits": self.hits,
+            "lookups": self.lookups,
+            "errors": self.errors,
+        }
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+def _lookup(host: str, port: int) -> List[str]:
+    addresses: List[str] = []
+    for *_, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+class _CachedDNSConnection:
+    """Connects through the cache; TLS still verifies against the hostname."""
+
+    dns_cache: DNSCache
+
+    def __init__(self, host: str, *args: Any, **kwargs: Any):
+        # ``host`` drops an FQDN's trailing dot, which the lookup should keep
+        # so the resolver does not try its search domains
+        self.lookup_host = host
+        super().__init__(host, *args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        try:
+            addresses = self.dns_cache.resolve(self.lookup_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        for index, address in enumerate(addresses):
+            try:
+                sock = connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+                break
+            except socket.timeout as e:
+                if index == len(addresses) - 1:
+                    raise ConnectTimeoutError(
+                        self,
+                        f"Connection to {self.host} timed out. "
+                        f"(connect timeout={self.timeout})",
+                    ) from e
+            except OSError as e:
+                if index == len(addresses) - 1:
+                    raise NewConnectionError(
+                        self, f"Failed to establish a new connection: {e}"
+                    ) from e
+
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+
+def _pool_classes(cache: DNSCache) -> Dict[str, type]:
+    attrs = {"dns_cache": cache}
+    http = type(
+        "CachedDNSHTTPConnection", (_CachedDNSConnection, HTTPConnection), attrs
+    )
+    https = type(
+        "CachedDNSHTTPSConnection", (_CachedDNSConnection, HTTPSConnection), attrs
+    )
+    return {
+        "http": type(
+            "CachedDNSHTTPConnectionPool",
+            (HTTPConnectionPool,),
+            {"ConnectionCls": http},
+        ),
+        "https": type(
+            "CachedDNSHTTPSConnectionPool",
+            (HTTPSConnectionPool,),
+            {"ConnectionCls": https},
+        ),
+    }
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose connections resolve hosts through a :class:`DNSCache`."""
+
+    def __init__(self, dns_cache: DNSCache, **kwargs: Any):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.dns_cache.pool_classes
@@ -0,0 +1,178 @@
+import importlib.util
+import logging
+import threading
+from typing import Callable, Iterator, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from gateway_service.utils.headers import HOP_BY_HOP
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# httpx negotiates HTTP/2 only when the h2 package is installed as well
+HTTP2_AVAILABLE = httpx is not None and importlib.util.find_spec("h2") is not None
+
+
+def _translate(error: Exception, streaming: bool = False) -> requests.RequestException:
+    """The requests exception callers already handle for an httpx error."""
+    if streaming:
+        return requests.exceptions.ChunkedEncodingError(str(error))
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.ReadTimeout(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+
+class HTTP2Body:
+    """``Response.raw`` of a multiplexed response.
+
+    ``iter_content`` reads it through :meth:`stream`. The response's stream
+    slot is given back once the body is read, or when it is closed early.
+    """
+
+    def __init__(self, response: "httpx.Response", release: Callable[[], None]):
+        self._response = response
+        self._release = release
+        self._closed = False
+        self.http_version = response.http_version
+
+    def stream(
+        self, chunk_size: int = 8192, decode_content: bool = True
+    ) -> Iterator[bytes]:
+        chunks = (
+            self._response.iter_bytes(chunk_size)
+            if decode_content
+            else self._response.iter_raw(chunk_size)
+        )
+        try:
+            yield from chunks
+        except httpx.TransportError as e:
+            raise _translate(e, streaming=True)
+        finally:
+            self.close()
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return b"".join(self.stream(amt or 8192))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._response.close()
+        finally:
+            self._release()
+
+    release_conn = close
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Transport adapter multiplexing a session's requests over HTTP/2.
+
+    Mounted on a service's session in place of the HTTP/1.1 pool, so every
+    caller of that session - proxying, fan-out, health probes - shares a
+    few connections instead of one socket per in-flight request. ``http://``
+    services are spoken to in cleartext with prior knowledge (h2c);
+    ``https://`` services negotiate HTTP/2 by ALPN and fall back to
+    HTTP/1.1. At most ``max_streams`` requests are in flight at once;
+    further ones wait for a free stream, and HTTP/2 flow control paces each
+    stream's body to how fast it is read.
+    """
+
+    def __init__(self, url: str, max_streams: int = 100, max_connections: int = 2):
+        super().__init__()
+        cleartext = url.startswith("http://")
+        self.max_streams = max_streams
+        self.client = httpx.Client(
+            http1=not cleartext,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            follow_redirects=False,
+        )
+        self._streams = threading.BoundedSemaphore(max_streams)
+        # Held from picking a connection until the HEADERS frame is written:
+        # httpcore takes the next stream id and sends its headers without a
+        # lock, and a peer resets the connection on an out-of-order id. Each
+        # service has its own adapter, so a slow connect only holds up
+        # streams to that service.
+        self._opening = threading.Lock()
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+
+        if not self._streams.acquire(timeout=connect):
+            raise requests.exceptions.ConnectTimeout(
+                f"No free HTTP/2 stream within {connect}s ({self.max_streams} in use)"
+            )
+        opening = [True]
+        self._opening.acquire()
+
+        def opened(event: str, info: dict) -> None:
+            if opening[0] and event.endswith("send_request_headers.complete"):
+                opening[0] = False
+                self._opening.release()
+
+        try:
+            upstream = self.client.send(
+                self.client.build_request(
+                    request.method,
+                    request.url,
+                    # HTTP/2 has no connection-specific headers
+                    headers=[
+                        (name, value)
+                        for name, value in request.headers.items()
+                        if name.lower() not in HOP_BY_HOP
+                    ],
+                    content=request.body,
+                    timeout=httpx.Timeout(read, connect=connect),
+                    extensions={"trace": opened},
+                ),
+                stream=True,
+            )
+        except httpx.TransportError as e:
+            self._streams.release()
+            raise _translate(e)
+        except BaseException:
+            self._streams.release()
+            raise
+        finally:
+            if opening[0]:
+                opening[0] = False
+                self._opening.release()
+
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        response.reason = upstream.reason_phrase
+        response.headers = CaseInsensitiveDict(upstream.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = HTTP2Body(upstream, self._streams.release)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        self.client.close()
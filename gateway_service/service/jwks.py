@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+import requests
+from flask import Flask
+from jwt.algorithms import has_crypto
+
+from gateway_service.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """Public signing keys from the auth service's JWKS, indexed by ``kid``.
+
+    Keys are parsed once into :class:`jwt.PyJWK` objects and reused for every
+    token. A background thread refreshes the set every ``refresh_interval``
+    seconds; a token signed with an unknown ``kid`` (key rotation) triggers
+    an immediate refresh, at most once per ``min_refresh_interval``.
+
+    Asymmetric algorithms need the ``cryptography`` package
+    (``pyjwt[crypto]``); without it the cache stays disabled.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.url = app.config.get("JWKS_URL")
+        self.path = app.config.get("JWKS_PATH", "/.well-known/jwks.json")
+        self.timeout = app.config.get("JWKS_TIMEOUT", 5)
+        self.refresh_interval = app.config.get("JWKS_REFRESH_INTERVAL", 300)
+        self.min_refresh_interval = app.config.get("JWKS_MIN_REFRESH_INTERVAL", 30)
+        self.enabled = has_crypto and app.config.get("JWKS_ENABLED", True)
+
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetch_lock = threading.Lock()
+        self._last_fetch = 0.0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.unknown_kids = 0
+        self._refresher = BackgroundThread(self._refresh_loop, "jwks-refresher")
+
+        if not has_crypto:
+            logger.info("cryptography not installed - RS256/ES256 tokens disabled")
+
+    def _jwks_url(self) -> Optional[str]:
+        if self.url:
+            return self.url
+        auth = self.app.extensions["config_registry"].snapshot.services.get("auth")
+        if auth is None or not auth.enabled:
+            return None
+        return f"{auth.url.rstrip('/')}{self.path}"
+
+    def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Signing key for ``kid``, refreshing once if it is not known yet."""
+        if not self.enabled:
+            return None
+        self._refresher.ensure_running()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        self.unknown_kids += 1
+        self.refresh(force=False)
+        return self._keys.get(kid)
+
+    def refresh(self, force: bool = True) -> bool:
+        """Fetch the key set; unforced refreshes are rate limited."""
+        with self._fetch_lock:
+            if (
+                not force
+                and time.monotonic() - self._last_fetch < self.min_refresh_interval
+            ):
+                return False
+            self._last_fetch = time.monotonic()
+
+            url = self._jwks_url()
+            if url is None:
+                return False
+
+            try:
+                # Reuse the auth service's pooled connection when there is one
+                session = (
+                    self.app.extensions["config_registry"].session_for("auth")
+                    or requests
+                )
+                response = session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                keys = self._parse(response.json())
+            except Exception as e:
+                self.fetch_errors += 1
+                logger.warning(f"JWKS refresh from {url} failed: {e}")
+                return False
+
+            # Swap the whole index at once; readers never see a partial set
+            self._keys = keys
+            self.fetches += 1
+            return True
+
+    @staticmethod
+    def _parse(jwks: Dict[str, Any]) -> Dict[str, jwt.PyJWK]:
+        keys = {}
+        for data in jwks.get("keys", []):
+            if data.get("use", "sig") != "sig" or "kid" not in data:
+                continue
+            try:
+                keys[data["kid"]] = jwt.PyJWK(data)
+            except jwt.PyJWKError as e:
+                logger.warning(f"Skipping unusable JWK {data.get('kid')}: {e}")
+        return keys
+
+    def _refresh_loop(self, stop: threading.Event) -> None:
+        while True:
+            # Count from the last fetch, including unknown-kid refreshes
+            remaining = self.refresh_interval - (time.monotonic() - self._last_fetch)
+            if stop.wait(max(remaining, 0)):
+                return
+            if time.monotonic() - self._last_fetch >= self.refresh_interval:
+                self.refresh()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "keys": sorted(self._keys),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "unknown_kids": self.unknown_kids,
+        }
@@ -0,0 +1,198 @@
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+from flask import Flask
+
+from gateway_service.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorPolicyError(ValueError):
+    """Raised for invalid mirroring configuration."""
+
+
+@dataclass(frozen=True)
+class MirrorPolicy:
+    """Copy a sample of a route's traffic to a shadow service."""
+
+    service: str
+    sample_rate: float = 1.0
+
+    @classmethod
+    def from_spec(cls, prefix: str, spec: Mapping[str, Any]) -> "MirrorPolicy":
+        try:
+            policy = cls(
+                service=spec["service"],
+                sample_rate=float(spec.get("sample_rate", 1.0)),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise MirrorPolicyError(f"Route '{prefix}': invalid mirror - {e}")
+
+        if not 0.0 <= policy.sample_rate <= 1.0:
+            raise MirrorPolicyError(
+                f"Route '{prefix}': mirror sample_rate must be between 0 and 1"
+            )
+        return policy
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+@dataclass
+class MirrorJob:
+    """A copied request plus the primary's outcome, for comparison."""
+
+    service: str
+    method: str
+    path: str
+    headers: Dict[str, str]
+    params: Any
+    body: bytes
+    primary_service: str
+    primary_status: int
+    primary_latency: float
+
+
+class _MirrorStats:
+    __slots__ = (
+        "mirrored",
+        "dropped",
+        "shadow_errors",
+        "status_mismatches",
+        "primary_ms",
+        "shadow_ms",
+    )
+
+    def __init__(self):
+        self.mirrored = 0
+        self.dropped = 0
+        self.shadow_errors = 0
+        self.status_mismatches = 0
+        self.primary_ms = 0.0
+        self.shadow_ms = 0.0
+
+
+class TrafficMirror:
+    """Fire-and-forget shadow traffic through a bounded queue.
+
+    The primary path only ever does a non-blocking ``put``; when the queue is
+    full the copy is dropped and counted, so mirroring can never add latency
+    or unbounded memory to live requests. A small set of worker threads
+    (greenlets under gevent) drains the queue and records how the shadow's
+    status and latency compare with the primary's.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.max_body_bytes = app.config.get("MIRROR_MAX_BODY_BYTES", 65536)
+        self.timeout = app.config.get("MIRROR_TIMEOUT", 5)
+        self._queue: "queue.Queue[MirrorJob]" = queue.Queue(
+            maxsize=app.config.get("MIRROR_QUEUE_SIZE", 1000)
+        )
+        self._workers = [
+            BackgroundThread(self._drain, f"mirror-worker-{index}")
+            for index in range(app.config.get("MIRROR_WORKERS", 2))
+        ]
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _MirrorStats] = {}
+
+    def _stats_for(self, service: str) -> _MirrorStats:
+        stats = self._stats.get(service)
+        if stats is None:
+            stats = self._stats.setdefault(service, _MirrorStats())
+        return stats
+
+    def submit(self, job: MirrorJob) -> bool:
+        """Queue a copy without ever blocking; returns False if dropped."""
+        if len(job.body) > self.max_body_bytes:
+            accepted = False
+        else:
+            for worker in self._workers:
+                worker.ensure_running()
+            try:
+                self._queue.put_nowait(job)
+                accepted = True
+            except queue.Full:
+                accepted = False
+
+        if not accepted:
+            with self._lock:
+                self._stats_for(job.service).dropped += 1
+        return accepted
+
+    def _drain(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                job = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._send(job)
+            except Exception as e:
+                logger.debug(f"Mirror to {job.service} failed: {e}")
+
+    def _send(self, job: MirrorJob) -> None:
+        registry = self.app.extensions["config_registry"]
+        service_config = registry.snapshot.services.get(job.service)
+        if not service_config or not service_config.enabled:
+            return
+        session = registry.session_for(job.service)
+
+        url = f"{service_config.url.rstrip('/')}/{job.path}"
+        started = time.monotonic()
+        status: Optional[int] = None
+        latency: Optional[float] = None
+        try:
+            response = session.request(
+                method=job.method,
+                url=url,
+                headers=job.headers,
+                data=job.body,
+                params=job.params,
+                timeout=self.timeout,
+                stream=True,
+            )
+            # Timed to the response headers, like the primary
+            latency = time.monotonic() - started
+            status = response.status_code
+            # Drain so the connection goes back to the pool
+            for _ in response.iter_content(chunk_size=65536):
+                pass
+            response.close()
+        finally:
+            if latency is None:
+                latency = time.monotonic() - started
+            self._record(job, status, latency)
+
+    def _record(self, job: MirrorJob, status: Optional[int], latency: float) -> None:
+        with self._lock:
+            stats = self._stats_for(job.service)
+            stats.mirrored += 1
+            stats.primary_ms += job.primary_latency * 1000
+            stats.shadow_ms += latency * 1000
+            if status is None or status >= 500:
+                stats.shadow_errors += 1
+            if status != job.primary_status:
+                stats.status_mismatches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Primary-vs-shadow comparison for the metrics endpoint."""
+        with self._lock:
+            summary = {}
+            for service, stats in self._stats.items():
+                mirrored = stats.mirrored or 1
+                summary[service] = {
+                    "mirrored": stats.mirrored,
+                    "dropped": stats.dropped,
+                    "shadow_errors": stats.shadow_errors,
+                    "status_mismatches": stats.status_mismatches,
+                    "primary_avg_ms": round(stats.primary_ms / mirrored, 2),
+                    "shadow_avg_ms": round(stats.shadow_ms / mirrored, 2),
+                }
+        return {"queued": self._queue.qsize(), "services": summary}
@@ -0,0 +1,170 @@
+import importlib
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _original(module: str, name: str) -> Callable:
+    """``module.name`` as it was before any gevent monkey-patching."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is already running in this worker."""
+
+
+class SamplingProfiler:
+    """Statistical CPU profiler for a live worker.
+
+    A real OS thread (never a greenlet, so it keeps sampling while request
+    code is busy) reads every thread's stack with ``sys._current_frames``
+    at a fixed interval. Under gevent all greenlets share the main thread,
+    so its samples show whichever greenlet is on the CPU, or the hub when
+    the worker is idle. Results are collapsed stacks, the input format of
+    ``flamegraph.pl`` and speedscope.
+    """
+
+    def __init__(self, max_seconds: float = 60, interval: float = 0.005):
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self._busy = threading.Lock()
+        self.runs = 0
+
+    def profile(
+        self, seconds: float, interval: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Sample for ``seconds`` and return collapsed stacks with counts."""
+        if not math.isfinite(seconds) or not math.isfinite(interval or 0):
+            # NaN slips through min/max and only fails in time.sleep
+            raise ValueError("seconds and interval must be finite numbers")
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = max(interval or self.interval, 0.001)
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+
+        try:
+            stacks: Counter = Counter()
+            state = {"running": True, "done": False, "samples": 0}
+            start_thread = _original("_thread", "start_new_thread")
+            start_thread(self._sample, (stacks, state, interval))
+
+            try:
+                # Patched under gevent, so other requests keep being served
+                time.sleep(seconds)
+            finally:
+                # Never leave the sampler thread running
+                state["running"] = False
+            while not state["done"]:
+                time.sleep(interval)
+        finally:
+            self._busy.release()
+
+        self.runs += 1
+        return {
+            "pid": os.getpid(),
+            "seconds": seconds,
+            "interval": interval,
+            "samples": state["samples"],
+            "stacks": stacks,
+        }
+
+    @staticmethod
+    def _sample(stacks: Counter, state: Dict[str, Any], interval: float) -> None:
+        sleep = _original("time", "sleep")
+        own_id = _original("_thread", "get_ident")()
+        try:
+            while state["running"]:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_id:
+                        stacks[_collapse(frame)] += 1
+                state["samples"] += 1
+                sleep(interval)
+        finally:
+            state["done"] = True
+
+
+def _collapse(frame) -> str:
+    labels: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename.rsplit(os.sep, 2)
+        labels.append(f"{code.co_name} ({'/'.join(filename[-2:])}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """Render stacks as ``frame;frame;frame count`` lines."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class AllocationTracker:
+    """tracemalloc snapshots of a live worker, diffed against a baseline."""
+
+    def __init__(self) -> None:
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """Start tracing; tracing slows allocations, so stop it when done."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = None
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.baseline = None
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        """Current allocations, ignoring tracemalloc's own bookkeeping."""
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+
+    def mark(self) -> None:
+        """Keep the current snapshot as the baseline for later diffs."""
+        self.baseline = self.snapshot()
+
+    def report(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """Top allocation sites, plus growth since the baseline if one is set."""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self.snapshot()
+        report: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "site": str(stat.traceback),
+                    "size": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics(group_by)[:limit]
+            ],
+        }
+        if self.baseline is not None:
+            report["diff"] = [
+                {
+                    "site": str(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                }
+                for stat in snapshot.compare_to(self.baseline, group_by)[:limit]
+            ]
+        return report
@@ -0,0 +1,363 @@
+import codecs
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+# A selection is True (keep the whole value) or a mapping of member names
+# to nested selections; arrays apply their selection to every element
+Selection = Union[bool, Dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+MAX_FIELDS = 100
+MAX_DEPTH = 8
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_KEY = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_STRUCTURAL = re.compile(r'["\[\]{},]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_DECODER = json.JSONDecoder()
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_FIELD = re.compile(r"^[A-Za-z0-9_\-$@]+(\.[A-Za-z0-9_\-$@]+)*$")
+
+# Parser states
+(
+    _VALUE,
+    _RAW,
+    _KEY_OR_END,
+    _KEY_NEXT,
+    _COLON,
+    _AFTER_VALUE,
+    _ELEMENT_OR_END,
+    _DONE,
+) = range(8)
+
+
+class ProjectionError(ValueError):
+    """Raised for an invalid ``fields`` parameter or a malformed body."""
+
+
+def parse_fields(value: str) -> Dict[str, Any]:
+    """Selection tree from ``fields=id,title,company.name``."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if not names:
+        raise ProjectionError("fields must name at least one field")
+    if len(names) > MAX_FIELDS:
+        raise ProjectionError(f"fields may name at most {MAX_FIELDS} fields")
+
+    tree: Dict[str, Any] = {}
+    for name in names:
+        if not _FIELD.match(name):
+            raise ProjectionError(f"Invalid field name: {name!r}")
+        parts = name.split(".")
+        if len(parts) > MAX_DEPTH:
+            raise ProjectionError(f"Field {name!r} is nested too deeply")
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            # A whole value wins over any of its subfields
+            node[parts[-1]] = True
+    return tree
+
+
+def fields_key(tree: Dict[str, Any]) -> str:
+    """Short, order-independent identifier of a selection tree."""
+    canonical = json.dumps(tree, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=4).hexdigest()
+
+
+def projected_etag(etag: str, key: str) -> str:
+    """Weak ETag of the projection ``key`` of a representation."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return f'W/"{opaque.strip(chr(34))}.p{key}"'
+
+
+def upstream_etags(if_none_match: str, key: str) -> str:
+    """``If-None-Match`` with projected tags mapped back to upstream tags.
+
+    If-None-Match compares weakly, so the strong form matches either kind.
+    """
+    prefix, suffix = 'W/"', f'.p{key}"'
+    tags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith(prefix) and tag.endswith(suffix):
+            tag = f'"{tag[len(prefix) : -len(suffix)]}"'
+        tags.append(tag)
+    return ", ".join(tags)
+
+
+class _Frame:
+    __slots__ = ("is_object", "selection", "emitted")
+
+    def __init__(self, is_object: bool, selection: Dict[str, Any]):
+        self.is_object = is_object
+        self.selection = selection
+        self.emitted = False
+
+
+def project(value: Any, selection: Selection) -> Any:
+    """Apply ``selection`` to an already decoded value."""
+    if selection is True:
+        return value
+    if isinstance(value, list):
+        return [project(item, selection) for item in value]
+    if isinstance(value, dict):
+        return {
+            name: project(item, selection[name])
+            for name, item in value.items()
+            if name in selection
+        }
+    return value
+
+
+class JSONProjector:
+    """Incremental JSON filter that keeps only the selected members.
+
+    Fed the body in arbitrary chunks, it returns output as soon as it is
+    known, so a large list response is trimmed while it streams. Values
+    already complete in the buffer (a list element, typically) are decoded
+    in one go by the C JSON scanner, projected and re-encoded. Otherwise
+    large selected containers are walked member by member, and values kept
+    or dropped whole are held back until complete, up to ``max_pending``
+    characters; larger ones are copied or skipped by regex scans without
+    decoding them. Arrays are transparent: the selection applies to each
+    element.
+    """
+
+    def __init__(self, selection: Dict[str, Any], max_pending: int = 64 * 1024):
+        self.max_pending = max_pending
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._out: List[str] = []
+        self._stack: List[_Frame] = []
+        self._state = _VALUE
+        self._selection: Selection = selection
+        # Incremental copy/skip state of a large value, kept across chunks
+        self._emit = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        return self._feed(chunk, final=False)
+
+    def close(self) -> bytes:
+        """Flush the end of the document; raises if it was incomplete."""
+        out = self._feed(b"", final=True)
+        at_top = not self._stack and not self._depth and not self._in_string
+        # A top-level scalar only ends with the body
+        if not at_top or self._state not in (_RAW, _AFTER_VALUE) or self._buffer:
+            raise ProjectionError("Incomplete JSON body")
+        self._state = _DONE
+        return out
+
+    def _feed(self, chunk: bytes, final: bool) -> bytes:
+        try:
+            text = self._decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            raise ProjectionError("Body is not valid UTF-8")
+        self._buffer = self._buffer + text if self._buffer else text
+        position = self._run(self._buffer, final)
+        self._buffer = self._buffer[position:]
+        out, self._out = "".join(self._out), []
+        return out.encode()
+
+    def _run(self, data: str, final: bool) -> int:
+        i = 0
+        size = len(data)
+        out = self._out
+        while i < size:
+            state = self._state
+            if state == _RAW:
+                i = self._raw(data, i)
+                continue
+
+            i = _WHITESPACE.match(data, i).end()
+            if i >= size:
+                break
+            char = data[i]
+
+            if state == _VALUE:
+                selection = self._selection
+                try:
+                    value, end = _DECODER.raw_decode(data, i)
+                    # A number at the end of the chunk may continue in the next
+                    complete = (
+                        final
+                        or not isinstance(value, (int, float))
+                        or (end < size and data[end] not in ".eE")
+                    )
+                except ValueError:
+                    complete = False
+                if complete:
+                    if selection is not False:
+                        out.append(_ENCODER.encode(project(value, selection)))
+                    self._state = _AFTER_VALUE
+                    i = end
+                    continue
+                # Selected containers are walked member by member once a
+                # small part of them is pending; other values are held back
+                whole = selection is True or selection is False or char not in "{["
+                limit = self.max_pending if whole else self.max_pending // 16
+                if size - i < limit and not final:
+                    break
+
+                if whole:
+                    self._emit = selection is not False
+                    self._depth = 0
+                    self._state = _RAW
+                    continue
+                self._stack.append(_Frame(char == "{", selection))
+                out.append(char)
+                self._state = _KEY_OR_END if char == "{" else _ELEMENT_OR_END
+                i += 1
+
+            elif state == _ELEMENT_OR_END:
+                if char == "]":
+                    i = self._pop("]", i)
+                    continue
+                self._selection = self._stack[-1].selection
+                self._state = _VALUE
+
+            elif state in (_KEY_OR_END, _KEY_NEXT):
+                if char == "}" and state == _KEY_OR_END:
+                    i = self._pop("}", i)
+                    continue
+                if char != '"':
+                    raise ProjectionError("Expected a member name")
+                match = _KEY.match(data, i)
+                if match is None:
+                    # The name continues in the next chunk
+                    break
+                raw = match.group()
+                try:
+                    name = json.loads(raw) if "\\" in raw else raw[1:-1]
+                except ValueError:
+                    raise ProjectionError("Invalid member name")
+                frame = self._stack[-1]
+                selection = frame.selection.get(name, False)
+                if selection is not False:
+                    if frame.emitted:
+                        out.append(",")
+                    out.append(raw + ":")
+                    frame.emitted = True
+                self._selection = selection
+                self._state = _COLON
+                i = match.end()
+
+            elif state == _COLON:
+                if char != ":":
+                    raise ProjectionError("Expected ':'")
+                self._state = _VALUE
+                i += 1
+
+            elif state == _AFTER_VALUE:
+                if not self._stack:
+                    raise ProjectionError("Unexpected data after the JSON body")
+                frame = self._stack[-1]
+                if char == ",":
+                    if frame.is_object:
+                        self._state = _KEY_NEXT
+                    else:
+                        # Every element is kept
+                        out.append(",")
+                        self._selection = frame.selection
+                        self._state = _VALUE
+                    i += 1
+                elif char == ("}" if frame.is_object else "]"):
+                    i = self._pop(char, i)
+                else:
+                    raise ProjectionError("Expected ',' or the end of a container")
+
+            else:
+                raise ProjectionError("Unexpected data after the JSON body")
+        return i
+
+    def _pop(self, char: str, i: int) -> int:
+        self._stack.pop()
+        self._out.append(char)
+        self._state = _AFTER_VALUE
+        return i + 1
+
+    def _raw(self, data: str, i: int) -> int:
+        """Copy or skip a large value; returns where parsing should resume."""
+        size = len(data)
+        start = i
+        emit = self._emit
+        while i < size:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(data, i)
+                if match is None:
+                    i = size
+                    break
+                i = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(data, i)
+            if match is None:
+                i = size
+                break
+            char = match.group()
+            j = match.start()
+            if char == '"':
+                self._in_string = True
+                i = j + 1
+            elif char in "[{":
+                self._depth += 1
+                i = j + 1
+            elif not self._depth:
+                # The value ended just before this comma or closing bracket
+                if emit:
+                    self._out.append(data[start:j].rstrip())
+                self._state = _AFTER_VALUE
+                return j
+            elif char == ",":
+                i = j + 1
+            else:
+                self._depth -= 1
+                i = j + 1
+                if not self._depth:
+                    if emit:
+                        self._out.append(data[start:i])
+                    self._state = _AFTER_VALUE
+                    return i
+
+        # Mid-value at the end of the chunk: pass on what we have
+        if emit:
+            self._out.append(data[start:i])
+        return i
+
+
+def project_body(chunks: Iterable[bytes], projector: JSONProjector) -> Iterator[bytes]:
+    """Stream ``chunks`` through ``projector``, closing the source after."""
+    try:
+        for chunk in chunks:
+            out = projector.feed(chunk)
+            if out:
+                yield out
+        out = projector.close()
+        if out:
+            yield out
+    except ProjectionError as e:
+        # Headers are sent already; aborting is all that is left
+        logger.warning(f"Projection of upstream JSON failed: {e}")
+        raise
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
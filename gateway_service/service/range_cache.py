@@ -0,0 +1,417 @@
+import atexit
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    IO,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+_MAX_AGE = re.compile(r"(s-maxage|max-age)=(\d+)")
+
+# Response headers kept with a cached object and sent on every hit
+STORED_HEADERS = ("content-type", "cache-control", "last-modified")
+
+IMMUTABLE_TTL = 365 * 24 * 3600
+BLOCK_SIZE = 65536
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised for a ``Range`` that starts beyond the end of the object."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive byte span asked for by ``Range``, or ``None`` for all of it.
+
+    Only single byte ranges are honoured; anything else is ignored, which
+    serves the whole object as RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def parse_content_range(value: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """``(start, end, size)`` of a ``Content-Range`` with a known size."""
+    match = _CONTENT_RANGE.match(value.strip()) if value else None
+    if match is None:
+        return None
+    start, end, size = (int(group) for group in match.groups())
+    return (start, end, size) if start <= end < size else None
+
+
+def storable_for(cache_control: str, authorized: bool, default_ttl: float) -> float:
+    """Seconds a response may be served from the shared cache; 0 to skip it.
+
+    Responses to authenticated requests are only stored when marked
+    ``public`` (or given an ``s-maxage``), as for any shared cache.
+    """
+    directives = cache_control.lower()
+    if any(word in directives for word in ("no-store", "private", "no-cache")):
+        return 0
+    ages = dict(_MAX_AGE.findall(directives))
+    if authorized and "public" not in directives and "s-maxage" not in ages:
+        return 0
+    age = ages.get("s-maxage", ages.get("max-age"))
+    if age is not None:
+        return float(age)
+    return IMMUTABLE_TTL if "immutable" in directives else default_ttl
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as used by ``If-None-Match``."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class CachedObject:
+    """A strong-ETag representation, stored as fixed-size chunks of one file."""
+
+    __slots__ = ("key", "etag", "size", "headers", "fresh_until", "path", "chunks")
+
+    def __init__(self, key, etag, size, headers, fresh_until, path, chunk_count):
+        self.key = key
+        self.etag = etag
+        self.size = size
+        self.headers: List[Tuple[str, str]] = headers
+        self.fresh_until = fresh_until
+        self.path = path
+        # One flag per chunk; the file is sparse until every chunk is stored
+        self.chunks = bytearray(chunk_count)
+
+
+class CacheHit(NamedTuple):
+    status: int
+    headers: List[Tuple[str, str]]
+    file: Optional[IO[bytes]]
+    start: int
+    length: int
+
+
+class FileRange:
+    """WSGI body of ``length`` bytes of ``file`` from ``start``."""
+
+    def __init__(self, file: IO[bytes], start: int, length: int):
+        self.file = file
+        self.start = start
+        self.length = length
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.file.seek(self.start)
+        remaining = self.length
+        while remaining > 0:
+            block = self.file.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def file_body(environ: Mapping[str, Any], hit: CacheHit) -> Iterable[bytes]:
+    """Body of a cache hit, sent with ``sendfile`` where the server can.
+
+    Gunicorn's ``wsgi.file_wrapper`` sends exactly ``Content-Length`` bytes
+    from the file's current position with ``sendfile``; other servers get
+    a plain iterator over the range.
+    """
+    wrapper = environ.get("wsgi.file_wrapper")
+    if wrapper is not None and environ.get("SERVER_SOFTWARE", "").startswith(
+        "gunicorn"
+    ):
+        hit.file.seek(hit.start)
+        return wrapper(hit.file, BLOCK_SIZE)
+    return FileRange(hit.file, hit.start, hit.length)
+
+
+class ChunkCache:
+    """Per-worker disk cache of large objects, for ranged downloads.
+
+    Objects are identified by their strong ETag and filled chunk by chunk
+    from whatever the upstream sends - whole bodies or ranges - so an
+    interrupted download still leaves its completed chunks behind. A range
+    is served from disk once every chunk it covers is present. Stored bytes
+    are capped by ``max_bytes``, evicting the least recently used objects.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        chunk_size: int = 1024 * 1024,
+        min_object_bytes: int = 1024 * 1024,
+        default_ttl: float = 300,
+        directory: Optional[str] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.min_object_bytes = min_object_bytes
+        self.default_ttl = default_ttl
+        self.directory = directory
+
+        self._objects: "OrderedDict[str, CachedObject]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dir: Optional[str] = None
+        self._pid: Optional[int] = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        atexit.register(self.clear)
+
+    def _path(self, key: str, etag: str) -> str:
+        # Files belong to one worker; a fork starts with an empty cache
+        if self._pid != os.getpid():
+            self._objects.clear()
+            self.bytes = 0
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+            self._dir = tempfile.mkdtemp(prefix="range-cache-", dir=self.directory)
+            self._pid = os.getpid()
+        name = hashlib.blake2b(f"{key}\0{etag}".encode(), digest_size=16).hexdigest()
+        return os.path.join(self._dir, name)
+
+    def serve(self, key: str, request_headers: Mapping[str, str]) -> Optional[CacheHit]:
+        """Answer a GET from disk, or ``None`` to go to the upstream."""
+        if self._pid != os.getpid():
+            return None
+        if any(
+            name in request_headers
+            for name in ("If-Match", "If-Modified-Since", "If-Unmodified-Since")
+        ):
+            return None
+
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None or obj.fresh_until < time.time():
+                self.misses += 1
+                return None
+            self._objects.move_to_end(key)
+
+            headers = obj.headers + [("ETag", obj.etag), ("Accept-Ranges", "bytes")]
+            if_none_match = request_headers.get("If-None-Match")
+            if if_none_match and _etag_matches(if_none_match, obj.etag):
+                self.hits += 1
+                return CacheHit(304, headers, None, 0, 0)
+
+            # A stale If-Range validator asks for the whole, current object
+            span = None
+            if_range = request_headers.get("If-Range")
+            if if_range is None or if_range == obj.etag:
+                try:
+                    span = parse_range(request_headers.get("Range"), obj.size)
+                except RangeNotSatisfiable:
+                    self.hits += 1
+                    return CacheHit(
+                        416, [("Content-Range", f"bytes */{obj.size}")], None, 0, 0
+                    )
+            start, end = span or (0, obj.size - 1)
+
+            first, last = start // self.chunk_size, end // self.chunk_size
+            if not all(obj.chunks[first : last + 1]):
+                self.misses += 1
+                return None
+            try:
+                file = open(obj.path, "rb")
+            except OSError:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        if span is None:
+            return CacheHit(200, headers, file, 0, obj.size)
+        headers.append(("Content-Range", f"bytes {start}-{end}/{obj.size}"))
+        return CacheHit(206, headers, file, start, end - start + 1)
+
+    def capture(
+        self,
+        key: str,
+        status: int,
+        upstream_headers: Mapping[str, str],
+        authorized: bool,
+        body: Iterable[bytes],
+    ) -> Iterable[bytes]:
+        """Store the chunks ``body`` covers while it streams to the client."""
+        etag = upstream_headers.get("ETag", "")
+        if (
+            status not in (200, 206)
+            or not etag.startswith('"')
+            or upstream_headers.get("Content-Encoding", "identity") != "identity"
+            or "Vary" in upstream_headers
+        ):
+            return body
+
+        if status == 206:
+            content_range = parse_content_range(upstream_headers.get("Content-Range"))
+            if content_range is None:
+                return body
+            start, _, size = content_range
+        else:
+            length = upstream_headers.get("Content-Length", "")
+            if not length.isdigit():
+                return body
+            start, size = 0, int(length)
+        if not self.min_object_bytes <= size <= self.max_bytes:
+            return body
+
+        ttl = storable_for(
+            upstream_headers.get("Cache-Control", ""), authorized, self.default_ttl
+        )
+        if ttl <= 0:
+            return body
+        headers = [
+            (name, value)
+            for name, value in upstream_headers.items()
+            if name.lower() in STORED_HEADERS
+        ]
+        obj = self._admit(key, etag, size, headers, time.time() + ttl)
+        return self._tee(obj, start, body)
+
+    def _admit(self, key, etag, size, headers, fresh_until) -> CachedObject:
+        with self._lock:
+            path = self._path(key, etag)
+            obj = self._objects.get(key)
+            if obj is not None and obj.etag == etag and obj.size == size:
+                obj.headers, obj.fresh_until = headers, fresh_until
+                self._objects.move_to_end(key)
+                return obj
+            if obj is not None:
+                self._drop(obj)
+
+            chunk_count = -(-size // self.chunk_size)
+            obj = CachedObject(key, etag, size, headers, fresh_until, path, chunk_count)
+            self._objects[key] = obj
+            return obj
+
+    def _tee(
+        self, obj: CachedObject, offset: int, body: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        chunk_size = self.chunk_size
+        # Bytes before the first chunk boundary belong to a chunk we only
+        # see the end of; they are passed on but not stored
+        skip = -offset % chunk_size
+        pending = bytearray()
+        pending_start = offset + skip
+        storing = True
+        try:
+            for piece in body:
+                yield piece
+                if not storing:
+                    continue
+                if skip:
+                    dropped = min(skip, len(piece))
+                    skip -= dropped
+                    piece = piece[dropped:]
+                pending += piece
+                while storing and (
+                    len(pending) >= chunk_size
+                    or (pending and pending_start + len(pending) >= obj.size)
+                ):
+                    data = bytes(pending[:chunk_size])
+                    del pending[:chunk_size]
+                    storing = self._store(obj, pending_start, data)
+                    pending_start += len(data)
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    def _store(self, obj: CachedObject, offset: int, data: bytes) -> bool:
+        """Write one chunk; ``False`` stops storing the rest of the body."""
+        index = offset // self.chunk_size
+        if obj.chunks[index]:
+            return True
+        try:
+            fd = os.open(obj.path, os.O_WRONLY | os.O_CREAT, 0o600)
+            try:
+                os.pwrite(fd, data, offset)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f"Range cache write failed: {e}")
+            return False
+
+        with self._lock:
+            if self._objects.get(obj.key) is not obj:
+                # Evicted or replaced while streaming
+                return False
+            obj.chunks[index] = 1
+            self.bytes += len(data)
+            self._objects.move_to_end(obj.key)
+            while self.bytes > self.max_bytes and len(self._objects) > 1:
+                _, oldest = next(iter(self._objects.items()))
+                if oldest is obj:
+                    break
+                self._drop(oldest)
+                self.evictions += 1
+        return True
+
+    def _drop(self, obj: CachedObject) -> None:
+        """Forget ``obj``; the caller holds the lock. Open readers keep it."""
+        del self._objects[obj.key]
+        self.bytes -= self._stored_bytes(obj)
+        try:
+            os.unlink(obj.path)
+        except OSError:
+            pass
+
+    def _stored_bytes(self, obj: CachedObject) -> int:
+        stored = sum(obj.chunks) * self.chunk_size
+        # The last chunk is usually short
+        if obj.chunks and obj.chunks[-1]:
+            stored -= len(obj.chunks) * self.chunk_size - obj.size
+        return stored
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects.clear()
+            self.bytes = 0
+            if self._dir and self._pid == os.getpid():
+                shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = self._pid = None
+
+    def stats(self) -> dict:
+        return {
+            "objects": len(self._objects),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,271 @@
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from redis.commands.core import Script
+
+from gateway_service.service.trie import RouteTrie
+
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+MATCH_DIMENSIONS = ("user", "role", "plan", "api_key")
+KEY_TYPES = ("user", "ip", "api_key", "global")
+
+_WINDOW_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$")
+
+# Check every window first and only count the request if all of them have
+# room, so rejected requests do not eat into the budget. Returns
+# {allowed, index of the exhausted window, its remaining ms}.
+_CHECK_AND_INCREMENT = """
+for i = 1, #KEYS do
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if current >= tonumber(ARGV[i * 2 - 1]) then
+        return {0, i, redis.call('PTTL', KEYS[i])}
+    end
+end
+for i = 1, #KEYS do
+    if redis.call('INCR', KEYS[i]) == 1 then
+        redis.call('EXPIRE', KEYS[i], ARGV[i * 2])
+    end
+end
+return {1, 0, 0}
+"""
+
+
+class RateLimitError(ValueError):
+    """Raised for invalid rate limit policies."""
+
+
+@dataclass(frozen=True)
+class RateLimitWindow:
+    """``limit`` requests per fixed window of ``seconds``."""
+
+    limit: int
+    seconds: int
+
+    @classmethod
+    def parse(cls, text: str) -> "RateLimitWindow":
+        """Parse ``"10/s"``, ``"1000/h"`` or ``"50/30s"``."""
+        match = _WINDOW_PATTERN.match(str(text))
+        if not match:
+            raise RateLimitError(f"Invalid rate limit '{text}'")
+        count, multiplier, unit = match.groups()
+        seconds = int(multiplier or 1) * WINDOW_UNITS[unit]
+        if seconds <= 0:
+            raise RateLimitError(f"Invalid rate limit '{text}'")
+        return cls(limit=int(count), seconds=seconds)
+
+    def __str__(self) -> str:
+        for unit, seconds in reversed(WINDOW_UNITS.items()):
+            if self.seconds == seconds:
+                return f"{self.limit}/{unit}"
+        return f"{self.limit}/{self.seconds}s"
+
+
+@dataclass(frozen=True)
+class RateLimitIdentity:
+    """Who a request comes from, as far as rate limiting is concerned."""
+
+    ip: str
+    user_id: Optional[str] = None
+    role: Optional[str] = None
+    plan: Optional[str] = None
+    api_key: Optional[str] = None
+
+    def value(self, dimension: str) -> Optional[str]:
+        return {
+            "user": self.user_id,
+            "role": self.role,
+            "plan": self.plan,
+            "api_key": self.api_key,
+        }[dimension]
+
+    def bucket(self, key_type: str) -> str:
+        """Counter key part; anonymous requests fall back to the client IP."""
+        if key_type == "user" and self.user_id:
+            return f"user:{self.user_id}"
+        if key_type == "api_key" and self.api_key:
+            # Never put the key itself into Redis
+            digest = hashlib.blake2b(self.api_key.encode(), digest_size=12)
+            return f"key:{digest.hexdigest()}"
+        if key_type == "global":
+            return "global"
+        return f"ip:{self.ip}"
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Windows applied to requests matching a route, method and identity."""
+
+    name: str
+    windows: Tuple[RateLimitWindow, ...]
+    key: str = "user"
+    route: str = ""
+    methods: Optional[FrozenSet[str]] = None
+    match: Optional[Tuple[str, str]] = None
+
+    @classmethod
+    def from_spec(cls, spec: Mapping[str, Any]) -> "RateLimitPolicy":
+        name = spec.get("name")
+        if not isinstance(name, str) or not name:
+            raise RateLimitError("Rate limit policies need a name")
+
+        limits = spec.get("limits", [])
+        if isinstance(limits, str):
+            limits = [limits]
+        windows = tuple(RateLimitWindow.parse(limit) for limit in limits)
+
+        key = spec.get("key", "user")
+        if key not in KEY_TYPES:
+            raise RateLimitError(
+                f"Policy '{name}': key must be one of {', '.join(KEY_TYPES)}"
+            )
+
+        dimensions = [d for d in MATCH_DIMENSIONS if d in spec]
+        if len(dimensions) > 1:
+            raise RateLimitError(
+                f"Policy '{name}': match on at most one of {', '.join(dimensions)}"
+            )
+        match = (dimensions[0], str(spec[dimensions[0]])) if dimensions else None
+
+        methods = spec.get("methods")
+        return cls(
+            name=name,
+            windows=windows,
+            key=key,
+            route=spec.get("route", ""),
+            methods=frozenset(m.upper() for m in methods) if methods else None,
+            match=match,
+        )
+
+
+class RateLimitTable:
+    """Precompiled policy lookup.
+
+    Policies are bucketed by route prefix in a trie and, within a prefix, by
+    the identity attribute they match on. A lookup walks the request path
+    once and does a handful of dict lookups, however many policies exist.
+    Every matching policy applies; ``default`` applies when none match, and
+    a matching policy with no windows exempts the request. ``api_keys`` are
+    the keys policies match on, the only ones trusted as an identity, and
+    ``matches_claims`` tells whether any policy needs token claims to match.
+    """
+
+    def __init__(
+        self,
+        policies: Iterable[RateLimitPolicy],
+        default: Optional[RateLimitPolicy] = None,
+    ):
+        buckets: Dict[str, Dict[Any, List[RateLimitPolicy]]] = {}
+        api_keys = set()
+        self.matches_claims = False
+        self._count = 0
+        for policy in policies:
+            if policy.match is not None and policy.match[0] == "api_key":
+                api_keys.add(policy.match[1])
+            elif policy.match is not None:
+                self.matches_claims = True
+            buckets.setdefault(policy.route, {}).setdefault(policy.match, []).append(
+                policy
+            )
+            self._count += 1
+        self.api_keys = frozenset(api_keys)
+        self._trie = RouteTrie(buckets)
+        self.default = default
+
+    def match(
+        self, path: str, method: str, identity: RateLimitIdentity
+    ) -> List[RateLimitPolicy]:
+        """All policies that apply to a request."""
+        keys = [None] + [
+            (dimension, identity.value(dimension))
+            for dimension in MATCH_DIMENSIONS
+            if identity.value(dimension) is not None
+        ]
+
+        matched = []
+        for bucket in self._trie.match_all(path):
+            for key in keys:
+                for policy in bucket.get(key, ()):
+                    if policy.methods is None or method in policy.methods:
+                        matched.append(policy)
+
+        if not matched and self.default is not None:
+            return [self.default]
+        return matched
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def compile_rate_limits(
+    specs: Optional[Sequence[Mapping[str, Any]]], default_limits: Sequence[str]
+) -> RateLimitTable:
+    """Build a :class:`RateLimitTable` from RATE_LIMIT_POLICIES entries."""
+    policies = [RateLimitPolicy.from_spec(spec) for spec in specs or []]
+    names = [policy.name for policy in policies]
+    if len(names) != len(set(names)) or "default" in names:
+        raise RateLimitError("Rate limit policy names must be unique and not 'default'")
+
+    default = RateLimitPolicy.from_spec({"name": "default", "limits": default_limits})
+    return RateLimitTable(policies, default)
+
+
+@dataclass(frozen=True)
+class RateLimitExceeded:
+    policy: RateLimitPolicy
+    window: RateLimitWindow
+    retry_after: int
+
+
+class RateLimiter:
+    """Evaluates every window of the matched policies in one Redis round-trip."""
+
+    def __init__(self, prefix: str = "rate_limit"):
+        self.prefix = prefix
+        # Registered without a client; EVALSHA runs on the caller's client
+        self._script = Script(None, _CHECK_AND_INCREMENT.encode())
+
+    def check(
+        self,
+        redis_client: Any,
+        policies: Sequence[RateLimitPolicy],
+        identity: RateLimitIdentity,
+        now: Optional[float] = None,
+    ) -> Optional[RateLimitExceeded]:
+        """Count the request; returns the exhausted window if it is over."""
+        now = time.time() if now is None else now
+        keys: List[str] = []
+        args: List[int] = []
+        windows: List[Tuple[RateLimitPolicy, RateLimitWindow]] = []
+        for policy in policies:
+            bucket = identity.bucket(policy.key)
+            for window in policy.windows:
+                slot = int(now // window.seconds)
+                keys.append(
+                    f"{self.prefix}:{policy.name}:{window.seconds}:{bucket}:{slot}"
+                )
+                args.extend((window.limit, window.seconds))
+                windows.append((policy, window))
+
+        if not keys:
+            return None
+
+        allowed, index, ttl_ms = self._script(keys=keys, args=args, client=redis_client)
+        if allowed:
+            return None
+
+        policy, window = windows[int(index) - 1]
+        retry_after = max(1, -(-int(ttl_ms) // 1000)) if int(ttl_ms) > 0 else 1
+        return RateLimitExceeded(policy, window, retry_after)
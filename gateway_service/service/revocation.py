@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import redis
+
+from gateway_service.utils.background import BackgroundThread
+from gateway_service.utils.utils import create_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized from the expected number of items and the acceptable false-positive
+    rate; membership tests never give false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationList:
+    """Revoked token IDs (``jti``), checked in memory on every request.
+
+    Revocations live in a Redis sorted set scored by token expiry, and are
+    announced on a pub/sub channel. Each worker keeps a Bloom filter of the
+    set, updated incrementally from the channel and rebuilt periodically to
+    drop expired entries and recover from missed messages. Tokens that miss
+    the filter are accepted without any I/O; possible matches are confirmed
+    against Redis, and treated as revoked if Redis cannot be reached.
+    """
+
+    def __init__(self, app_config: Mapping[str, Any]):
+        self.redis_url = (
+            app_config.get("REDIS_URL")
+            if app_config.get("REDIS_ENABLED", True)
+            else None
+        )
+        self.redis_key = app_config.get("REVOCATION_REDIS_KEY", "turbogate:revoked")
+        self.channel = app_config.get("REVOCATION_CHANNEL", "turbogate:revoked")
+        self.capacity = app_config.get("REVOCATION_BLOOM_CAPACITY", 100000)
+        self.error_rate = app_config.get("REVOCATION_BLOOM_ERROR_RATE", 0.001)
+        self.rebuild_interval = app_config.get("REVOCATION_REBUILD_INTERVAL", 300)
+        self.default_ttl = app_config.get("REVOCATION_DEFAULT_TTL", 86400)
+
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        # Revocations made without Redis are confirmed from this map instead
+        self._local: Dict[str, float] = {}
+        self._client: Optional[redis.Redis] = None
+        self._lock = threading.Lock()
+        self.filter_hits = 0
+        self.confirmed = 0
+        self.confirm_errors = 0
+        self.last_rebuild: Optional[float] = None
+        self._syncer = (
+            BackgroundThread(self._sync, "revocation-sync") if self.redis_url else None
+        )
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        if self._client is None and self.redis_url:
+            self._client = create_redis_client(self.redis_url)
+        return self._client
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check a token ID; only Bloom filter hits touch Redis."""
+        if self._syncer is not None:
+            self._syncer.ensure_running()
+
+        if jti not in self._filter:
+            return False
+
+        with self._lock:
+            self.filter_hits += 1
+        revoked = self._confirm(jti)
+        if revoked:
+            with self._lock:
+                self.confirmed += 1
+        return revoked
+
+    def _confirm(self, jti: str) -> bool:
+        now = time.time()
+        if self.redis is None:
+            return self._local.get(jti, 0) > now
+
+        try:
+            expires_at = self.redis.zscore(self.redis_key, jti)
+        except Exception as e:
+            # Fail closed: a rare false positive beats accepting a revoked token
+            logger.warning(f"Could not confirm token revocation: {e}")
+            with self._lock:
+                self.confirm_errors += 1
+            return True
+        return expires_at is not None and expires_at > now
+
+    def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Revoke ``jti`` until ``expires_at`` (the token's own expiry)."""
+        expires_at = expires_at or time.time() + self.default_ttl
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zadd(self.redis_key, {jti: expires_at})
+            pipe.publish(self.channel, jti)
+            pipe.execute()
+        else:
+            self._local[jti] = expires_at
+        self._filter.add(jti)
+
+    def rebuild(self) -> None:
+        """Reload the whole set into a fresh filter and swap it in."""
+        now = time.time()
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zremrangebyscore(self.redis_key, "-inf", now)
+            pipe.zrange(self.redis_key, 0, -1)
+            _, members = pipe.execute()
+            jtis = [m.decode() if isinstance(m, bytes) else m for m in members]
+        else:
+            self._local = {j: exp for j, exp in self._local.items() if exp > now}
+            jtis = list(self._local)
+
+        # Grow with the revocation set so the error rate holds
+        fresh = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            fresh.add(jti)
+        self._filter = fresh
+        self.last_rebuild = now
+
+    def _sync(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Subscribe first so nothing published during the load is lost
+                self.rebuild()
+                rebuilt = time.monotonic()
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        data = message["data"]
+                        self._filter.add(
+                            data.decode() if isinstance(data, bytes) else data
+                        )
+                    if time.monotonic() - rebuilt >= self.rebuild_interval:
+                        self.rebuild()
+                        rebuilt = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Revocation sync error, retrying: {e}")
+                stop.wait(5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "filter_items": self._filter.count,
+            "filter_capacity": self._filter.capacity,
+            "filter_bytes": self._filter.nbytes,
+            "filter_hits": self.filter_hits,
+            "confirmed": self.confirmed,
+            "confirm_errors": self.confirm_errors,
+            "last_rebuild": self.last_rebuild,
+            "syncing": bool(self._syncer and self._syncer.running),
+        }
@@ -5,6 +5,7 @@ import requests
 from flask import current_app, g, request
 
 from gateway_service.flask_config import ServiceConfig
+from gateway_service.service.config_registry import get_config_snapshot
 from gateway_service.utils import setup_logging
 
 
@@ -14,8 +15,15 @@ class ServiceClient:
     @staticmethod
     def get_service_config(service_name: str) -> Optional[ServiceConfig]:
         """Get service configuration."""
-        services = current_app.config.get("SERVICES", {})
-        return services.get(service_name)
+        return get_config_snapshot().services.get(service_name)
+
+    @staticmethod
+    def get_session(service_name: str) -> requests.Session:
+        """Get the pooled keep-alive session for a service."""
+        session = current_app.extensions["config_registry"].session_for(service_name)
+        if session is None:
+            raise ValueError(f"Service {service_name} not configured")
+        return session
 
     @staticmethod
     def is_service_enabled(service_name: str) -> bool:
@@ -57,7 +65,7 @@ class ServiceClient:
         logger = setup_logging()
 
         try:
-            response = requests.request(
+            response = ServiceClient.get_session(service_name).request(
                 method=method,
                 url=url,
                 headers=request_headers,
@@ -96,10 +104,23 @@ class AuthService:
         """Validate JWT token."""
         logger = setup_logging()
 
+        # Already validated by a worker on this node
+        shared = current_app.extensions["shared_state"]
+        payload = shared.cached_token(token)
+        if payload is not None:
+            if AuthService.is_revoked(payload):
+                logger.warning("Revoked token", jti=payload.get("jti"))
+                return None
+            return payload
+
         try:
             # Try local validation first (faster)
-            secret_key = current_app.config["SECRET_KEY"]
-            payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+            payload = AuthService.decode_locally(token)
+            shared.store_token(token, payload)
+
+            if AuthService.is_revoked(payload):
+                logger.warning("Revoked token", jti=payload.get("jti"))
+                return None
 
             logger.debug("Token validated locally", user_id=payload.get("user_id"))
             return payload
@@ -116,8 +137,13 @@ class AuthService:
                     )
 
                     if response.status_code == 200:
+                        payload = response.json()
+                        shared.store_token(token, payload)
+                        if AuthService.is_revoked(payload):
+                            logger.warning("Revoked token", jti=payload.get("jti"))
+                            return None
                         logger.debug("Token validated by auth service")
-                        return response.json()
+                        return payload
                     else:
                         logger.warning(
                             f"Auth service token validation failed: {response.status_code}"
@@ -131,21 +157,69 @@ class AuthService:
                 logger.warning("Auth service not enabled, token validation failed")
                 return None
 
+    @staticmethod
+    def validate_request_token(token: str) -> Optional[Dict[str, Any]]:
+        """``validate_token``, memoised for the current request."""
+        cached = g.get("validated_token")
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        user_data = AuthService.validate_token(token)
+        g.validated_token = (token, user_data)
+        return user_data
+
+    @staticmethod
+    def decode_locally(token: str) -> Dict[str, Any]:
+        """Verify a token with the shared secret or a cached JWKS key."""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+
+        if algorithm == "HS256":
+            secret_key = current_app.config["SECRET_KEY"]
+            return jwt.decode(token, secret_key, algorithms=["HS256"])
+
+        if algorithm not in current_app.config.get("JWT_ASYMMETRIC_ALGORITHMS", []):
+            raise jwt.InvalidAlgorithmError(f"Algorithm {algorithm} not allowed")
+
+        key = current_app.extensions["jwks_cache"].get_key(header.get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        # Only the key's own algorithm is accepted, preventing alg confusion
+        return jwt.decode(token, key.key, algorithms=[key.algorithm_name or algorithm])
+
+    @staticmethod
+    def is_revoked(payload: Dict[str, Any]) -> bool:
+        """Check the token's ID against the revocation list."""
+        jti = payload.get("jti")
+        if not jti:
+            return False
+        return current_app.extensions["token_revocations"].is_revoked(str(jti))
+
 
 class HealthChecker:
     """Health checking service."""
 
     @staticmethod
     def check_service_health(service_name: str) -> bool:
-        """Check if a service is healthy."""
+        """Check if a service is healthy, from the node's shared view if fresh."""
+        service_config = ServiceClient.get_service_config(service_name)
+        if not service_config or not service_config.enabled:
+            return False
+
+        shared = current_app.extensions["shared_state"]
+        is_healthy = shared.service_health(service_name)
+        if is_healthy is None:
+            is_healthy = HealthChecker.probe(service_name)
+            shared.record_health(service_name, is_healthy)
+        return is_healthy
+
+    @staticmethod
+    def probe(service_name: str) -> bool:
+        """Call the service's health endpoint."""
         logger = setup_logging()
 
         try:
             service_config = ServiceClient.get_service_config(service_name)
 
-            if not service_config or not service_config.enabled:
-                return False
-
             response = ServiceClient.make_request(
                 service_name=service_name,
                 path=service_config.health_endpoint,
@@ -165,7 +239,7 @@ class HealthChecker:
     @staticmethod
     def check_all_services() -> Dict[str, Optional[bool]]:
         """Check health of all configured services."""
-        services = current_app.config.get("SERVICES", {})
+        services = get_config_snapshot().services
         health_status = {}
 
         for service_name, config in services.items():
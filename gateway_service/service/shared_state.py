@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import Flask
+
+from gateway_service.service.services import HealthChecker
+from gateway_service.utils.background import BackgroundThread
+from gateway_service.utils.shared_memory import SharedTable
+
+logger = logging.getLogger(__name__)
+
+# Consecutive upstream failures and when an open breaker closes again
+_BREAKER = struct.Struct("<Id")
+_PID = struct.Struct("<i")
+
+
+class SharedState:
+    """Node-wide upstream health, circuit breakers and validated tokens.
+
+    Lives in :class:`SharedTable` memory created before gunicorn forks, so
+    all workers of a node share one view: a single elected worker probes
+    upstream health every ``HEALTH_CHECK_INTERVAL`` seconds, a breaker
+    opened by failures seen in one worker stops traffic from all of them,
+    and a token verified by one worker is not verified again by the others
+    for ``AUTH_CACHE_TTL`` seconds. Without ``preload_app`` each worker
+    simply gets its own copy, as before.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        config = app.config
+        self.health_interval = config.get("HEALTH_CHECK_INTERVAL", 5)
+        self.health_ttl = config.get("HEALTH_CACHE_TTL", 15)
+        self.breaker_threshold = config.get("BREAKER_FAILURE_THRESHOLD", 5)
+        self.breaker_cooldown = config.get("BREAKER_COOLDOWN", 30)
+        self.token_ttl = config.get("AUTH_CACHE_TTL", 60)
+
+        self.services = SharedTable(config.get("SHARED_STATE_SLOTS", 1024), 16)
+        self.tokens = SharedTable(
+            config.get("AUTH_CACHE_SLOTS", 4096),
+            config.get("AUTH_CACHE_VALUE_SIZE", 512),
+        )
+        self.monitor = BackgroundThread(self._run_monitor, "health-monitor")
+        self.probes = 0
+        self.token_hits = 0
+        self.token_misses = 0
+
+    # Upstream health and circuit breakers
+
+    def service_health(self, service_name: str) -> Optional[bool]:
+        """Shared health of a service, or None when no fresh answer exists."""
+        if self.breaker_open(service_name):
+            return False
+        value = self.services.get(f"health:{service_name}")
+        return None if value is None else value == b"\x01"
+
+    def record_health(self, service_name: str, healthy: bool) -> None:
+        self.services.set(
+            f"health:{service_name}", b"\x01" if healthy else b"\x00", self.health_ttl
+        )
+
+    def breaker_open(self, service_name: str) -> bool:
+        value = self.services.get(f"breaker:{service_name}")
+        return value is not None and _BREAKER.unpack(value)[1] > time.time()
+
+    def record_result(self, service_name: str, failed: bool) -> None:
+        """Count an upstream response towards the service's breaker.
+
+        ``BREAKER_FAILURE_THRESHOLD`` consecutive failures open the breaker
+        for ``BREAKER_COOLDOWN`` seconds. Afterwards one more failure opens
+        it again straight away and a success closes it.
+        """
+        key = f"breaker:{service_name}"
+        if not failed:
+            # Successes only need a write when there is a streak to reset
+            value = self.services.get(key)
+            if value is not None and _BREAKER.unpack(value)[0]:
+                self.services.set(key, _BREAKER.pack(0, 0.0), self.breaker_cooldown)
+            return
+
+        def failure(current: Optional[bytes]) -> bytes:
+            failures, open_until = _BREAKER.unpack(current) if current else (0, 0.0)
+            failures += 1
+            if failures >= self.breaker_threshold and open_until <= time.time():
+                open_until = time.time() + self.breaker_cooldown
+                logger.warning(f"Circuit breaker opened for {service_name}")
+            return _BREAKER.pack(failures, open_until)
+
+        # Kept long enough to outlive an open breaker
+        self.services.update(key, failure, self.breaker_cooldown * 2)
+
+    def _lead(self) -> bool:
+        """Take or renew the health-probing lease; True if this worker holds it."""
+        pid = _PID.pack(os.getpid())
+
+        def claim(current: Optional[bytes]) -> Optional[bytes]:
+            return pid if current is None or current == pid else None
+
+        return self.services.update("leader", claim, self.health_interval * 3)
+
+    def _run_monitor(self, stop: threading.Event) -> None:
+        while True:
+            if self._lead():
+                with self.app.app_context():
+                    registry = self.app.extensions["config_registry"]
+                    for name, service in registry.snapshot.services.items():
+                        if service.enabled:
+                            self.record_health(name, HealthChecker.probe(name))
+                            self.probes += 1
+            if stop.wait(self.health_interval):
+                return
+
+    # Validated tokens
+
+    def cached_token(self, token: str) -> Optional[Dict[str, Any]]:
+        if not self.token_ttl:
+            return None
+        value = self.tokens.get(f"token:{token}")
+        if value is None:
+            self.token_misses += 1
+            return None
+        self.token_hits += 1
+        return json.loads(value)
+
+    def store_token(self, token: str, payload: Dict[str, Any]) -> None:
+        """Share a validated token's payload until it, or the cache TTL, expires."""
+        ttl = self.token_ttl
+        expires = payload.get("exp")
+        if isinstance(expires, (int, float)):
+            ttl = min(ttl, expires - time.time())
+        if ttl > 0:
+            value = json.dumps(payload, separators=(",", ":")).encode()
+            self.tokens.set(f"token:{token}", value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bytes": self.services.nbytes + self.tokens.nbytes,
+            "health_monitor": self.monitor.running,
+            "probes": self.probes,
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+        }
@@ -0,0 +1,311 @@
+import json
+import select
+import socket
+import ssl
+import threading
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from flask import Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+CHUNK_SIZE = 65536
+
+# TCP keepalive lets the kernel notice dead peers on idle streams, so the
+# gateway does not need a read timeout (a timer) per stream
+KEEPALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+]
+
+
+class StreamLimiter:
+    """Caps the number of concurrent long-lived streams per worker."""
+
+    def __init__(self, max_streams: int):
+        self.max_streams = max_streams
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a stream slot without waiting; False when at capacity."""
+        with self._lock:
+            if self.active >= self.max_streams:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "max_streams": self.max_streams,
+            "rejected": self.rejected,
+        }
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs["socket_options"] = KEEPALIVE_SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+def open_stream(
+    method: str,
+    url: str,
+    headers: Mapping[str, str],
+    params: Any,
+    data: Any,
+    connect_timeout: float,
+) -> requests.Response:
+    """Open an upstream stream on a dedicated connection.
+
+    Streams can stay open for hours, so they get their own socket instead of
+    occupying a slot in the service's shared keep-alive pool, and only the
+    connect phase is timed.
+    """
+    session = requests.Session()
+    adapter = _KeepAliveAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        return session.request(
+            method=method,
+            url=url,
+            headers=dict(headers),
+            params=params,
+            data=data,
+            timeout=(connect_timeout, None),
+            stream=True,
+        )
+    finally:
+        # The response keeps its own connection; the session is not reused
+        session.close()
+
+
+def iter_stream(response: requests.Response) -> Iterator[bytes]:
+    """Yield upstream bytes as soon as they arrive, without re-buffering.
+
+    ``iter_content`` waits for a full chunk, which would hold back small
+    server-sent events; chunked bodies are read per transfer chunk and
+    everything else with ``read1``, which returns whatever is available.
+    """
+    raw = response.raw
+    if raw.chunked and raw.supports_chunked_reads():
+        yield from raw.read_chunked(decode_content=False)
+        return
+
+    while True:
+        data = raw.read1(CHUNK_SIZE)
+        if not data:
+            break
+        yield data
+
+
+class StreamBody:
+    """Response iterable that frees its stream slot when the client goes away."""
+
+    def __init__(
+        self,
+        upstream: requests.Response,
+        limiter: StreamLimiter,
+    ):
+        self.upstream = upstream
+        self.limiter = limiter
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter_stream(self.upstream)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.upstream.close()
+        self.limiter.release()
+
+
+def is_websocket_upgrade(headers: Mapping[str, str]) -> bool:
+    """Check for an HTTP/1.1 WebSocket upgrade request."""
+    return headers.get("Upgrade", "").lower() == "websocket" and "upgrade" in (
+        headers.get("Connection", "").lower()
+    )
+
+
+def client_socket(environ: Mapping[str, Any]) -> Optional[socket.socket]:
+    """The raw client socket, where the WSGI server exposes it."""
+    return environ.get("gunicorn.socket") or environ.get("werkzeug.socket")
+
+
+def _pending(sock: socket.socket) -> int:
+    """Bytes already decrypted and buffered on a TLS socket."""
+    pending = getattr(sock, "pending", None)
+    return pending() if pending is not None else 0
+
+
+def _status_code(head: bytes) -> Optional[int]:
+    """Status of an HTTP/1.x response head; None if it is not one."""
+    parts = head.split(b"\r\n", 1)[0].split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/1."):
+        return None
+    if len(parts[1]) != 3 or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+
+class WebSocketTunnel:
+    """Relays a WebSocket upgrade to an upstream service byte-for-byte.
+
+    The handshake is forwarded as a plain HTTP/1.1 request; once upstream
+    answers, both sockets are pumped with ``select`` until either side
+    closes. Under gevent ``select`` parks the greenlet, so an idle tunnel
+    costs two sockets and no timers.
+    """
+
+    def __init__(
+        self,
+        client: socket.socket,
+        service_url: str,
+        path: str,
+        query: Mapping[str, Any],
+        headers: Mapping[str, str],
+        connect_timeout: float,
+    ):
+        self.client = client
+        self.target = urlsplit(service_url)
+        self.path = f"{self.target.path.rstrip('/')}/{path}"
+        if query:
+            self.path += "?" + urlencode(query, doseq=True)
+        self.headers = dict(headers)
+        self.connect_timeout = connect_timeout
+        self.upstream_status: Optional[int] = None
+        self.handshake_seconds = 0.0
+
+    def _connect(self) -> socket.socket:
+        secure = self.target.scheme == "https"
+        port = self.target.port or (443 if secure else 80)
+        upstream = socket.create_connection(
+            (self.target.hostname, port), timeout=self.connect_timeout
+        )
+        upstream.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if secure:
+            context = ssl.create_default_context()
+            upstream = context.wrap_socket(
+                upstream, server_hostname=self.target.hostname
+            )
+        return upstream
+
+    def _handshake(self) -> bytes:
+        self.headers["Host"] = self.target.netloc
+        self.headers["Connection"] = "Upgrade"
+        self.headers["Upgrade"] = "websocket"
+        lines = [f"GET {self.path} HTTP/1.1"]
+        lines.extend(f"{key}: {value}" for key, value in self.headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    def run(self) -> None:
+        """Perform the handshake and relay frames until one side closes."""
+        started = time.monotonic()
+        # Map connect failures onto the errors the proxy already handles
+        try:
+            upstream = self._connect()
+        except socket.timeout as e:
+            raise requests.exceptions.ConnectTimeout(e)
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e)
+        try:
+            upstream.sendall(self._handshake())
+            try:
+                head = self._read_head(upstream)
+            except socket.timeout:
+                self._reject(504, "Service timeout", "The request timed out")
+                return
+            finally:
+                self.handshake_seconds = time.monotonic() - started
+
+            self.upstream_status = _status_code(head)
+            if self.upstream_status is None:
+                self._reject(
+                    502, "Bad gateway", "The service sent an invalid upgrade response"
+                )
+                return
+            # Relay upstream's handshake response verbatim
+            self.client.sendall(head)
+            if self.upstream_status != 101:
+                return
+
+            # Idle tunnels are normal; keepalive notices dead peers instead
+            upstream.settimeout(None)
+            self._pump(upstream)
+        finally:
+            upstream.close()
+
+    @staticmethod
+    def _read_head(upstream: socket.socket) -> bytes:
+        """Upstream's response head (and any bytes after it); b"" if cut off."""
+        head = b""
+        while b"\r\n\r\n" not in head:
+            try:
+                data = upstream.recv(CHUNK_SIZE)
+            except socket.timeout:
+                raise
+            except OSError:
+                return b""
+            if not data:
+                return b""
+            head += data
+        return head
+
+    def _reject(self, status: int, error: str, message: str) -> None:
+        """Answer the client with an error instead of the upgrade."""
+        self.upstream_status = status
+        body = json.dumps({"error": error, "message": message}).encode()
+        head = (
+            f"HTTP/1.1 {status} {error}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        self.client.sendall(head.encode("latin-1") + body)
+
+    def _pump(self, upstream: socket.socket) -> None:
+        peers = {self.client: upstream, upstream: self.client}
+        while True:
+            # TLS records recv() already decrypted wait in the SSL buffer,
+            # where select cannot see them
+            readable = [sock for sock in peers if _pending(sock)]
+            if not readable:
+                readable, _, errored = select.select(list(peers), [], list(peers))
+                if errored:
+                    return
+            for sock in readable:
+                try:
+                    data = sock.recv(CHUNK_SIZE)
+                except OSError:
+                    return
+                if not data:
+                    return
+                peers[sock].sendall(data)
+
+
+class TunnelResponse(Response):
+    """Response returned once a tunnel has taken over the client socket.
+
+    The WSGI server must not write anything more to the socket: gunicorn is
+    told the request was already handled, other servers get the connection
+    dropped.
+    """
+
+    def __call__(self, environ: Dict[str, Any], start_response: Any) -> Any:
+        if "gunicorn.socket" in environ:
+            from gunicorn.workers.base_async import ALREADY_HANDLED
+
+            return ALREADY_HANDLED
+        raise ConnectionError("WebSocket tunnel closed")
@@ -0,0 +1,357 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+import requests
+from flask import g, has_app_context
+
+from gateway_service import __version__
+from gateway_service.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_TRACEPARENT = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$"
+)
+_ZERO_TRACE_ID = "0" * 32
+_ZERO_SPAN_ID = "0" * 16
+
+
+def parse_traceparent(value: Optional[str]):
+    """``(trace_id, parent_span_id, sampled)`` from a W3C ``traceparent``."""
+    match = _TRACEPARENT.match((value or "").strip())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    # Version ff is invalid; version 00 has no trailing fields
+    if version == "ff" or (version == "00" and rest):
+        return None
+    if trace_id == _ZERO_TRACE_ID or span_id == _ZERO_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def _new_id(bits: int) -> str:
+    value = 0
+    while not value:
+        value = random.getrandbits(bits)
+    return f"{value:0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation of a request; use as a context manager or ``end()``."""
+
+    __slots__ = (
+        "trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, trace: "RequestTrace", name: str, parent_id, kind, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error = False
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: bool = False) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.error = self.error or error
+
+    @property
+    def traceparent(self) -> str:
+        flags = "01" if self.trace.sampled else "00"
+        return f"00-{self.trace.trace_id}-{self.span_id}-{flags}"
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.set("exception.type", exc_type.__name__)
+        self.end(error=exc is not None)
+
+
+class _NoopSpan:
+    """Stands in for a span outside a traced request."""
+
+    traceparent = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: bool = False) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class RequestTrace:
+    """The spans of one request, all children of its server span.
+
+    Spans are kept flat under the root so batch sub-requests can add theirs
+    from worker threads without sharing any context stack.
+    """
+
+    def __init__(
+        self,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        tracestate: Optional[str],
+    ):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.tracestate = tracestate
+        self.spans: List[Span] = []
+        self.root = Span(self, "request", parent_id, SPAN_KIND_SERVER, {})
+        self.spans.append(self.root)
+
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Span:
+        span = Span(self, name, self.root.span_id, kind, attributes)
+        self.spans.append(span)
+        return span
+
+    def headers(self, span: Optional[Span] = None) -> Dict[str, str]:
+        """Propagation headers naming ``span`` (or the root) as the parent."""
+        headers = {"traceparent": (span or self.root).traceparent}
+        if self.tracestate:
+            headers["tracestate"] = self.tracestate
+        return headers
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return g.get("trace") if has_app_context() else None
+
+
+def trace_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """A span in the current request's trace, or a no-op outside one."""
+    trace = current_trace()
+    if trace is None:
+        return NOOP_SPAN
+    return trace.span(name, kind, **attributes)
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """OTLP/HTTP JSON ``ExportTraceServiceRequest`` for ``spans``."""
+
+    def attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        return {"key": key, "value": typed}
+
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2 if span.error else 1},
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.trace.tracestate:
+            item["traceState"] = span.trace.tracestate
+        encoded.append(item)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        attribute("service.name", service_name),
+                        attribute("service.version", __version__),
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "turbogate"}, "spans": encoded}],
+            }
+        ]
+    }
+
+
+class OTLPHTTPExporter:
+    """POSTs OTLP/HTTP JSON to a collector (``.../v1/traces``)."""
+
+    def __init__(self, endpoint: str, timeout: float = 5, headers=None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.session.headers["Content-Type"] = "application/json"
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        response = self.session.post(
+            self.endpoint, data=json.dumps(payload), timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class FileExporter:
+    """Appends one OTLP JSON document per batch to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class Tracer:
+    """W3C trace-context propagation with head and tail sampled span export.
+
+    Incoming ``traceparent``/``tracestate`` are continued, and the parent's
+    sampling decision is honoured; new traces are head-sampled at
+    ``TRACE_SAMPLE_RATE``. Spans are always recorded, so traces the head
+    decision skipped are still exported when the request fails or is slower
+    than ``TRACE_SLOW_MS`` (tail sampling). Finished traces go to a bounded
+    queue that a background thread exports in batches; the request path
+    never waits on the collector, and spans are dropped when it falls behind.
+    """
+
+    def __init__(self, app_config: Mapping[str, Any]):
+        self.sample_rate = app_config.get("TRACE_SAMPLE_RATE", 1.0)
+        self.tail_errors = app_config.get("TRACE_TAIL_ERRORS", True)
+        self.slow_ns = int(app_config.get("TRACE_SLOW_MS", 1000) * 1e6)
+        self.service_name = app_config.get("TRACE_SERVICE_NAME", "turbogate")
+        self.batch_size = app_config.get("TRACE_EXPORT_BATCH_SIZE", 512)
+        self.export_interval = app_config.get("TRACE_EXPORT_INTERVAL", 2.0)
+        self.max_queue = app_config.get("TRACE_QUEUE_SIZE", 4096)
+        self.exporter = self._build_exporter(app_config)
+
+        self._queue: Deque[Span] = deque()
+        self._export_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, "trace-exporter")
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+        self.tail_sampled = 0
+
+    @staticmethod
+    def _build_exporter(app_config: Mapping[str, Any]):
+        kind = app_config.get("TRACE_EXPORTER", "none")
+        if kind == "otlp":
+            return OTLPHTTPExporter(
+                app_config.get(
+                    "TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+                ),
+                app_config.get("TRACE_EXPORT_TIMEOUT", 5),
+            )
+        if kind == "file":
+            return FileExporter(app_config.get("TRACE_FILE", "traces.jsonl"))
+        return None
+
+    def start(self, environ: Mapping[str, Any], name: str) -> RequestTrace:
+        """Continue the caller's trace, or start a new head-sampled one."""
+        parent = parse_traceparent(environ.get("HTTP_TRACEPARENT"))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            tracestate = (environ.get("HTTP_TRACESTATE") or "")[:512] or None
+        else:
+            trace_id, parent_id, tracestate = _new_id(128), None, None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+        trace = RequestTrace(trace_id, parent_id, sampled, tracestate)
+        trace.root.name = name
+        return trace
+
+    def finish(self, trace: RequestTrace, status: int) -> bool:
+        """End the request's span and queue the trace if it is sampled."""
+        root = trace.root
+        root.set("http.status_code", status)
+        root.end(error=status >= 500)
+        if self.exporter is None:
+            return False
+
+        keep = trace.sampled
+        if not keep:
+            failed = status >= 500 or any(span.error for span in trace.spans)
+            keep = (self.tail_errors and failed) or (
+                root.end_ns - root.start_ns >= self.slow_ns
+            )
+            if not keep:
+                return False
+            self.tail_sampled += 1
+
+        if len(self._queue) + len(trace.spans) > self.max_queue:
+            self.dropped += len(trace.spans)
+            return False
+        self._queue.extend(trace.spans)
+        self._worker.ensure_running()
+        return True
+
+    def flush(self) -> int:
+        """Export everything queued so far, in batches."""
+        sent = 0
+        with self._export_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.popleft())
+                    except IndexError:
+                        break
+                try:
+                    self.exporter.export(otlp_payload(batch, self.service_name))
+                    self.exported += len(batch)
+                    sent += len(batch)
+                except Exception as e:
+                    self.export_errors += 1
+                    self.dropped += len(batch)
+                    logger.warning(f"Trace export failed: {e}")
+        return sent
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.export_interval):
+            self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "queued": len(self._queue),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors,
+            "tail_sampled": self.tail_sampled,
+        }
@@ -0,0 +1,154 @@
+import bisect
+import hashlib
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class TrafficSplitError(ValueError):
+    """Raised for invalid weighted routing configuration."""
+
+
+@dataclass(frozen=True)
+class TrafficSplit:
+    """Weighted routing of one prefix across several service versions.
+
+    ``sticky`` is ``None`` (random per request), ``"user"`` (hash of the
+    authenticated user ID) or ``"header:<Name>"`` (hash of a request header),
+    so a given user or client keeps hitting the same version.
+    """
+
+    targets: Tuple[str, ...]
+    cumulative: Tuple[int, ...]
+    sticky: Optional[str] = None
+
+    @property
+    def total(self) -> int:
+        return self.cumulative[-1]
+
+    @property
+    def sticky_header(self) -> Optional[str]:
+        if self.sticky and self.sticky.startswith("header:"):
+            return self.sticky.split(":", 1)[1]
+        return None
+
+    def weights(self) -> Dict[str, int]:
+        previous = 0
+        weights = {}
+        for target, bound in zip(self.targets, self.cumulative):
+            weights[target] = bound - previous
+            previous = bound
+        return weights
+
+    def choose(self, sticky_key: Optional[str] = None) -> str:
+        """Pick a target version, deterministically when given a sticky key."""
+        if sticky_key:
+            digest = hashlib.blake2b(sticky_key.encode(), digest_size=8).digest()
+            point = int.from_bytes(digest, "big") % self.total
+        else:
+            point = random.randrange(self.total)
+        return self.targets[bisect.bisect_right(self.cumulative, point)]
+
+
+def compile_traffic_split(prefix: str, spec: Mapping[str, Any]) -> TrafficSplit:
+    """Build a :class:`TrafficSplit` from ``{"splits": {...}, "sticky": ...}``."""
+    splits = spec.get("splits")
+    if not isinstance(splits, Mapping) or not splits:
+        raise TrafficSplitError(f"Route '{prefix}': 'splits' must be a non-empty map")
+
+    sticky = spec.get("sticky")
+    if sticky not in (None, "user") and not (
+        isinstance(sticky, str) and sticky.startswith("header:") and len(sticky) > 7
+    ):
+        raise TrafficSplitError(
+            f"Route '{prefix}': sticky must be 'user' or 'header:<Name>'"
+        )
+
+    targets: List[str] = []
+    cumulative: List[int] = []
+    running = 0
+    for target, weight in splits.items():
+        if not isinstance(weight, int) or weight < 0:
+            raise TrafficSplitError(
+                f"Route '{prefix}': weight for '{target}' must be a non-negative int"
+            )
+        if weight == 0:
+            continue
+        running += weight
+        targets.append(target)
+        cumulative.append(running)
+
+    if not targets:
+        raise TrafficSplitError(f"Route '{prefix}': at least one weight must be > 0")
+
+    return TrafficSplit(
+        targets=tuple(targets), cumulative=tuple(cumulative), sticky=sticky
+    )
+
+
+class _LatencyStats:
+    __slots__ = ("requests", "errors", "total_ms", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile."""
+        if not self.requests:
+            return None
+        rank = fraction * self.requests
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                # The overflow bucket is reported as the largest bound
+                return float(
+                    LATENCY_BUCKETS_MS[min(index, len(LATENCY_BUCKETS_MS) - 1)]
+                )
+        return None
+
+
+class UpstreamMetrics:
+    """Per-worker request, error and latency counters for each service version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _LatencyStats] = {}
+
+    def record(self, service_name: str, duration: float, error: bool) -> None:
+        """Record one upstream call."""
+        duration_ms = duration * 1000
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)
+
+        with self._lock:
+            stats = self._stats.get(service_name)
+            if stats is None:
+                stats = self._stats[service_name] = _LatencyStats()
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.total_ms += duration_ms
+            stats.buckets[bucket] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Summarise counters for the metrics endpoint."""
+        with self._lock:
+            return {
+                name: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "error_rate": round(stats.errors / stats.requests, 4),
+                    "avg_ms": round(stats.total_ms / stats.requests, 2),
+                    "p50_ms": stats.percentile(0.5),
+                    "p95_ms": stats.percentile(0.95),
+                    "p99_ms": stats.percentile(0.99),
+                }
+                for name, stats in self._stats.items()
+                if stats.requests
+            }
@@ -0,0 +1,57 @@
+from typing import Any, Dict, Generic, List, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+_TERMINAL = "\0"
+
+
+class RouteTrie(Generic[T]):
+    """Character trie answering "longest configured prefix of this path".
+
+    Matches the previous ``path.startswith(prefix)`` semantics, but lookup cost
+    depends on the length of the matched prefix rather than on the number of
+    configured routes.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, entries: Optional[Mapping[str, T]] = None):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        for prefix, value in (entries or {}).items():
+            self._insert(prefix, value)
+
+    def _insert(self, prefix: str, value: T) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        if _TERMINAL not in node:
+            self._size += 1
+        node[_TERMINAL] = value
+
+    def match(self, path: str) -> Optional[T]:
+        """Return the value of the longest prefix of ``path``, if any."""
+        node = self._root
+        found = node.get(_TERMINAL)
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            if _TERMINAL in node:
+                found = node[_TERMINAL]
+        return found
+
+    def match_all(self, path: str) -> List[T]:
+        """Return the values of every prefix of ``path``, shortest first."""
+        node = self._root
+        found = [node[_TERMINAL]] if _TERMINAL in node else []
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            if _TERMINAL in node:
+                found.append(node[_TERMINAL])
+        return found
+
+    def __len__(self) -> int:
+        return self._size
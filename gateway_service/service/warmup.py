@@ -0,0 +1,178 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from flask import Flask
+from urllib3 import HTTPConnectionPool, Timeout
+
+from gateway_service.flask_config import ServiceConfig
+from gateway_service.service.http2 import HTTP2Adapter
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Per-worker warmup, run before the worker accepts any traffic.
+
+    Resolves every enabled upstream through the DNS cache, opens
+    ``WARMUP_CONNECTIONS`` keep-alive connections (including the TLS
+    handshake) into each service's pool with a ``HEAD`` of its base URL,
+    and primes the auth caches, so the
+    first requests after a deploy or worker recycle do not pay for them.
+    Failures are recorded, never raised: an unreachable service must not
+    stop the worker from booting. The whole run is bounded by
+    ``WARMUP_TIMEOUT``.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.enabled = app.config.get("WARMUP_ENABLED", True)
+        self.connections = app.config.get("WARMUP_CONNECTIONS", 2)
+        self.timeout = app.config.get("WARMUP_TIMEOUT", 10)
+        self.report: Dict[str, Any] = {}
+        self._ready_pid: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether this worker process has finished warming up."""
+        return not self.enabled or self._ready_pid == os.getpid()
+
+    def run(self) -> Dict[str, Any]:
+        """Warm this process up; returns (and keeps) a report."""
+        if not self.enabled:
+            return self.report
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        registry = self.app.extensions["config_registry"]
+        services = {
+            name: service
+            for name, service in registry.snapshot.services.items()
+            if service.enabled
+        }
+
+        results: Dict[str, Dict[str, Any]] = {}
+        if services:
+            executor = ThreadPoolExecutor(
+                max_workers=min(len(services), 8), thread_name_prefix="warmup"
+            )
+            futures = {
+                executor.submit(self._warm_service, name, service, deadline): name
+                for name, service in services.items()
+            }
+            wait(futures, timeout=self.timeout)
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future, name in futures.items():
+                if not future.done():
+                    results[name] = {"error": "timed out"}
+                elif future.exception() is not None:
+                    results[name] = {"error": str(future.exception())}
+                else:
+                    results[name] = future.result()
+
+        with self.app.app_context():
+            caches = self._prime_caches()
+
+        self.report = {
+            "seconds": round(time.monotonic() - started, 3),
+            "services": results,
+            "caches": caches,
+        }
+        self._ready_pid = os.getpid()
+        logger.info(f"Worker {os.getpid()} warmed up: {self.report}")
+        return self.report
+
+    def _warm_service(
+        self, name: str, service: ServiceConfig, deadline: float
+    ) -> Dict[str, Any]:
+        registry = self.app.extensions["config_registry"]
+        session = registry.session_for(name)
+        url = urlsplit(service.url)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        result: Dict[str, Any] = {"connections": 0}
+
+        dns_cache = registry.pools.dns_cache
+        opened = []
+        try:
+            if dns_cache is not None:
+                result["addresses"] = dns_cache.resolve(url.hostname, port)
+            if isinstance(session.get_adapter(service.url), HTTP2Adapter):
+                # Every stream shares the connection one request opens
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    session.head(
+                        service.url,
+                        timeout=min(remaining, service.timeout),
+                        allow_redirects=False,
+                    ).close()
+                    result["connections"] += 1
+                return result
+            pool = self._pool_for(session, service.url)
+            for _ in range(min(self.connections, registry.pools.pool_size)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # Each response keeps its connection checked out, so the
+                # next request has to open another one
+                opened.append(
+                    pool.urlopen(
+                        "HEAD",
+                        url.path or "/",
+                        timeout=Timeout(min(remaining, service.timeout)),
+                        retries=False,
+                        redirect=False,
+                        preload_content=False,
+                        release_conn=False,
+                    )
+                )
+                result["connections"] += 1
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            for response in opened:
+                response.drain_conn()
+                response.release_conn()
+        return result
+
+    @staticmethod
+    def _pool_for(session: requests.Session, url: str) -> HTTPConnectionPool:
+        """The urllib3 pool requests to ``url`` will be sent through."""
+        # The pool key includes TLS settings that requests merges in from
+        # the environment (REQUESTS_CA_BUNDLE...)
+        settings = session.merge_environment_settings(
+            url, {}, None, session.verify, None
+        )
+        adapter = session.get_adapter(url)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            return adapter.get_connection_with_tls_context(
+                requests.Request("GET", url).prepare(),
+                settings["verify"],
+                proxies=settings["proxies"],
+            )
+        return adapter.get_connection(url, settings["proxies"])
+
+    def _prime_caches(self) -> Dict[str, Any]:
+        extensions = self.app.extensions
+        primed: Dict[str, Any] = {}
+
+        extensions["config_registry"].ensure_watching()
+        # One worker per node wins the lease and keeps upstream health fresh
+        extensions["shared_state"].monitor.ensure_running()
+
+        jwks = extensions["jwks_cache"]
+        if jwks.enabled:
+            primed["jwks"] = jwks.refresh()
+
+        revocations = extensions["token_revocations"]
+        if revocations.redis_url:
+            try:
+                revocations.rebuild()
+                primed["revocations"] = True
+            except Exception as e:
+                logger.warning(f"Revocation list warmup failed: {e}")
+                primed["revocations"] = False
+        return primed
@@ -1,7 +1,8 @@
 from gateway_service.utils.utils import (
     generate_request_id,
+    get_client_ip,
     get_redis_client,
     setup_logging,
 )
 
-__all__ = ["setup_logging", "get_redis_client", "generate_request_id"]
+__all__ = ["setup_logging", "get_redis_client", "generate_request_id", "get_client_ip"]
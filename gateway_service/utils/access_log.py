@@ -0,0 +1,128 @@
+import atexit
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping
+
+from gateway_service.utils.background import BackgroundThread
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _serialize(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, default=str)
+    return json.dumps(record, separators=(",", ":"), default=str).encode()
+
+
+class AccessLog:
+    """One sampled JSON access record per request, written in batches.
+
+    Successful requests are kept at ``ACCESS_LOG_SAMPLE_RATE`` and client
+    errors at ``ACCESS_LOG_CLIENT_ERROR_SAMPLE_RATE``; server errors and
+    requests slower than ``ACCESS_LOG_SLOW_MS`` are always kept. Each record
+    carries its ``sample_rate`` so counts can be re-weighted downstream.
+
+    Requests only append to a bounded queue; a background thread serializes
+    and writes whatever has accumulated in one ``write`` per flush. When the
+    queue is full, records are dropped (and counted) instead of blocking.
+    """
+
+    def __init__(self, app_config: Mapping[str, Any], stream=None):
+        self.enabled = app_config.get("ACCESS_LOG_ENABLED", True)
+        self.sample_rate = app_config.get("ACCESS_LOG_SAMPLE_RATE", 1.0)
+        self.client_error_sample_rate = app_config.get(
+            "ACCESS_LOG_CLIENT_ERROR_SAMPLE_RATE", 1.0
+        )
+        self.slow_seconds = app_config.get("ACCESS_LOG_SLOW_MS", 1000) / 1000
+        self.flush_interval = app_config.get("ACCESS_LOG_FLUSH_INTERVAL", 0.5)
+        self.max_queue = app_config.get("ACCESS_LOG_QUEUE_SIZE", 10000)
+        # None writes to whatever sys.stdout is at flush time
+        self.stream = stream
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._write_lock = threading.Lock()
+        self._writer = BackgroundThread(self._run, "access-log-writer")
+        # Write out what is still queued when the process exits
+        atexit.register(self.flush)
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def sample_rate_for(self, status: int, duration: float) -> float:
+        """Fraction of requests like this one that are logged."""
+        if status >= 500 or duration >= self.slow_seconds:
+            return 1.0
+        if status >= 400:
+            return self.client_error_sample_rate
+        return self.sample_rate
+
+    def record(self, status: int, duration: float, **fields: Any) -> bool:
+        """Queue a record for this request if it is sampled; never blocks."""
+        if not self.enabled:
+            return False
+        rate = self.sample_rate_for(status, duration)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+
+        fields.update(
+            timestamp=time.time(),
+            status=status,
+            duration_ms=round(duration * 1000, 2),
+            sample_rate=rate,
+        )
+        if duration >= self.slow_seconds:
+            fields["slow"] = True
+        self._queue.append(fields)
+        self._writer.ensure_running()
+        return True
+
+    def flush(self) -> int:
+        """Serialize and write everything queued so far in one write."""
+        lines = []
+        queue = self._queue
+        while queue:
+            try:
+                lines.append(_serialize(queue.popleft()))
+            except IndexError:
+                break
+        if not lines:
+            return 0
+
+        data = b"\n".join(lines) + b"\n"
+        with self._write_lock:
+            stream = self.stream or sys.stdout
+            buffer = getattr(stream, "buffer", None)
+            if buffer is not None:
+                # Keep ordering with text already buffered by other loggers
+                stream.flush()
+                buffer.write(data)
+            else:
+                stream.write(data.decode())
+            stream.flush()
+        self.written += len(lines)
+        return len(lines)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
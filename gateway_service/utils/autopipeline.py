@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import redis
+
+# Commands that block or change the connection's state cannot share a pipeline
+DIRECT_COMMANDS = frozenset(
+    {
+        "BLMOVE",
+        "BLMPOP",
+        "BLPOP",
+        "BRPOP",
+        "BRPOPLPUSH",
+        "BZMPOP",
+        "BZPOPMAX",
+        "BZPOPMIN",
+        "DISCARD",
+        "EXEC",
+        "MONITOR",
+        "MULTI",
+        "PSUBSCRIBE",
+        "SUBSCRIBE",
+        "UNWATCH",
+        "WAIT",
+        "WATCH",
+        "XREAD",
+        "XREADGROUP",
+    }
+)
+
+
+class _Pending:
+    __slots__ = ("args", "options", "done", "result", "error")
+
+    def __init__(self, args: Tuple[Any, ...], options: Dict[str, Any]):
+        self.args = args
+        self.options = options
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class AutoPipelineRedis(redis.Redis):
+    """Redis client that sends concurrent callers' commands as one pipeline.
+
+    Each command is queued and the first caller to find no pipeline in
+    flight sends everything queued so far, up to ``pipeline_max_batch``
+    commands, and hands every caller its own result or error. Commands
+    issued while a pipeline is on the wire queue up for the next one, so
+    batches grow with load and an idle client adds no latency.
+    ``pipeline_window`` seconds are waited before a batch is taken; the
+    default of 0 just yields, letting greenlets that are ready to issue
+    commands join it. Blocking and transaction commands bypass the queue.
+    """
+
+    pipeline_window = 0.0
+    pipeline_max_batch = 100
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._queue: Deque[_Pending] = deque()
+        self._queue_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.batches = 0
+        self.batched_commands = 0
+        self.largest_batch = 0
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        if str(args[0]).upper() in DIRECT_COMMANDS:
+            return super().execute_command(*args, **options)
+
+        pending = _Pending(args, options)
+        with self._queue_lock:
+            self._queue.append(pending)
+        while not pending.done:
+            # Whoever gets the lock sends the next batch, possibly ours
+            with self._flush_lock:
+                if not pending.done:
+                    self._flush()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _flush(self) -> None:
+        if len(self._queue) < self.pipeline_max_batch:
+            time.sleep(self.pipeline_window)
+        with self._queue_lock:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(len(self._queue), self.pipeline_max_batch))
+            ]
+
+        pipe = self.pipeline(transaction=False)
+        for pending in batch:
+            pipe.execute_command(*pending.args, **pending.options)
+        results = None
+        try:
+            results = pipe.execute(raise_on_error=False)
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            pipe.reset()
+            if results is None:
+                # The sender was killed; nobody else would answer these callers
+                results = [redis.ConnectionError("Pipeline interrupted")] * len(batch)
+            for pending, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    pending.error = result
+                else:
+                    pending.result = result
+                pending.done = True
+
+        self.batches += 1
+        self.batched_commands += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    def pipeline_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "commands": self.batched_commands,
+            "avg_batch": (
+                round(self.batched_commands / self.batches, 2) if self.batches else 0
+            ),
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,65 @@
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+
+class BackgroundThread:
+    """A daemon thread that is started lazily and restarted after fork.
+
+    Gunicorn workers are forked from the master, and threads do not survive a
+    fork. Rather than starting threads at import or app-creation time, callers
+    invoke :meth:`ensure_running` from the request path; it is a cheap pid
+    comparison once the thread is up, and transparently starts a fresh thread
+    in each worker process.
+
+    ``target`` receives a :class:`threading.Event` that is set when the thread
+    should stop, and should return promptly once it is.
+    """
+
+    def __init__(self, target: Callable[[threading.Event], None], name: str):
+        self.target = target
+        self.name = name
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether the thread is alive in the current process."""
+        return (
+            self._pid == os.getpid()
+            and self._thread is not None
+            and self._thread.is_alive()
+        )
+
+    def ensure_running(self) -> None:
+        """Start the thread if it is not running in this process."""
+        if self.running:
+            return
+
+        with self._lock:
+            if self.running:
+                return
+
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the thread to stop and wait for it to exit."""
+        self._stop_event.set()
+        if self.running and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            self.target(self._stop_event)
+        except Exception:
+            logging.getLogger(__name__).exception(
+                f"Background thread {self.name} crashed"
+            )
@@ -0,0 +1,127 @@
+import atexit
+import json
+import os
+import random
+import re
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Mapping, Optional
+
+from gateway_service.utils.background import BackgroundThread
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Path segments kept verbatim; anything else (IDs, emails, tokens) is redacted
+_PLAIN_SEGMENT = re.compile(r"^(?:[A-Za-z][A-Za-z_-]{0,31}|v\d{1,2})$")
+REDACTED = ":x"
+
+
+def redact_path(path: str) -> str:
+    """``path`` with every segment that might identify someone replaced."""
+    return "/".join(
+        segment if not segment or _PLAIN_SEGMENT.match(segment) else REDACTED
+        for segment in path.split("/")
+    )
+
+
+def auth_state(authorization: Optional[str], user: Any) -> str:
+    """How a request authenticated, without any credential in it."""
+    if not authorization:
+        return "none"
+    if not authorization.startswith("Bearer "):
+        return "malformed"
+    return "valid" if user else "invalid"
+
+
+def _serialize(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, separators=(",", ":")).encode()
+
+
+class TrafficCapture:
+    """Sampled, redacted request records for replay (``turbogate replay``).
+
+    Each record is one JSON line with short keys: arrival time, method,
+    redacted path, service, status, request and response sizes, header
+    names, query parameter names, auth state, and gateway and upstream
+    latency. No header values, query values, bodies or credentials are
+    kept. Like the access log, requests only append to a bounded queue and
+    a background thread appends batches to ``CAPTURE_FILE`` with one
+    ``O_APPEND`` write each, so workers can share the file.
+    """
+
+    def __init__(self, app_config: Mapping[str, Any]):
+        self.enabled = app_config.get("CAPTURE_ENABLED", False)
+        self.path = app_config.get("CAPTURE_FILE", "capture.jsonl")
+        self.sample_rate = app_config.get("CAPTURE_SAMPLE_RATE", 0.01)
+        self.flush_interval = app_config.get("CAPTURE_FLUSH_INTERVAL", 1.0)
+        self.max_queue = app_config.get("CAPTURE_QUEUE_SIZE", 10000)
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._write_lock = threading.Lock()
+        self._writer = BackgroundThread(self._run, "capture-writer")
+        atexit.register(self.flush)
+        self.captured = 0
+        self.dropped = 0
+
+    def sample(self) -> bool:
+        """Whether to capture the current request; checked before building it."""
+        return self.enabled and random.random() < self.sample_rate
+
+    def record(self, **fields: Any) -> bool:
+        """Queue a sampled request's record; never blocks."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(fields)
+        self._writer.ensure_running()
+        return True
+
+    def flush(self) -> int:
+        """Append everything queued so far to the capture file."""
+        lines = []
+        queue = self._queue
+        while queue:
+            try:
+                lines.append(_serialize(queue.popleft()))
+            except IndexError:
+                break
+        if not lines:
+            return 0
+
+        data = b"\n".join(lines) + b"\n"
+        with self._write_lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        self.captured += len(lines)
+        return len(lines)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._queue),
+            "captured": self.captured,
+            "dropped": self.dropped,
+        }
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a capture file, skipping a torn final line."""
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
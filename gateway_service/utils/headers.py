@@ -0,0 +1,125 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+# RFC 7230 section 6.1 - meaningful for a single connection only
+HOP_BY_HOP: FrozenSet[str] = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+
+# Never forwarded upstream: hop-by-hop, the client's Host (requests sets the
+# upstream's), a body length requests recomputes, identity headers that only
+# the gateway may set, and trace context the gateway re-issues as the parent
+REQUEST_DENY: FrozenSet[str] = HOP_BY_HOP | {
+    "host",
+    "content-length",
+    "x-user-id",
+    "x-user-role",
+    "x-user-email",
+    "traceparent",
+    "tracestate",
+}
+
+RESPONSE_ALLOW: FrozenSet[str] = frozenset(
+    {
+        "content-type",
+        "content-length",
+        "content-range",
+        "accept-ranges",
+        "cache-control",
+        "etag",
+        "last-modified",
+        "x-request-id",
+    }
+)
+
+# Streams are relayed as raw (still encoded) bytes
+STREAM_RESPONSE_ALLOW: FrozenSet[str] = frozenset(
+    {"content-type", "content-encoding", "cache-control", "x-request-id"}
+)
+
+
+def connection_tokens(connection: Optional[str]) -> FrozenSet[str]:
+    """Extra hop-by-hop headers named in a ``Connection`` header."""
+    if not connection:
+        return frozenset()
+    return frozenset(
+        token.strip().lower() for token in connection.split(",") if token.strip()
+    )
+
+
+def forward_headers(
+    source: Iterable[Tuple[str, str]], connection: Optional[str] = None
+) -> Dict[str, str]:
+    """Headers to send upstream from ``(name, value)`` pairs, in one pass."""
+    deny = REQUEST_DENY | connection_tokens(connection) if connection else REQUEST_DENY
+    return {name: value for name, value in source if name.lower() not in deny}
+
+
+# WSGI environ key -> (lower-case, canonical) header name, or None for keys
+# that are not headers; filled lazily and capped so odd headers cannot grow it
+_ENVIRON_NAMES: Dict[str, Optional[Tuple[str, str]]] = {}
+_ENVIRON_NAMES_MAX = 1024
+
+
+def _environ_header_name(key: str) -> Optional[Tuple[str, str]]:
+    if key.startswith("HTTP_"):
+        key = key[5:]
+    elif key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+        return None
+    name = key.replace("_", "-").title()
+    return name.lower(), name
+
+
+def forward_environ_headers(environ: Mapping[str, Any]) -> Dict[str, str]:
+    """Headers to send upstream, read straight from the WSGI environ.
+
+    Skips the intermediate header objects and per-request name
+    normalisation: each environ key is translated once per process.
+    """
+    deny = REQUEST_DENY
+    connection = environ.get("HTTP_CONNECTION")
+    if connection:
+        extra = connection_tokens(connection) - deny
+        if extra:
+            deny = deny | extra
+
+    names = _ENVIRON_NAMES
+    headers = {}
+    for key, value in environ.items():
+        try:
+            entry = names[key]
+        except KeyError:
+            entry = _environ_header_name(key)
+            if len(names) < _ENVIRON_NAMES_MAX:
+                names[key] = entry
+        if entry is not None and entry[0] not in deny and value:
+            headers[entry[1]] = value
+    return headers
+
+
+def response_headers(
+    upstream: Mapping[str, str], allow: FrozenSet[str] = RESPONSE_ALLOW
+) -> List[Tuple[str, str]]:
+    """Upstream response headers to pass back to the client."""
+    headers = []
+    encoded = False
+    for name, value in upstream.items():
+        key = name.lower()
+        if key in allow:
+            headers.append((name, value))
+        elif key == "content-encoding":
+            encoded = True
+
+    # iter_content decompresses encoded bodies, so a compressed length no
+    # longer applies; streams relay raw bytes and keep the encoding instead
+    if encoded:
+        headers = [h for h in headers if h[0].lower() != "content-length"]
+    return headers
@@ -0,0 +1,72 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from typing import Any
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o: Any) -> Any:
+    """Serialize the extra types Flask's JSON provider supports."""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed.
+
+    Serializes straight to bytes and skips the text round-trip ``jsonify``
+    normally makes. Calls orjson cannot honour (``indent``, custom
+    separators, ...) fall back to the standard library.
+    """
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        # Dates go through _default so they keep the HTTP date format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._app.debug and self.compact is None:
+            # Keep the readable, indented output in debug mode
+            return super().response(obj)
+        return self._app.response_class(
+            self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype
+        )
+
+
+def init_json_provider(app: Flask) -> None:
+    """Install the serializer selected by ``JSON_SERIALIZER``."""
+    choice = app.config.get("JSON_SERIALIZER", "auto")
+    if choice == "json" or (choice == "auto" and orjson is None):
+        return
+    if orjson is None:
+        raise RuntimeError("JSON_SERIALIZER=orjson but orjson is not installed")
+    app.json = FastJSONProvider(app)
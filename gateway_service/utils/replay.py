@@ -0,0 +1,462 @@
+"""Replay of a traffic capture (``turbogate replay``).
+
+Requests are sent open-loop at their recorded offsets, divided by ``speed``,
+to a gateway whose services all point at a local :class:`StubBackend`. The
+stub answers each request after the upstream latency that was recorded for
+it, with the recorded status and response size, so the latency that is
+reported is the gateway's own plus the original upstream time.
+"""
+
+import contextlib
+import logging
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import jwt
+import requests
+
+from gateway_service.utils.capture import REDACTED
+
+API_PREFIX = "/api/v1/"
+
+# Instructions to the stub, set per request by the replayer
+LATENCY_HEADER = "X-Replay-Latency"
+STATUS_HEADER = "X-Replay-Status"
+BYTES_HEADER = "X-Replay-Bytes"
+
+# Headers the replayer sets itself or that describe the connection
+_SKIPPED_HEADERS = {
+    "authorization",
+    "connection",
+    "content-length",
+    "host",
+    "transfer-encoding",
+}
+_HEADER_VALUES = {
+    "accept": "*/*",
+    "content-type": "application/json",
+    "user-agent": "turbogate-replay",
+}
+
+
+def stub_answer(headers: Mapping[str, str]) -> Tuple[float, int, bytes]:
+    """Delay in seconds, status and body a stub gives for request ``headers``."""
+    latency = float(headers.get(LATENCY_HEADER) or 0) / 1000
+    status = int(headers.get(STATUS_HEADER) or 200)
+    size = int(headers.get(BYTES_HEADER) or 2)
+    # A JSON body of (at least) the recorded size
+    body = b'{"p":"' + b"x" * (size - 8) + b'"}' if size > 8 else b"{}"
+    return latency, status, body
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # One handler per (keep-alive) connection
+        self.server.connections += 1
+
+    def _answer(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        latency, status, body = stub_answer(self.headers)
+        if latency > 0:
+            time.sleep(latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD" and status not in (204, 304):
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _answer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubBackend:
+    """Local upstream that answers as slowly, and as large, as told."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="replay-stub", daemon=True
+        )
+
+    @property
+    def connections(self) -> int:
+        """Connections accepted so far."""
+        return self.server.connections
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBackend":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class H2StubBackend:
+    """:class:`StubBackend` speaking cleartext HTTP/2 with prior knowledge.
+
+    Every stream is answered on its own timer, so many slow requests share
+    one connection the way a multiplexing upstream would serve them.
+    ``max_active`` records the most streams seen in flight at once.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._listener = socket.create_server((host, port))
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self._listener.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "H2StubBackend":
+        thread = threading.Thread(target=self._accept, name="h2-stub", daemon=True)
+        thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._listener.close()
+
+    def _accept(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        lock = threading.Lock()
+        # stream -> body bytes waiting for flow-control window
+        pending: Dict[int, bytes] = {}
+
+        def flush() -> None:
+            for stream_id, data in list(pending.items()):
+                window = min(
+                    conn.local_flow_control_window(stream_id),
+                    conn.max_outbound_frame_size,
+                )
+                while data and window > 0:
+                    conn.send_data(stream_id, data[:window])
+                    data = data[window:]
+                    window = min(
+                        conn.local_flow_control_window(stream_id),
+                        conn.max_outbound_frame_size,
+                    )
+                if data:
+                    pending[stream_id] = data
+                else:
+                    del pending[stream_id]
+                    conn.end_stream(stream_id)
+            sock.sendall(conn.data_to_send())
+
+        def respond(stream_id: int, status: int, body: bytes, head: bool) -> None:
+            with lock:
+                try:
+                    conn.send_headers(
+                        stream_id,
+                        [
+                            (":status", str(status)),
+                            ("content-type", "application/json"),
+                            ("content-length", str(len(body))),
+                        ],
+                    )
+                    # A HEAD answer has the headers of a GET but no body
+                    pending[stream_id] = b"" if head else body
+                    flush()
+                except Exception:
+                    pass
+            with self._count_lock:
+                self.active -= 1
+
+        with lock:
+            conn.initiate_connection()
+            sock.sendall(conn.data_to_send())
+        requests_seen: Dict[int, Dict[str, str]] = {}
+        try:
+            while not self._stopped.is_set():
+                data = sock.recv(65535)
+                if not data:
+                    return
+                with lock:
+                    events = conn.receive_data(data)
+                    for event in events:
+                        if isinstance(event, h2.events.RequestReceived):
+                            requests_seen[event.stream_id] = {
+                                name.title(): value for name, value in event.headers
+                            }
+                        elif isinstance(event, h2.events.DataReceived):
+                            conn.acknowledge_received_data(
+                                event.flow_controlled_length, event.stream_id
+                            )
+                        elif isinstance(event, h2.events.StreamEnded):
+                            headers = requests_seen.pop(event.stream_id, {})
+                            latency, status, body = stub_answer(headers)
+                            with self._count_lock:
+                                self.active += 1
+                                self.max_active = max(self.max_active, self.active)
+                            head = headers.get(":Method") == "HEAD"
+                            timer = threading.Timer(
+                                latency, respond, (event.stream_id, status, body, head)
+                            )
+                            timer.daemon = True
+                            timer.start()
+                    flush()
+        except Exception:
+            return
+        finally:
+            sock.close()
+
+
+def route_prefix(path: str) -> Optional[str]:
+    """First segment of a proxied path, if it was captured verbatim."""
+    if not path.startswith(API_PREFIX):
+        return None
+    segment = path[len(API_PREFIX) :].split("/", 1)[0]
+    if not segment or segment == REDACTED or segment.startswith("_"):
+        return None
+    return segment
+
+
+def gateway_overrides(records: Iterable[Dict[str, Any]], upstream: str) -> Dict:
+    """Gateway config that routes every captured service to ``upstream``.
+
+    Routes are rebuilt from the first path segment, each mapped to the
+    service most requests under it went to; public endpoints likewise.
+    """
+    services: Dict[str, Counter] = defaultdict(Counter)
+    public = set()
+    for record in records:
+        prefix = route_prefix(record.get("p", ""))
+        if prefix is None:
+            continue
+        if record.get("svc"):
+            services[prefix][record["svc"]] += 1
+        if record.get("pub"):
+            public.add(prefix)
+
+    route_mappings = {
+        prefix: counts.most_common(1)[0][0] for prefix, counts in services.items()
+    }
+    return {
+        "services": {
+            name: {"url": upstream, "enabled": True}
+            for name in set(route_mappings.values())
+        },
+        "route_mappings": route_mappings,
+        "public_endpoints": sorted(public),
+    }
+
+
+def build_request(
+    record: Dict[str, Any], base_url: str, token: Optional[str]
+) -> Dict[str, Any]:
+    """``requests`` arguments reproducing a captured request's shape."""
+    path = "/".join(
+        "x1" if segment == REDACTED else segment
+        for segment in record.get("p", "/").split("/")
+    )
+    headers = {
+        name: _HEADER_VALUES.get(name, "x")
+        for name in record.get("h", [])
+        if name not in _SKIPPED_HEADERS and not name.startswith("x-replay-")
+    }
+
+    state = record.get("a", "none")
+    if state == "valid" and token:
+        headers["Authorization"] = f"Bearer {token}"
+    elif state in ("valid", "invalid"):
+        headers["Authorization"] = "Bearer invalid"
+    elif state == "malformed":
+        headers["Authorization"] = "Basic x"
+
+    if record.get("up") is not None:
+        headers[LATENCY_HEADER] = str(record["up"])
+    headers[STATUS_HEADER] = str(record.get("st", 200))
+    if record.get("rs") is not None:
+        headers[BYTES_HEADER] = str(record["rs"])
+
+    size = record.get("rq") or 0
+    return {
+        "method": record.get("m", "GET"),
+        "url": base_url.rstrip("/") + path,
+        "params": {name: "1" for name in record.get("q", [])},
+        "headers": headers,
+        "data": b"x" * size if size else None,
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p90/p99 and max, in the values' unit."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+    return {
+        "p50": round(rank(0.50), 2),
+        "p90": round(rank(0.90), 2),
+        "p99": round(rank(0.99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def replay(
+    records: List[Dict[str, Any]],
+    base_url: str,
+    secret: Optional[str] = None,
+    speed: float = 1.0,
+    concurrency: int = 64,
+) -> Dict[str, Any]:
+    """Send ``records`` open-loop to ``base_url`` and report their latency.
+
+    Latency is measured from each request's scheduled time, so requests that
+    wait for a free worker count that wait instead of hiding it.
+    """
+    records = sorted(records, key=lambda record: record.get("ts", 0))
+    if not records:
+        return {"requests": 0}
+    if secret is None and any(record.get("a") == "valid" for record in records):
+        raise ValueError(
+            "SECRET_KEY is needed to mint tokens for authenticated requests"
+        )
+    token = (
+        jwt.encode(
+            {"user_id": "replay", "role": "user", "exp": int(time.time()) + 86400},
+            secret,
+            algorithm="HS256",
+        )
+        if secret
+        else None
+    )
+
+    local = threading.local()
+    results: List[Dict[str, Any]] = []
+
+    def send(record: Dict[str, Any], due: float) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        status = None
+        try:
+            response = session.request(
+                timeout=30, **build_request(record, base_url, token)
+            )
+            status = response.status_code
+        except requests.RequestException:
+            pass
+        results.append(
+            {
+                "latency": (time.perf_counter() - due) * 1000,
+                "status": status,
+                "expected": record.get("st"),
+                "up": record.get("up"),
+            }
+        )
+
+    base = records[0].get("ts", 0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="replay") as pool:
+        for record in records:
+            due = start + (record.get("ts", base) - base) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, record, due)
+    elapsed = time.perf_counter() - start
+
+    latencies = [result["latency"] for result in results]
+    overheads = [
+        result["latency"] - result["up"]
+        for result in results
+        if result["up"] is not None and result["status"] is not None
+    ]
+    return {
+        "requests": len(results),
+        "seconds": round(elapsed, 3),
+        "rate": round(len(results) / elapsed, 1) if elapsed else None,
+        "errors": sum(result["status"] is None for result in results),
+        "status_mismatches": sum(
+            result["status"] is not None and result["status"] != result["expected"]
+            for result in results
+        ),
+        "latency_ms": percentiles(latencies),
+        "overhead_ms": percentiles(overheads),
+    }
+
+
+def replay_in_process(
+    records: List[Dict[str, Any]],
+    upstream: str,
+    speed: float = 1.0,
+    concurrency: int = 64,
+) -> Dict[str, Any]:
+    """Replay against a gateway built here, with its services on ``upstream``."""
+    from werkzeug.serving import make_server
+
+    from gateway_service.app import create_app
+
+    # Logs go to stderr, leaving stdout to the report
+    with contextlib.redirect_stdout(sys.stderr):
+        app = create_app("test")
+    app.config["LOG_LEVEL"] = "WARNING"
+    app.config["REDIS_ENABLED"] = False
+    app.extensions["access_log"].enabled = False
+    app.extensions["traffic_capture"].enabled = False
+    app.extensions["config_registry"].load(
+        gateway_overrides(records, upstream), source="replay"
+    )
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        return replay(
+            records,
+            f"http://127.0.0.1:{server.server_port}",
+            secret=app.config["SECRET_KEY"],
+            speed=speed,
+            concurrency=concurrency,
+        )
+    finally:
+        server.shutdown()
+        app.extensions["shared_state"].monitor.stop(timeout=1)
@@ -0,0 +1,68 @@
+import json
+from typing import Any, Optional
+
+from flask import Response, g
+
+
+class PreparedError:
+    """A gateway error response whose JSON body is serialized up front.
+
+    Only the request ID (and a per-call message or extra fields, when given)
+    is encoded per response, keeping rejected traffic cheap during floods.
+    Bodies carry the same fields the ``jsonify`` versions did.
+    """
+
+    __slots__ = ("status", "error", "_head", "_static_message")
+
+    def __init__(self, status: int, error: str, message: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self._head = b'{"error":' + json.dumps(error).encode() + b',"message":'
+        self._static_message = json.dumps(message or "").encode()
+
+    def response(self, message: Optional[str] = None, **extra: Any) -> Response:
+        """Build the response for the current request."""
+        body = [
+            self._head,
+            self._static_message if message is None else json.dumps(message).encode(),
+        ]
+        for key, value in extra.items():
+            body.append(b',"%s":%s' % (key.encode(), json.dumps(value).encode()))
+        body.append(
+            b',"request_id":'
+            + json.dumps(getattr(g, "request_id", "unknown")).encode()
+            + b"}\n"
+        )
+        return Response(b"".join(body), status=self.status, mimetype="application/json")
+
+
+SERVICE_NOT_FOUND = PreparedError(404, "Service not found")
+INVALID_FIELDS = PreparedError(400, "Invalid fields")
+MISSING_AUTHORIZATION = PreparedError(
+    401, "Missing authorization", "Authorization header with Bearer token required"
+)
+INVALID_AUTHORIZATION = PreparedError(
+    401, "Invalid authorization", "Authorization header must contain 'Bearer <token>'"
+)
+INVALID_TOKEN = PreparedError(401, "Invalid token", "Token is invalid or expired")
+RATE_LIMIT_EXCEEDED = PreparedError(429, "Rate limit exceeded")
+SERVICE_NOT_AVAILABLE = PreparedError(503, "Service not available")
+SERVICE_UNHEALTHY = PreparedError(503, "Service unhealthy")
+SERVICE_CONNECTION_FAILED = PreparedError(
+    503, "Service connection failed", "Unable to connect to service"
+)
+SERVICE_TIMEOUT = PreparedError(504, "Service timeout", "The request timed out")
+TOO_MANY_STREAMS = PreparedError(
+    503, "Too many streams", "The gateway is at its concurrent stream limit"
+)
+WEBSOCKET_NOT_SUPPORTED = PreparedError(
+    501,
+    "WebSocket not supported",
+    "The server cannot hand over the client connection",
+)
+INVALID_BATCH = PreparedError(400, "Invalid batch")
+AGGREGATION_NOT_FOUND = PreparedError(404, "Aggregation not found")
+INVALID_AGGREGATION = PreparedError(400, "Invalid aggregation request")
+INTERNAL_ERROR = PreparedError(
+    500, "Internal server error", "An unexpected error occurred"
+)
@@ -0,0 +1,141 @@
+import fcntl
+import hashlib
+import mmap
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+# Per slot: sequence, key digest, expiry (epoch seconds), value length
+_SLOT = struct.Struct("<I4x16sdH6x")
+_SEQ = struct.Struct("<I")
+_EMPTY_KEY = bytes(16)
+_READ_RETRIES = 8
+
+
+def _digest(key: str) -> bytes:
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    # The all-zero digest marks a never-used slot
+    return digest if digest != _EMPTY_KEY else b"\x01" + digest[1:]
+
+
+class SharedTable:
+    """Fixed-size key/value slots in memory shared by forked processes.
+
+    The table is an anonymous ``MAP_SHARED`` mapping, so every process forked
+    after it is created (the workers of a preloading gunicorn master) sees
+    the same bytes. Keys hash to a bucket of ``probes`` consecutive slots;
+    a write replaces the key's slot, a free or expired one, or else the one
+    closest to expiry. Slots are never freed, so a lookup stops at the first
+    never-used slot.
+
+    Each slot is a seqlock: writers make the sequence odd, write, then make
+    it even again, and readers retry when the sequence was odd or changed
+    under them. Reads are plain memory loads with no locks or syscalls.
+    Writes are serialized across processes with ``lockf`` on a private
+    temporary file, which the kernel releases if a writer dies.
+    """
+
+    def __init__(self, slots: int, value_size: int, probes: int = 8):
+        self.slots = max(slots, 1)
+        self.value_size = value_size
+        self.probes = min(probes, self.slots)
+        self.slot_size = -(-(_SLOT.size + value_size) // 8) * 8
+        self._map = mmap.mmap(-1, self.slots * self.slot_size)
+        self._lock_file = tempfile.TemporaryFile()
+        self._thread_lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._map)
+
+    def _bucket(self, digest: bytes) -> Iterator[int]:
+        first = int.from_bytes(digest[:8], "little") % self.slots
+        for index in range(self.probes):
+            yield ((first + index) % self.slots) * self.slot_size
+
+    def _read(self, offset: int):
+        """``(key, expires, value)`` of a slot, or None if it kept changing."""
+        buffer = self._map
+        for _ in range(_READ_RETRIES):
+            seq, key, expires, length = _SLOT.unpack_from(buffer, offset)
+            if seq & 1:
+                continue
+            start = offset + _SLOT.size
+            value = buffer[start : start + length]
+            if _SEQ.unpack_from(buffer, offset)[0] == seq:
+                return key, expires, value
+        return None
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[bytes]:
+        """The unexpired value stored for ``key``, if any."""
+        digest = _digest(key)
+        now = time.time() if now is None else now
+        for offset in self._bucket(digest):
+            slot = self._read(offset)
+            if slot is None:
+                # A writer is stuck mid-update; treat as a miss
+                continue
+            slot_key, expires, value = slot
+            if slot_key == _EMPTY_KEY:
+                return None
+            if slot_key == digest:
+                return value if expires > now else None
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store ``value`` for ``ttl`` seconds; False if it does not fit."""
+        return self.update(key, lambda current: value, ttl)
+
+    def update(
+        self,
+        key: str,
+        compute: Callable[[Optional[bytes]], Optional[bytes]],
+        ttl: float,
+    ) -> bool:
+        """Atomically replace ``key``'s value with ``compute(current)``.
+
+        ``compute`` runs under the write lock and may return None to leave
+        the slot untouched.
+        """
+        digest = _digest(key)
+        with self._thread_lock:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                target, current = self._find_slot(digest, now)
+                value = compute(current)
+                if value is None or len(value) > self.value_size:
+                    return False
+                self._write(target, digest, now + ttl, value)
+                return True
+            finally:
+                fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+
+    def _find_slot(self, digest: bytes, now: float):
+        # The key's own slot, a never-used one, or else the one evicted:
+        # closest to (or longest past) expiry
+        victim, victim_expires = None, float("inf")
+        for offset in self._bucket(digest):
+            _, slot_key, expires, length = _SLOT.unpack_from(self._map, offset)
+            if slot_key == digest:
+                start = offset + _SLOT.size
+                current = self._map[start : start + length] if expires > now else None
+                return offset, current
+            if slot_key == _EMPTY_KEY:
+                return offset, None
+            if expires < victim_expires:
+                victim, victim_expires = offset, expires
+        return victim, None
+
+    def _write(self, offset: int, digest: bytes, expires: float, value: bytes) -> None:
+        buffer = self._map
+        seq = _SEQ.unpack_from(buffer, offset)[0]
+        # An odd sequence means a writer died mid-update; just take over
+        seq = seq if seq & 1 else (seq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(buffer, offset, seq)
+        _SLOT.pack_into(buffer, offset, seq, digest, expires, len(value))
+        start = offset + _SLOT.size
+        buffer[start : start + len(value)] = value
+        _SEQ.pack_into(buffer, offset, (seq + 1) & 0xFFFFFFFF)
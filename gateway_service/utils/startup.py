@@ -0,0 +1,97 @@
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Builds the app in a fresh interpreter and prints how long each phase took
+_PROBE = (
+    "import time; started = time.perf_counter(); "
+    "from gateway_service.app import create_app; imported = time.perf_counter(); "
+    "create_app(); print(imported - started, time.perf_counter() - imported)"
+)
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """``(module, self_us, cumulative_us, depth)`` from ``-X importtime`` output."""
+    modules = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def measure_startup(config_name: Optional[str] = None) -> Dict[str, Any]:
+    """Import and app-build time of the gateway, measured in a fresh process."""
+    env = dict(os.environ)
+    if config_name:
+        env["FLASK_ENV"] = config_name
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    import_seconds, build_seconds = map(float, result.stdout.split()[-2:])
+    modules = parse_importtime(result.stderr)
+
+    # Third-party and gateway packages directly imported by the gateway
+    top_level: Dict[str, int] = {}
+    for name, _, cumulative_us, _ in modules:
+        package = name.split(".")[0]
+        top_level[package] = max(top_level.get(package, 0), cumulative_us)
+
+    return {
+        "import_seconds": import_seconds,
+        "create_app_seconds": build_seconds,
+        "modules": len(modules),
+        "packages": sorted(top_level.items(), key=lambda item: -item[1]),
+    }
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """RSS, PSS and shared/private bytes of a process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    fields = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            fields[key] = int(parts[0]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of ``pid``, e.g. the workers of a gunicorn master."""
+    children = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after its ")"
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
@@ -4,18 +4,31 @@ import sys
 import time
 import uuid
 from functools import wraps
-from typing import Optional
+from typing import Optional, Type
 
 import redis
 import structlog
-from flask import current_app, g
+from flask import current_app, g, request
+
+from gateway_service.utils.autopipeline import AutoPipelineRedis
+
+# Log level structlog/logging were last configured with in this process
+_configured_level: Optional[int] = None
 
 
 def setup_logging() -> structlog.stdlib.BoundLogger:
-    """Set up structured logging."""
+    """Set up structured logging.
+
+    Configuration only runs when the level changes, so calling this on the
+    request path just returns a logger.
+    """
+    global _configured_level
     log_level = getattr(logging, current_app.config.get("LOG_LEVEL", "INFO"))
+    if log_level == _configured_level:
+        return structlog.get_logger()
 
     logging.basicConfig(format="%(message)s", stream=sys.stdout, level=log_level)
+    logging.getLogger().setLevel(log_level)
 
     structlog.configure(
         processors=[
@@ -33,10 +46,47 @@ def setup_logging() -> structlog.stdlib.BoundLogger:
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
+    _configured_level = log_level
 
     return structlog.get_logger()
 
 
+def create_redis_client(
+    redis_url: str, client_class: Type[redis.Redis] = redis.Redis
+) -> redis.Redis:
+    """Create a Redis client, picking up the password file if configured."""
+    # Try to read Redis password from file if available
+    redis_password_file = os.environ.get("REDIS_PASSWORD_FILE")
+    if redis_password_file and os.path.exists(redis_password_file):
+        try:
+            with open(redis_password_file, 'r') as f:
+                redis_password = f.read().strip()
+            # Update Redis URL with password
+            if redis_password and "redis://" in redis_url and "@" not in redis_url:
+                redis_url = redis_url.replace("redis://", f"redis://:{redis_password}@")
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                f"Could not read Redis password from file: {e}"
+            )
+
+    return client_class.from_url(redis_url)
+
+
+def shared_redis_client() -> redis.Redis:
+    """The worker's Redis client; its connection pool outlives requests."""
+    client = current_app.extensions.get("redis_client")
+    if client is None:
+        config = current_app.config
+        if config.get("REDIS_AUTO_PIPELINE", True):
+            client = create_redis_client(config["REDIS_URL"], AutoPipelineRedis)
+            client.pipeline_window = config.get("REDIS_PIPELINE_WINDOW", 0.0)
+            client.pipeline_max_batch = config.get("REDIS_PIPELINE_MAX_BATCH", 100)
+        else:
+            client = create_redis_client(config["REDIS_URL"])
+        current_app.extensions["redis_client"] = client
+    return client
+
+
 def get_redis_client() -> Optional[redis.Redis]:
     """Get Redis client instance."""
     if not current_app.config.get("REDIS_ENABLED", True):
@@ -44,24 +94,8 @@ def get_redis_client() -> Optional[redis.Redis]:
 
     if not hasattr(g, "redis_client"):
         try:
-            # Get Redis URL and password
-            redis_url = current_app.config["REDIS_URL"]
-            
-            # Try to read Redis password from file if available
-            redis_password = None
-            redis_password_file = os.environ.get("REDIS_PASSWORD_FILE")
-            if redis_password_file and os.path.exists(redis_password_file):
-                try:
-                    with open(redis_password_file, 'r') as f:
-                        redis_password = f.read().strip()
-                    # Update Redis URL with password
-                    if redis_password and "redis://" in redis_url and "@" not in redis_url:
-                        redis_url = redis_url.replace("redis://", f"redis://:{redis_password}@")
-                except Exception as e:
-                    current_app.logger.warning(f"Could not read Redis password from file: {e}")
-            
-            g.redis_client = redis.from_url(redis_url)
-            # Test connection
+            g.redis_client = shared_redis_client()
+            # Test connection (pipelined with other requests' commands)
             g.redis_client.ping()
         except Exception as e:
             current_app.logger.error(f"Redis connection failed: {e}")
@@ -69,6 +103,22 @@ def get_redis_client() -> Optional[redis.Redis]:
     return g.redis_client
 
 
+def get_client_ip() -> str:
+    """Client address, honouring X-Forwarded-For only from trusted proxies."""
+    trusted = current_app.config.get("TRUSTED_PROXY_COUNT", 0)
+    if trusted > 0:
+        forwarded = [
+            hop.strip()
+            for hop in request.headers.get("X-Forwarded-For", "").split(",")
+            if hop.strip()
+        ]
+        # Each trusted proxy appends the address it received the request from;
+        # anything further left was supplied by the client and may be forged
+        if len(forwarded) >= trusted:
+            return forwarded[-trusted]
+    return request.remote_addr or "unknown"
+
+
 def generate_request_id() -> str:
     """Generate unique request ID."""
     return str(uuid.uuid4())
@@ -0,0 +1,72 @@
+"""Benchmark of HTTP/1.1 pooled vs HTTP/2 multiplexed upstream connections.
+
+Sends the same burst of concurrent requests to a local HTTP/1.1 stub through
+a keep-alive pool sized like ``SERVICE_POOL_SIZE`` and to a local h2c stub
+through :class:`HTTP2Adapter`, then reports wall time, latency percentiles
+and how many upstream connections each transport opened.
+
+    python -m scripts.bench_http2_upstream [requests] [concurrency]
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gateway_service.service import HTTP2_AVAILABLE
+from gateway_service.service.config_registry import ServicePools
+from gateway_service.utils.replay import (
+    BYTES_HEADER,
+    LATENCY_HEADER,
+    H2StubBackend,
+    StubBackend,
+    percentiles,
+)
+
+# A typical slow-ish JSON upstream
+UPSTREAM_HEADERS = {LATENCY_HEADER: "20", BYTES_HEADER: "4096"}
+
+
+def run(label, session, stub, total, concurrency):
+    def fetch(_):
+        start = time.perf_counter()
+        response = session.get(f"{stub.url}/bench", headers=UPSTREAM_HEADERS)
+        response.content
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = list(executor.map(fetch, range(total)))
+    seconds = time.perf_counter() - start
+
+    values = percentiles(latencies)
+    print(
+        f"  {label:<22} {seconds:6.2f} s  {total / seconds:8.0f} req/s  "
+        f"p50 {values['p50']:7.2f} ms  p99 {values['p99']:7.2f} ms  "
+        f"{stub.connections:4d} connections"
+    )
+
+
+def main():
+    """Run the benchmark and print per-transport results."""
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    if not HTTP2_AVAILABLE:
+        sys.exit("HTTP/2 needs httpx[http2]: pip install 'httpx[http2]'")
+
+    print(f"{total} requests, {concurrency} in flight")
+    pools = ServicePools(pool_size=10)
+    for label, stub, http2 in [
+        ("HTTP/1.1 pool", StubBackend(), False),
+        ("HTTP/2 multiplexed", H2StubBackend(), True),
+    ]:
+        stub.start()
+        session = pools.session_for(label, stub.url, http2=http2)
+        try:
+            run(label, session, stub, total, concurrency)
+        finally:
+            session.close()
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Microbenchmark of per-request header and JSON handling in the proxy path.
+
+Compares the previous implementations (dict copy of the client headers,
+a ``Response`` filled by six header lookups, stdlib ``jsonify``) with the
+environ header pipeline, a ``Response`` built from a header list, and the
+orjson-backed JSON provider.
+
+    python -m scripts.bench_proxy_overhead [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+from flask import Response, jsonify
+from flask.json.provider import DefaultJSONProvider
+from requests.structures import CaseInsensitiveDict
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
+
+from gateway_service.app import create_app  # noqa: E402
+from gateway_service.utils.headers import (  # noqa: E402
+    forward_environ_headers,
+    response_headers,
+)
+
+CLIENT_HEADERS = {
+    "Host": "gateway.example",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Language": "en-GB,en;q=0.9",
+    "Authorization": "Bearer " + "x" * 180,
+    "Connection": "keep-alive",
+    "Keep-Alive": "timeout=5",
+    "Content-Type": "application/json",
+    "Cookie": "session=" + "y" * 64,
+    "X-Forwarded-For": "203.0.113.9",
+}
+
+UPSTREAM_HEADERS = CaseInsensitiveDict(
+    {
+        "Content-Type": "application/json",
+        "Content-Length": "512",
+        "Cache-Control": "no-cache",
+        "ETag": '"abc123"',
+        "Date": "Mon, 19 Oct 2026 12:00:00 GMT",
+        "Server": "gunicorn",
+        "Connection": "keep-alive",
+        "X-Request-ID": "9b1c",
+    }
+)
+
+PAYLOAD = {
+    "error": "Service not found",
+    "message": "No service configured for endpoint: jobs/123",
+    "request_id": "1f0e8b8e-8a4b-4c2e-9d35-2f1d2d9c1a77",
+    "items": [
+        {"id": index, "name": f"item-{index}", "ok": True} for index in range(20)
+    ],
+}
+
+
+def baseline_forward(headers):
+    copied = dict(headers)
+    copied.pop("Host", None)
+    return copied
+
+
+def baseline_response(upstream):
+    response = Response(b"", content_type=upstream.get("content-type"))
+    for header in [
+        "Content-Type",
+        "Content-Length",
+        "Cache-Control",
+        "ETag",
+        "Last-Modified",
+        "X-Request-ID",
+    ]:
+        if header in upstream:
+            response.headers[header] = upstream[header]
+    return response
+
+
+def pipeline_response(upstream):
+    return Response(b"", headers=response_headers(upstream))
+
+
+def run(label, func, iterations):
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5))
+    micros = seconds / iterations * 1e6
+    print(f"  {label:<28} {micros:8.2f} us")
+    return micros
+
+
+def main():
+    """Run the benchmark and print per-call timings."""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app = create_app("test")
+    # Debug mode pretty-prints JSON, which no deployment serves
+    app.debug = False
+
+    with app.test_request_context("/api/v1/jobs/123", headers=CLIENT_HEADERS):
+        from flask import request
+
+        print(f"Per-call cost over {iterations} iterations (best of 5)")
+
+        print("Request headers")
+        before = run(
+            "dict copy + pop Host",
+            lambda: baseline_forward(request.headers),
+            iterations,
+        )
+        after = run(
+            "environ pipeline",
+            lambda: forward_environ_headers(request.environ),
+            iterations,
+        )
+        saved = before - after
+
+        print("Response headers")
+        before = run(
+            "six lookups + sets",
+            lambda: baseline_response(UPSTREAM_HEADERS),
+            iterations,
+        )
+        after = run(
+            "allow-set header list",
+            lambda: pipeline_response(UPSTREAM_HEADERS),
+            iterations,
+        )
+        saved += before - after
+
+        print("JSON responses")
+        fast_provider = app.json
+        app.json = DefaultJSONProvider(app)
+        before = run("stdlib jsonify", lambda: jsonify(PAYLOAD), iterations)
+        app.json = fast_provider
+        after = run(
+            f"{type(fast_provider).__name__} jsonify",
+            lambda: jsonify(PAYLOAD),
+            iterations,
+        )
+        saved += before - after
+
+    print(f"\nEstimated saving per proxied request: {saved:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
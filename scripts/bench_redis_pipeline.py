@@ -0,0 +1,69 @@
+"""Benchmark of plain vs automatically pipelined Redis commands.
+
+Concurrent callers (greenlets when gevent is installed, as in the gunicorn
+workers, threads otherwise) each issue INCRs through one shared client, the
+way a worker's requests do. Reports throughput, per-command latency and how
+many connections each client opened. Needs a Redis server at REDIS_URL
+(default: database 15 on localhost).
+
+    python -m scripts.bench_redis_pipeline [commands] [concurrency]
+"""
+
+try:
+    from gevent import monkey
+
+    monkey.patch_all()
+except ImportError:  # pragma: no cover - optional dependency
+    monkey = None
+
+import os  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor  # noqa: E402
+
+import redis  # noqa: E402
+
+from gateway_service.utils.autopipeline import AutoPipelineRedis  # noqa: E402
+from gateway_service.utils.replay import percentiles  # noqa: E402
+
+KEY = "turbogate:bench:pipeline"
+
+
+def run(label, client, total, concurrency):
+    def incr(_):
+        start = time.perf_counter()
+        client.incr(KEY)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = list(executor.map(incr, range(total)))
+    seconds = time.perf_counter() - start
+
+    values = percentiles(latencies)
+    connections = len(client.connection_pool._available_connections)
+    print(
+        f"  {label:<16} {total / seconds:9.0f} cmd/s  "
+        f"p50 {values['p50']:6.2f} ms  p99 {values['p99']:6.2f} ms  "
+        f"{connections:4d} connections"
+    )
+    client.delete(KEY)
+    client.close()
+
+
+def main():
+    """Run the benchmark and print per-client results."""
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    url = os.environ.get("REDIS_URL", "redis://localhost:6379/15")
+
+    print(
+        f"{total} INCRs, {concurrency} concurrent callers "
+        f"({'greenlets' if monkey else 'threads'})"
+    )
+    run("plain", redis.Redis.from_url(url), total, concurrency)
+    run("auto-pipelined", AutoPipelineRedis.from_url(url), total, concurrency)
+
+
+if __name__ == "__main__":
+    main()
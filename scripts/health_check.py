@@ -1,16 +1,33 @@
-"""Health check script."""
+"""Health check script.
 
+One pass over a single gateway by default. ``--watch`` instead probes every
+``--target`` x ``--endpoint`` pair concurrently each ``--interval`` seconds
+over pooled keep-alive connections, and keeps rolling latency percentiles
+and error rates per probe:
+
+    python -m scripts.health_check --watch --interval 2 \
+        --target http://gw-1:5000 --target http://gw-2:5000 [--json]
+"""
+
+import argparse
 import json
 import sys
-from typing import Any, Dict
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
+DEFAULT_TARGET = "http://localhost:5000"
+DEFAULT_ENDPOINTS = ["/gateway/health", "/gateway/health/services"]
 
-def check_gateway_health() -> Dict[str, Any]:
+
+def check_gateway_health(base_url: str = DEFAULT_TARGET) -> Dict[str, Any]:
     """Check gateway health."""
     try:
-        response = requests.get("http://localhost:5000/gateway/health", timeout=5)
+        response = requests.get(f"{base_url}/gateway/health", timeout=5)
         return {
             "status": "healthy" if response.status_code == 200 else "unhealthy",
             "status_code": response.status_code,
@@ -21,12 +38,10 @@ def check_gateway_health() -> Dict[str, Any]:
         return {"status": "error", "status_code": None, "data": None, "error": str(e)}
 
 
-def check_services_health() -> Dict[str, Any]:
+def check_services_health(base_url: str = DEFAULT_TARGET) -> Dict[str, Any]:
     """Check all services health."""
     try:
-        response = requests.get(
-            "http://localhost:5000/gateway/health/services", timeout=10
-        )
+        response = requests.get(f"{base_url}/gateway/health/services", timeout=10)
         return {
             "status": "healthy" if response.status_code == 200 else "unhealthy",
             "status_code": response.status_code,
@@ -37,13 +52,178 @@ def check_services_health() -> Dict[str, Any]:
         return {"status": "error", "status_code": None, "data": None, "error": str(e)}
 
 
-def main():
+class ProbeStats:
+    """Rolling latency and error rate of one URL over its last probes."""
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.failures: Deque[bool] = deque(maxlen=window)
+        self.last_status: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def add(self, latency_ms: float, status: Optional[int], error: Optional[str]):
+        failed = error is not None or status is None or status >= 500
+        self.failures.append(failed)
+        if not failed:
+            self.latencies.append(latency_ms)
+        self.last_status, self.last_error = status, error
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile of successful probes, in ms."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+    def summary(self) -> Dict[str, Any]:
+        samples = len(self.failures)
+        return {
+            "samples": samples,
+            "error_rate": round(sum(self.failures) / samples, 4) if samples else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "status": self.last_status,
+            "error": self.last_error,
+        }
+
+
+class Watcher:
+    """Probes a fleet of gateways at a fixed interval, all URLs in parallel."""
+
+    def __init__(
+        self,
+        targets: List[str],
+        endpoints: List[str],
+        window: int = 120,
+        timeout: float = 5.0,
+        concurrency: int = 32,
+    ):
+        self.urls = [
+            f"{target.rstrip('/')}/{endpoint.lstrip('/')}"
+            for target in targets
+            for endpoint in endpoints
+        ]
+        self.timeout = timeout
+        self.stats = {url: ProbeStats(window) for url in self.urls}
+        workers = max(1, min(concurrency, len(self.urls)))
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="health-watch")
+        # One keep-alive connection per worker and gateway
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(targets), pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _probe(self, url: str) -> Tuple[float, Optional[int], Optional[str]]:
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            # Read the body, so the connection goes back to the pool
+            response.content
+            return (time.perf_counter() - started) * 1000, response.status_code, None
+        except requests.RequestException as e:
+            return (time.perf_counter() - started) * 1000, None, type(e).__name__
+
+    def tick(self) -> Dict[str, Dict[str, Any]]:
+        """Probe every URL once, concurrently, and return the rolling stats."""
+        for url, result in zip(self.urls, self._pool.map(self._probe, self.urls)):
+            self.stats[url].add(*result)
+        return {url: stats.summary() for url, stats in self.stats.items()}
+
+    def run(self, interval: float, as_json: bool, count: Optional[int] = None):
+        """Tick every ``interval`` seconds (fixed rate) until interrupted."""
+        started = time.monotonic()
+        ticks = 0
+        while count is None or ticks < count:
+            summary = self.tick()
+            ticks += 1
+            if as_json:
+                for url, stats in summary.items():
+                    print(
+                        json.dumps({"ts": round(time.time(), 3), "url": url, **stats})
+                    )
+                sys.stdout.flush()
+            else:
+                print_table(summary, clear=sys.stdout.isatty())
+            delay = started + ticks * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+
+def print_table(summary: Dict[str, Dict[str, Any]], clear: bool = False):
+    """Compact live table of the rolling stats."""
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:8.1f}" if value is not None else "       -"
+
+    width = max(len(url) for url in summary)
+    if clear:
+        print("\033[H\033[2J", end="")
+    print(
+        f"{time.strftime('%H:%M:%S'):<{width}} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8}  err%  last"
+    )
+    for url, stats in summary.items():
+        error_rate = (stats["error_rate"] or 0) * 100
+        print(
+            f"{url:<{width}} {ms(stats['p50_ms'])} {ms(stats['p95_ms'])} "
+            f"{ms(stats['p99_ms'])} {error_rate:5.1f} {stats['error'] or stats['status']}"
+        )
+    sys.stdout.flush()
+
+
+def watch(args: argparse.Namespace):
+    """Run the watch mode until interrupted."""
+    watcher = Watcher(
+        args.target or [DEFAULT_TARGET],
+        args.endpoint or DEFAULT_ENDPOINTS,
+        window=args.window,
+        timeout=args.timeout,
+        concurrency=args.concurrency,
+    )
+    try:
+        watcher.run(args.interval, args.json, args.count)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TurboGate health check")
+    parser.add_argument(
+        "--target", action="append", help=f"Gateway base URL (default {DEFAULT_TARGET})"
+    )
+    parser.add_argument(
+        "--endpoint", action="append", help="Path to probe in watch mode (repeatable)"
+    )
+    parser.add_argument("--watch", action="store_true", help="Probe continuously")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds per round")
+    parser.add_argument("--window", type=int, default=120, help="Probes kept per URL")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Probe timeout")
+    parser.add_argument("--concurrency", type=int, default=32, help="Parallel probes")
+    parser.add_argument("--count", type=int, help="Stop after N rounds")
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main health check function."""
+    args = parse_args(argv)
+    if args.watch:
+        watch(args)
+        return
+    base_url = (args.target or [DEFAULT_TARGET])[0].rstrip("/")
+
     print("🏎️ TurboGate Health Check")
     print("=" * 50)
 
     # Check gateway health
-    gateway_health = check_gateway_health()
+    gateway_health = check_gateway_health(base_url)
     print(f"Gateway Status: {gateway_health['status'].upper()}")
 
     if gateway_health["status"] == "healthy":
@@ -59,7 +239,7 @@ def main():
 
     # Check services health
     print("\nServices Health:")
-    services_health = check_services_health()
+    services_health = check_services_health(base_url)
 
     if services_health["status"] == "healthy" and services_health["data"]:
         services = services_health["data"].get("services", {})
@@ -11,7 +11,9 @@ def app():
     app = create_app("test")
     app.config["TEST"] = True
     app.config["REDIS_ENABLED"] = False  # Disable Redis for tests
-    return app
+    yield app
+    # Started by warmup; must not keep probing after the test
+    app.extensions["shared_state"].monitor.stop(timeout=1)
 
 
 @pytest.fixture
@@ -24,3 +26,13 @@ def client(app):
 def runner(app):
     """Create test CLI runner."""
     return app.test_cli_runner()
+
+
+@pytest.fixture
+def load_config(app):
+    """Activate gateway config overrides (services, route_mappings, ...)."""
+
+    def load(**overrides):
+        return app.extensions["config_registry"].load(overrides)
+
+    return load
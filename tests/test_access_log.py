@@ -0,0 +1,87 @@
+"""Test sampled, batched access logging."""
+
+import io
+import json
+from unittest.mock import patch
+
+import structlog
+
+from gateway_service.middleware import request_middleware
+from gateway_service.utils import setup_logging
+from gateway_service.utils.access_log import AccessLog
+
+
+def test_one_access_record_per_request(app, client):
+    """Test a proxied request produces a single access record."""
+    stream = io.StringIO()
+    access_log = app.extensions["access_log"]
+    access_log.stream = stream
+
+    response = client.get("/api/v1/unknown-endpoint", headers={"User-Agent": "t"})
+    access_log.flush()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) == 1
+    assert records[0]["status"] == 404
+    assert records[0]["path"] == "/api/v1/unknown-endpoint"
+    assert records[0]["request_id"] == response.get_json()["request_id"]
+    assert records[0]["sample_rate"] == 1.0
+
+
+def test_tuple_responses_record_their_status(app):
+    """Test a view's (body, status) tuple is logged with its real status."""
+    stream = io.StringIO()
+    access_log = app.extensions["access_log"]
+    access_log.stream = stream
+
+    @app.route("/tuple")
+    @request_middleware()
+    def tuple_view():
+        return {"error": "Bad request"}, 400
+
+    response = app.test_client().get("/tuple")
+    access_log.flush()
+
+    assert response.status_code == 400
+    assert json.loads(stream.getvalue())["status"] == 400
+
+
+def test_sampling_keeps_errors_and_slow_requests():
+    """Test successes are sampled while errors and slow requests are kept."""
+    access_log = AccessLog(
+        {"ACCESS_LOG_SAMPLE_RATE": 0.0, "ACCESS_LOG_SLOW_MS": 500},
+        stream=io.StringIO(),
+    )
+
+    assert not access_log.record(200, 0.01, path="/fast")
+    assert access_log.record(503, 0.01, path="/error")
+    assert access_log.record(200, 0.75, path="/slow")
+    assert access_log.record(404, 0.01, path="/missing")
+
+    assert access_log.flush() == 3
+    lines = [json.loads(line) for line in access_log.stream.getvalue().splitlines()]
+    assert [line["path"] for line in lines] == ["/error", "/slow", "/missing"]
+    assert lines[1]["slow"] is True
+    assert access_log.stats()["sampled_out"] == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test records beyond the queue size are counted as dropped."""
+    access_log = AccessLog({"ACCESS_LOG_QUEUE_SIZE": 2}, stream=io.StringIO())
+    access_log._writer.ensure_running = lambda: None
+
+    for _ in range(5):
+        access_log.record(200, 0.01)
+
+    assert access_log.stats()["dropped"] == 3
+    assert access_log.flush() == 2
+
+
+def test_setup_logging_configures_once(app):
+    """Test the request path does not reconfigure structlog every call."""
+    with app.app_context():
+        setup_logging()
+        with patch.object(structlog, "configure") as configure:
+            setup_logging()
+            setup_logging()
+    configure.assert_not_called()
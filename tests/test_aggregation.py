@@ -0,0 +1,98 @@
+"""Test aggregation routes."""
+
+import json
+from datetime import timedelta
+
+import pytest
+
+from gateway_service.service import AggregationError, compile_aggregation_routes
+
+ROUTES = {
+    "screens/job": {
+        "merge": "nest",
+        "legs": [
+            {"name": "job", "path": "jobs/{job_id}", "timeout": 2, "required": True},
+            {"name": "partner", "path": "partners/{partner_id}", "timeout": 2},
+        ],
+    }
+}
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self._payload = payload if payload is not None else {}
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def aggregation_app(app, load_config):
+    """App with jobs/partners enabled and a screen aggregation configured."""
+    load_config(
+        services={
+            "jobs": {"url": "http://jobs.local", "enabled": True},
+            "partners": {"url": "http://partners.local", "enabled": True},
+        },
+        route_mappings={"jobs": "jobs", "partners": "partners"},
+        public_endpoints=["jobs", "partners"],
+        aggregation_routes=ROUTES,
+    )
+    return app
+
+
+def test_compile_rejects_unknown_merge():
+    """Test invalid merge strategies fail at startup."""
+    with pytest.raises(AggregationError):
+        compile_aggregation_routes(
+            {"bad": {"merge": "zip", "legs": [{"name": "a", "path": "jobs"}]}}
+        )
+
+
+def test_build_subrequests_quotes_params():
+    """Test placeholder values cannot escape their path segment."""
+    route = compile_aggregation_routes(ROUTES)["screens/job"]
+    subs = route.build_subrequests({"job_id": "../auth", "partner_id": "3"})
+    assert subs[0].path == "jobs/..%2Fauth"
+
+    with pytest.raises(AggregationError):
+        route.build_subrequests({"job_id": "1"})
+
+
+def test_aggregate_returns_partial_results(aggregation_app, client, monkeypatch):
+    """Test a failed optional leg yields a partial 200 response."""
+
+    def fake_request(self, method, url, **kwargs):
+        if url.startswith("http://partners.local/partners"):
+            return FakeResponse(500, {"error": "boom"})
+        return FakeResponse(200, {"url": url})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get("/api/v1/_aggregate/screens/job?job_id=1&partner_id=2")
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data["partial"] is True
+    assert data["data"]["job"]["url"] == "http://jobs.local/jobs/1"
+    assert data["errors"]["partner"]["status"] == 500
+
+
+def test_aggregate_required_leg_failure(aggregation_app, client, monkeypatch):
+    """Test a failed required leg fails the whole response."""
+
+    def fake_request(self, method, url, **kwargs):
+        if url.startswith("http://jobs.local/jobs"):
+            return FakeResponse(404)
+        return FakeResponse(200)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get("/api/v1/_aggregate/screens/job?job_id=1&partner_id=2")
+    assert response.status_code == 502
@@ -0,0 +1,110 @@
+"""Test automatic pipelining of concurrent Redis commands."""
+
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import redis
+
+from gateway_service.utils import get_redis_client
+from gateway_service.utils.autopipeline import AutoPipelineRedis
+
+
+def parse_commands(buffer):
+    """Complete RESP commands at the start of ``buffer``, and the rest."""
+    commands = []
+    while buffer.startswith(b"*"):
+        lines = buffer.split(b"\r\n")
+        if len(lines) < 2:
+            break
+        count = int(lines[0][1:])
+        if len(lines) < 2 + count * 2:
+            break
+        args = lines[2 : 2 + count * 2 : 2]
+        consumed = sum(len(line) + 2 for line in lines[: 1 + count * 2])
+        commands.append([arg.decode() for arg in args])
+        buffer = buffer[consumed:]
+    return commands, buffer
+
+
+class FakeRedisHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        buffer = b""
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            commands, buffer = parse_commands(buffer + data)
+            if commands:
+                self.server.writes.append(len(commands))
+                self.request.sendall(b"".join(map(self.answer, commands)))
+
+    def answer(self, command):
+        name, args = command[0].upper(), command[1:]
+        store = self.server.store
+        if name == "HELLO":
+            return b"%%1\r\n+proto\r\n:%d\r\n" % int(args[0])
+        if name == "CLIENT":
+            return b"+OK\r\n"
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "INCRBY":
+            store[args[0]] = int(store.get(args[0], 0)) + int(args[1])
+            return b":%d\r\n" % store[args[0]]
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def fake_redis():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.connections, server.writes, server.store = 0, [], {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = "redis://%s:%d/0" % server.server_address
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_commands_share_pipelines(fake_redis):
+    """Test concurrent callers' commands go out together and get their results."""
+    client = AutoPipelineRedis.from_url(fake_redis.url)
+    client.pipeline_window = 0.005
+    client.ping()
+    writes = len(fake_redis.writes)
+
+    with ThreadPoolExecutor(20) as executor:
+        results = list(executor.map(lambda _: client.incr("hits"), range(40)))
+
+    assert sorted(results) == list(range(1, 41))
+    assert len(fake_redis.writes) - writes < 40
+    assert client.largest_batch > 1
+    assert fake_redis.connections == 1
+    client.close()
+
+
+def test_errors_reach_only_their_caller(fake_redis):
+    """Test a failing command raises for its caller and not for the batch."""
+    client = AutoPipelineRedis.from_url(fake_redis.url)
+
+    with pytest.raises(redis.ResponseError):
+        client.execute_command("BOGUS")
+    assert client.ping() is True
+    assert client.pipeline_stats()["commands"] >= 2
+    client.close()
+
+
+def test_requests_share_one_client(app, fake_redis):
+    """Test get_redis_client reuses the worker's pipelined client."""
+    app.config.update(REDIS_ENABLED=True, REDIS_URL=fake_redis.url)
+    clients = []
+    for _ in range(2):
+        with app.test_request_context("/gateway/health"):
+            clients.append(get_redis_client())
+
+    assert isinstance(clients[0], AutoPipelineRedis)
+    assert clients[0] is clients[1]
+    assert fake_redis.connections == 1
+    app.extensions.pop("redis_client").close()
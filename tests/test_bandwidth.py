@@ -0,0 +1,153 @@
+"""Test per-client bandwidth shaping of proxied bodies."""
+
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from gateway_service.service import BandwidthShaper, ConfigValidationError, bandwidth
+from gateway_service.service.bandwidth import BandwidthPolicy, parse_size
+
+KIB = 1024
+BODY = b"x" * (256 * KIB)
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.elapsed = timedelta(0)
+        self.headers = CaseInsensitiveDict({"Content-Type": "application/octet-stream"})
+        self._body = body
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), 8192):
+            yield self._body[i : i + 8192]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the shaper asked for, instead of sleeping through them."""
+    delays = []
+    monkeypatch.setattr(
+        bandwidth, "time", SimpleNamespace(time=time.time, sleep=delays.append)
+    )
+    return delays
+
+
+@pytest.fixture
+def files(load_config, monkeypatch):
+    """Public route shaped to 64 KiB/s each way; returns the uploaded bodies."""
+    load_config(
+        services={"files": {"url": "http://files.local", "enabled": True}},
+        route_mappings={"files": "files"},
+        public_endpoints=["files"],
+        route_policies={
+            "files": {
+                "bandwidth": {
+                    "class": "bulk",
+                    "download": "64KB/s",
+                    "upload": "64KB/s",
+                    "key": "ip",
+                }
+            }
+        },
+    )
+    uploads = []
+
+    def fake_request(self, method, url, data=None, **kwargs):
+        if not url.endswith("/health"):
+            uploads.append(data)
+        return FakeResponse(BODY)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    return uploads
+
+
+def test_bandwidth_policy():
+    """Test rates, bursts and keys are validated."""
+    assert parse_size("2MB/s") == 2 * 1024 * 1024
+    assert parse_size("512 KB") == 512 * KIB
+    assert parse_size(1000) == 1000
+
+    policy = BandwidthPolicy.from_spec("documents", {"download": "1MB/s"})
+    assert policy.name == "documents"
+    assert policy.rate("download") == 1024 * 1024
+    assert policy.rate("upload") is None
+
+    for spec in [{}, {"download": "fast"}, {"upload": "1MB/s", "key": "session"}]:
+        with pytest.raises(ValueError):
+            BandwidthPolicy.from_spec("documents", spec)
+
+
+def test_bandwidth_classes_must_agree(app):
+    """Test routes sharing a class cannot give it different rates."""
+    with pytest.raises(ConfigValidationError):
+        app.extensions["config_registry"].load(
+            {
+                "services": {"files": {"url": "http://files.local"}},
+                "route_mappings": {"files": "files", "exports": "files"},
+                "route_policies": {
+                    "files": {"bandwidth": {"class": "bulk", "download": "1MB"}},
+                    "exports": {"bandwidth": {"class": "bulk", "download": "2MB"}},
+                },
+            }
+        )
+
+
+def test_token_bucket_allows_bursts_then_paces():
+    """Test the burst is free and further bytes wait for the refill."""
+    shaper = BandwidthShaper(slots=16)
+    assert shaper.consume("client", 1000, rate=1000, burst=1000) == 0
+    assert shaper.consume("client", 500, rate=1000, burst=1000) == pytest.approx(
+        0.5, abs=0.01
+    )
+    # Concurrent requests queue up behind the debt
+    assert shaper.consume("client", 500, rate=1000, burst=1000) == pytest.approx(
+        1.0, abs=0.01
+    )
+    assert shaper.consume("other", 1000, rate=1000, burst=1000) == 0
+
+
+def test_downloads_are_paced_per_client(client, files, sleeps):
+    """Test a client's download waits for its bucket and others do not."""
+    response = client.get("/api/v1/files/archive.tar")
+    assert response.data == BODY
+
+    # The first 64 KiB are the burst; each further 8 KiB chunk waits its turn
+    assert len(sleeps) == 24
+    assert sleeps[0] == pytest.approx(0.125, abs=0.05)
+    assert sleeps[-1] == pytest.approx(3.0, abs=0.1)
+
+    # Another client has a bucket of its own
+    sleeps.clear()
+    response = client.get(
+        "/api/v1/files/archive.tar", environ_base={"REMOTE_ADDR": "10.0.0.2"}
+    )
+    assert response.data == BODY
+    assert sleeps[-1] == pytest.approx(3.0, abs=0.1)
+
+    metrics = client.get("/metrics").get_json()["bandwidth"]["bulk"]
+    assert metrics["download"]["bytes"] == 2 * len(BODY)
+    assert metrics["download"]["bytes_per_second"] > 0
+    assert metrics["download"]["delays"] == 48
+
+
+def test_uploads_are_paced(client, files, sleeps):
+    """Test the request body is read no faster than the upload rate."""
+    response = client.post(
+        "/api/v1/files/upload",
+        data=BODY,
+        content_type="application/octet-stream",
+        environ_base={"REMOTE_ADDR": "10.0.0.3"},
+    )
+    response.data
+
+    assert files == [BODY]
+    assert sleeps and max(sleeps) == pytest.approx(3.0, abs=0.1)
+    metrics = client.get("/metrics").get_json()["bandwidth"]["bulk"]
+    assert metrics["upload"]["bytes"] == len(BODY)
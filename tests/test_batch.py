@@ -0,0 +1,142 @@
+"""Test batch endpoint."""
+
+import json
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from gateway_service.service.batch import BatchError, BatchExecutor, parse_batch
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self._payload = payload if payload is not None else {}
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def jobs_enabled(load_config, monkeypatch):
+    """Enable the jobs service and stub out upstream calls."""
+    load_config(
+        services={"jobs": {"url": "http://jobs.local", "enabled": True}},
+        route_mappings={"jobs": "jobs"},
+    )
+
+    calls = []
+
+    def fake_request(self, method, url, **kwargs):
+        calls.append((method, url))
+        if url.endswith("/health"):
+            return FakeResponse()
+        if "missing" in url:
+            return FakeResponse(404, {"error": "not found"})
+        return FakeResponse(200, {"url": url})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    return calls
+
+
+def test_parse_batch_rejects_cycles():
+    """Test dependency cycles are rejected."""
+    payload = [
+        {"id": "a", "path": "jobs/1", "depends_on": ["b"]},
+        {"id": "b", "path": "jobs/2", "depends_on": ["a"]},
+    ]
+    with pytest.raises(BatchError):
+        parse_batch(payload, max_requests=10)
+
+
+def test_parse_batch_enforces_size_limit():
+    """Test batches over the configured size are rejected."""
+    with pytest.raises(BatchError):
+        parse_batch([{"path": "jobs"}] * 3, max_requests=2)
+
+
+def test_parse_batch_validates_timeout():
+    """Test per-request timeouts must be positive numbers."""
+    (sub,) = parse_batch([{"path": "jobs", "timeout": 2}], max_requests=10)
+    assert sub.timeout == 2.0
+
+    for timeout in [0, -1, "5", True]:
+        with pytest.raises(BatchError):
+            parse_batch([{"path": "jobs", "timeout": timeout}], max_requests=10)
+
+
+def test_executor_hides_unexpected_errors():
+    """Test handler exceptions become a generic 500 result."""
+    subrequests = parse_batch([{"id": "a", "path": "jobs"}], max_requests=10)
+
+    def handler(sub):
+        raise RuntimeError("secret connection string")
+
+    (result,) = BatchExecutor(handler).run(subrequests)
+
+    assert result["status"] == 500
+    assert result["body"]["message"] == "An unexpected error occurred"
+
+
+def test_executor_skips_failed_dependencies():
+    """Test dependents of a failed request are not executed."""
+    subrequests = parse_batch(
+        [
+            {"id": "a", "path": "jobs/missing"},
+            {"id": "b", "path": "jobs/1", "depends_on": "a"},
+            {"id": "c", "path": "jobs/2"},
+        ],
+        max_requests=10,
+    )
+    executed = []
+
+    def handler(sub):
+        executed.append(sub.id)
+        return {"status": 404 if sub.id == "a" else 200}
+
+    results = {r["id"]: r["status"] for r in BatchExecutor(handler).run(subrequests)}
+
+    assert results == {"a": 404, "b": 424, "c": 200}
+    assert "b" not in executed
+
+
+def test_batch_endpoint_streams_results(app, client, jobs_enabled):
+    """Test batch endpoint returns one JSON line per sub-request."""
+    token = jwt.encode({"user_id": 7}, app.config["SECRET_KEY"], algorithm="HS256")
+    response = client.post(
+        "/api/v1/_batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "requests": [
+                {"id": "list", "path": "jobs"},
+                {"id": "unknown", "path": "nowhere"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    results = {line["id"]: line for line in lines}
+    assert results["list"]["status"] == 200
+    assert results["list"]["body"]["url"] == "http://jobs.local/jobs"
+    assert results["unknown"]["status"] == 404
+
+
+def test_batch_endpoint_requires_authentication(client, jobs_enabled):
+    """Test the batch is authenticated once up front."""
+    response = client.post("/api/v1/_batch", json=[{"path": "jobs"}])
+    assert response.status_code == 401
+    assert jobs_enabled == []
+
+
+def test_batch_endpoint_invalid_payload(client):
+    """Test malformed batches return 400."""
+    response = client.post("/api/v1/_batch", json={"requests": []})
+    assert response.status_code == 400
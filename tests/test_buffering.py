@@ -0,0 +1,109 @@
+"""Test slow-client response buffering."""
+
+import gzip
+import io
+
+import requests
+from urllib3 import HTTPResponse
+
+from gateway_service.service import BufferBudget, ResponseSpooler
+
+
+class FakeUpstream:
+    """Streamed upstream response that tracks when it is released."""
+
+    def __init__(self, chunks, content_length=None):
+        self._chunks = chunks
+        self.headers = {}
+        if content_length is not None:
+            self.headers["Content-Length"] = str(content_length)
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        yield from self._chunks
+
+    def close(self):
+        self.closed = True
+
+
+def test_known_length_is_buffered_and_released():
+    """Test a small body is read fully and the upstream freed at once."""
+    budget = BufferBudget(max_memory_bytes=100, max_disk_bytes=0)
+    upstream = FakeUpstream([b"hello ", b"world"], content_length=11)
+
+    body = ResponseSpooler(budget, memory_threshold=50).spool(upstream)
+
+    assert upstream.closed is True
+    assert budget.memory_bytes == 11
+    assert b"".join(body) == b"hello world"
+    body.close()
+    assert budget.memory_bytes == 0
+
+
+def test_unknown_length_spills_to_disk():
+    """Test chunked bodies past the threshold move to a temp file."""
+    budget = BufferBudget(max_memory_bytes=100, max_disk_bytes=100)
+    upstream = FakeUpstream([b"a" * 8, b"b" * 8, b"c" * 8])
+
+    body = ResponseSpooler(budget, memory_threshold=10).spool(upstream)
+
+    assert not isinstance(body.spool, io.BytesIO)
+    assert budget.memory_bytes == 0 and budget.disk_bytes == 24
+    assert b"".join(body) == b"a" * 8 + b"b" * 8 + b"c" * 8
+    body.close()
+    assert budget.disk_bytes == 0
+
+
+def test_exhausted_budget_falls_back_to_streaming():
+    """Test responses over the caps are streamed instead of buffered."""
+    budget = BufferBudget(max_memory_bytes=10, max_disk_bytes=10)
+    spooler = ResponseSpooler(budget, memory_threshold=10)
+
+    assert spooler.spool(FakeUpstream([b"x" * 50], content_length=50)) is None
+
+    upstream = FakeUpstream([b"y" * 8, b"z" * 8])
+    body = spooler.spool(upstream)
+    assert b"".join(body) == b"y" * 8 + b"z" * 8
+    assert upstream.closed is False
+    body.close()
+    assert upstream.closed is True
+    assert budget.stats()["fallbacks"] == 2
+
+
+def test_compressed_body_is_counted_decoded():
+    """Test a gzip body is budgeted by its decoded size, not Content-Length."""
+    budget = BufferBudget(max_memory_bytes=1000, max_disk_bytes=1000)
+    payload = b"z" * 100_000
+    compressed = gzip.compress(payload)
+    upstream = requests.Response()
+    upstream.status_code = 200
+    upstream.headers["Content-Encoding"] = "gzip"
+    upstream.headers["Content-Length"] = str(len(compressed))
+    upstream.raw = HTTPResponse(
+        body=io.BytesIO(compressed),
+        headers=dict(upstream.headers),
+        preload_content=False,
+    )
+    assert len(compressed) < 1000
+
+    body = ResponseSpooler(budget, memory_threshold=500).spool(upstream)
+
+    assert budget.memory_bytes <= 500 and budget.disk_bytes <= 1000
+    assert body.remainder is not None
+    assert b"".join(body) == payload
+    body.close()
+    assert budget.memory_bytes == 0 and budget.disk_bytes == 0
+
+
+def test_overlong_body_streams_past_reservation():
+    """Test bytes beyond Content-Length are streamed, not spooled."""
+    budget = BufferBudget(max_memory_bytes=100, max_disk_bytes=0)
+    upstream = FakeUpstream([b"a" * 8, b"b" * 8], content_length=8)
+
+    body = ResponseSpooler(budget, memory_threshold=50).spool(upstream)
+
+    assert budget.memory_bytes == 8
+    assert b"".join(body) == b"a" * 8 + b"b" * 8
+    body.close()
+    assert upstream.closed is True
+    assert budget.memory_bytes == 0
@@ -0,0 +1,146 @@
+"""Test traffic capture and its replay."""
+
+import json
+from datetime import timedelta
+
+from click.testing import CliRunner
+
+from gateway_service.app import cli
+from gateway_service.utils.capture import read_capture, redact_path
+from gateway_service.utils.replay import (
+    StubBackend,
+    gateway_overrides,
+    replay_in_process,
+)
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, body=b"{}"):
+        self.status_code = 200
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+        self._body = body
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+
+def test_redact_path():
+    """Test identifiers in paths are redacted and route names kept."""
+    assert redact_path("/api/v1/users/42/orders") == "/api/v1/users/:x/orders"
+    assert redact_path("/api/v1/users/jane@example.com") == "/api/v1/users/:x"
+    assert redact_path("/api/v1/files/3f2a9c1e-aa") == "/api/v1/files/:x"
+
+
+def test_requests_are_captured(app, client, load_config, monkeypatch, tmp_path):
+    """Test a sampled request is written without credentials or values."""
+    load_config(
+        services={"orders": {"url": "http://orders.local", "enabled": True}},
+        route_mappings={"orders": "orders"},
+        public_endpoints=["orders"],
+    )
+    monkeypatch.setattr(
+        "requests.Session.request", lambda self, method, url, **kw: FakeResponse()
+    )
+    capture = app.extensions["traffic_capture"]
+    capture.enabled, capture.sample_rate = True, 1.0
+    capture.path = str(tmp_path / "capture.jsonl")
+
+    response = client.get(
+        "/api/v1/orders/1234?page=2", headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 200
+    capture.flush()
+
+    (record,) = read_capture(capture.path)
+    assert record["p"] == "/api/v1/orders/:x"
+    assert record["svc"] == "orders" and record["pub"] is True
+    assert record["st"] == 200 and record["up"] is not None
+    assert record["q"] == ["page"] and "authorization" in record["h"]
+    assert "secret" not in json.dumps(record) and "1234" not in json.dumps(record)
+
+
+def test_replay_reports_latency(tmp_path):
+    """Test a capture replays against the stub with the recorded outcome."""
+    records = [
+        {
+            "ts": 100.0 + i * 0.01,
+            "m": "GET",
+            "p": "/api/v1/orders/:x",
+            "svc": "orders",
+            "pub": True,
+            "st": 200,
+            "up": 20,
+            "rq": 0,
+            "rs": 300,
+            "h": ["accept"],
+            "q": ["page"],
+            "a": "none",
+        }
+        for i in range(10)
+    ] + [
+        {
+            "ts": 100.05,
+            "m": "POST",
+            "p": "/api/v1/carts",
+            "svc": "carts",
+            "pub": False,
+            "st": 201,
+            "up": 5,
+            "rq": 40,
+            "rs": 10,
+            "h": ["authorization", "content-type"],
+            "q": [],
+            "a": "valid",
+        },
+        {
+            "ts": 100.06,
+            "m": "GET",
+            "p": "/api/v1/carts",
+            "svc": None,
+            "pub": False,
+            "st": 401,
+            "up": None,
+            "rq": 0,
+            "rs": None,
+            "h": ["authorization"],
+            "q": [],
+            "a": "invalid",
+        },
+    ]
+    assert gateway_overrides(records, "http://stub")["public_endpoints"] == ["orders"]
+    path = tmp_path / "capture.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    stub = StubBackend().start()
+    try:
+        report = replay_in_process(records, stub.url, speed=2)
+    finally:
+        stub.stop()
+
+    assert report["requests"] == 12
+    assert report["errors"] == 0 and report["status_mismatches"] == 0
+    # The stub waited out the recorded upstream latency
+    assert report["latency_ms"]["p50"] >= 20
+
+    result = CliRunner().invoke(cli, ["replay", str(path), "--limit", "1"])
+    assert result.exit_code == 0, result.output
+    assert "1 requests in" in result.output
+
+
+def test_stub_backend_mimics_the_upstream():
+    """Test the stub answers with the requested status, size and delay."""
+    import requests
+
+    stub = StubBackend().start()
+    try:
+        response = requests.get(
+            stub.url + "/anything",
+            headers={"X-Replay-Status": "404", "X-Replay-Bytes": "100"},
+        )
+    finally:
+        stub.stop()
+    assert response.status_code == 404
+    assert len(response.content) == 100
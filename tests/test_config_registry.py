@@ -0,0 +1,111 @@
+"""Test hot-reloadable gateway configuration."""
+
+import json
+
+import jwt
+import pytest
+
+from gateway_service.service import ConfigRegistry, ConfigValidationError
+from gateway_service.service.config_registry import RouteTrie
+
+SERVICES = {"jobs": {"url": "http://jobs.local", "enabled": True}}
+
+
+def test_route_trie_longest_prefix():
+    """Test the trie picks the longest configured prefix."""
+    trie = RouteTrie({"jobs": "jobs", "jobs/admin": "admin", "auth": "auth"})
+    assert trie.match("jobs/1") == "jobs"
+    assert trie.match("jobs/admin/1") == "admin"
+    assert trie.match("partners") is None
+
+
+def test_invalid_config_keeps_current_snapshot(app):
+    """Test a config with a dangling route is rejected."""
+    registry = app.extensions["config_registry"]
+    before = registry.snapshot
+
+    with pytest.raises(ConfigValidationError):
+        registry.load({"services": SERVICES, "route_mappings": {"pay": "payments"}})
+
+    assert registry.snapshot is before
+
+
+def test_file_reload_and_rollback(app, tmp_path):
+    """Test file-backed config reloads and rolls back."""
+    config_file = tmp_path / "gateway.json"
+    config_file.write_text(
+        json.dumps({"services": SERVICES, "route_mappings": {"jobs": "jobs"}})
+    )
+    registry = ConfigRegistry({**app.config, "GATEWAY_CONFIG_FILE": str(config_file)})
+    assert registry.snapshot.resolve_route("jobs/1") == "jobs"
+
+    config_file.write_text(
+        json.dumps({"services": SERVICES, "route_mappings": {"work": "jobs"}})
+    )
+    registry.reload()
+    assert registry.snapshot.resolve_route("jobs/1") is None
+    assert registry.snapshot.resolve_route("work/1") == "jobs"
+
+    registry.rollback()
+    assert registry.snapshot.resolve_route("jobs/1") == "jobs"
+    # Rollback is written back so every worker converges on it
+    assert json.loads(config_file.read_text())["route_mappings"] == {"jobs": "jobs"}
+
+
+def test_redis_source_reuses_one_client(app, monkeypatch):
+    """Test reloads and rollbacks share the registry's Redis client."""
+    store = {"gateway": json.dumps({"services": SERVICES, "route_mappings": {}})}
+    clients = []
+
+    class FakeRedis:
+        def __init__(self):
+            clients.append(self)
+
+        def get(self, key):
+            return store.get(key)
+
+        def set(self, key, value):
+            store[key] = value
+
+        def publish(self, channel, message):
+            pass
+
+    monkeypatch.setattr(
+        "gateway_service.service.config_registry.create_redis_client",
+        lambda url: FakeRedis(),
+    )
+    registry = ConfigRegistry(
+        {
+            **app.config,
+            "REDIS_URL": "redis://localhost:6379/0",
+            "GATEWAY_CONFIG_REDIS_KEY": "gateway",
+        }
+    )
+    store["gateway"] = json.dumps(
+        {"services": SERVICES, "route_mappings": {"jobs": "jobs"}}
+    )
+    registry.reload()
+    registry.rollback()
+
+    assert len(clients) == 1
+    assert json.loads(store["gateway"])["route_mappings"] == {}
+
+
+def test_admin_config_requires_admin_role(app, client):
+    """Test admin config endpoint checks the token role."""
+    secret = app.config["SECRET_KEY"]
+    user_token = jwt.encode({"user_id": 1, "role": "user"}, secret, algorithm="HS256")
+    admin_token = jwt.encode({"user_id": 2, "role": "admin"}, secret, algorithm="HS256")
+
+    assert client.get("/gateway/admin/config").status_code == 401
+
+    response = client.get(
+        "/gateway/admin/config", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 403
+
+    response = client.get(
+        "/gateway/admin/config", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.data)["active"]["source"] == "env"
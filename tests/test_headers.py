@@ -0,0 +1,95 @@
+"""Test the proxy header pipeline and the JSON provider."""
+
+import json
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from gateway_service.utils.headers import (
+    STREAM_RESPONSE_ALLOW,
+    forward_environ_headers,
+    forward_headers,
+    response_headers,
+)
+
+
+def test_forward_strips_hop_by_hop_and_identity(app):
+    """Test hop-by-hop, Connection-listed and spoofed identity headers are dropped."""
+    headers = {
+        "Host": "gateway.example",
+        "Connection": "keep-alive, X-Debug",
+        "Keep-Alive": "timeout=5",
+        "X-Debug": "1",
+        "X-User-ID": "admin",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+    }
+    with app.test_request_context("/api/v1/jobs", headers=headers, data="{}"):
+        from flask import request
+
+        forwarded = forward_environ_headers(request.environ)
+        assert forwarded == forward_headers(
+            request.headers.items(), request.headers.get("Connection")
+        )
+
+    assert forwarded == {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+    }
+
+
+def test_response_headers_drop_length_of_decoded_body():
+    """Test Content-Length is dropped when the body was transparently decoded."""
+    upstream = CaseInsensitiveDict(
+        {
+            "Content-Type": "text/plain",
+            "Content-Length": "40",
+            "Content-Encoding": "gzip",
+            "Server": "upstream",
+            "Connection": "close",
+        }
+    )
+    assert response_headers(upstream) == [("Content-Type", "text/plain")]
+    assert response_headers(upstream, STREAM_RESPONSE_ALLOW) == [
+        ("Content-Type", "text/plain"),
+        ("Content-Encoding", "gzip"),
+    ]
+
+    del upstream["Content-Encoding"]
+    assert ("Content-Length", "40") in response_headers(upstream)
+
+
+def test_fast_json_provider(app):
+    """Test the orjson provider keeps Flask's JSON output semantics."""
+    pytest.importorskip("orjson")
+    from dataclasses import dataclass
+    from datetime import datetime, timezone
+    from decimal import Decimal
+    from uuid import UUID
+
+    from flask.json.provider import DefaultJSONProvider
+    from markupsafe import Markup
+
+    from gateway_service.utils.json_provider import FastJSONProvider
+
+    provider = FastJSONProvider(app)
+    app.debug = False
+    with app.app_context():
+        response = provider.response(
+            {"b": 1, "a": datetime(2026, 1, 2, tzinfo=timezone.utc)}
+        )
+
+    assert response.mimetype == "application/json"
+    assert response.data.startswith(b'{"a":')
+    assert json.loads(response.data)["a"] == "Fri, 02 Jan 2026 00:00:00 GMT"
+    assert provider.loads(provider.dumps({1: "x"})) == {"1": "x"}
+
+    @dataclass
+    class Point:
+        x: int
+        y: int
+
+    extras = {"d": Decimal("1.10"), "u": UUID(int=1), "p": Point(1, 2)}
+    extras["m"] = Markup("<b>")
+    expected = DefaultJSONProvider(app).dumps(extras)
+    assert provider.loads(provider.dumps(extras)) == json.loads(expected)
@@ -0,0 +1,42 @@
+"""Test the health check script's watch mode."""
+
+import json
+
+from gateway_service.utils.replay import StubBackend
+from scripts.health_check import ProbeStats, Watcher, main
+
+
+def test_probe_stats_roll_over_the_window():
+    """Test percentiles and error rate cover only the last probes."""
+    stats = ProbeStats(window=4)
+    for latency in [100, 1, 2, 3]:
+        stats.add(latency, 200, None)
+    stats.add(0, None, "ConnectTimeout")
+
+    summary = stats.summary()
+    assert summary["samples"] == 4
+    assert summary["error_rate"] == 0.25
+    assert summary["p50_ms"] == 2 and summary["p99_ms"] == 100
+    assert summary["error"] == "ConnectTimeout"
+
+
+def test_watch_probes_every_target_and_endpoint(capsys):
+    """Test one round probes each URL and reports it as a JSON line."""
+    stubs = [StubBackend().start(), StubBackend().start()]
+    try:
+        watcher = Watcher([stub.url for stub in stubs], ["/gateway/health", "/metrics"])
+        summary = watcher.tick()
+        watcher.close()
+        main(
+            ["--watch", "--json", "--count", "2", "--interval", "0"]
+            + [arg for stub in stubs for arg in ("--target", stub.url)]
+        )
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+    assert len(summary) == 4
+    assert all(stats["status"] == 200 for stats in summary.values())
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(lines) == 2 * 4
+    assert lines[-1]["samples"] == 2 and lines[-1]["error_rate"] == 0
@@ -0,0 +1,117 @@
+"""Test multiplexed HTTP/2 upstream connections."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gateway_service.service.config_registry import ServicePools
+from gateway_service.utils.replay import LATENCY_HEADER, H2StubBackend
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+
+@pytest.fixture
+def h2_stub():
+    stub = H2StubBackend().start()
+    yield stub
+    stub.stop()
+
+
+def fetch_all(session, url, count, latency_ms=50):
+    def fetch(_):
+        response = session.get(url, headers={LATENCY_HEADER: str(latency_ms)})
+        return response.status_code, response.raw.http_version
+
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(fetch, range(count)))
+
+
+def test_concurrent_requests_share_a_connection(h2_stub):
+    """Test in-flight requests are multiplexed over a single connection."""
+    pools = ServicePools(pool_size=10, dns_cache=None)
+    session = pools.session_for("orders", h2_stub.url, http2=True)
+
+    results = fetch_all(session, f"{h2_stub.url}/orders", 20)
+
+    assert set(results) == {(200, "HTTP/2")}
+    assert h2_stub.connections == 1
+    assert h2_stub.max_active > 1
+    session.close()
+
+
+def test_max_streams_caps_requests_in_flight(h2_stub):
+    """Test requests beyond max_streams wait for a free stream."""
+    pools = ServicePools(pool_size=10, dns_cache=None, http2_max_streams=2)
+    session = pools.session_for("orders", h2_stub.url, http2=True)
+
+    results = fetch_all(session, f"{h2_stub.url}/orders", 6)
+
+    assert set(results) == {(200, "HTTP/2")}
+    assert h2_stub.max_active == 2
+    session.close()
+
+
+def test_gateway_proxies_over_http2(client, load_config, h2_stub):
+    """Test a service with http2 enabled is proxied over h2c."""
+    load_config(
+        services={"orders": {"url": h2_stub.url, "enabled": True, "http2": True}},
+        route_mappings={"orders": "orders"},
+        public_endpoints=["orders"],
+    )
+
+    response = client.get("/api/v1/orders/42")
+
+    assert response.status_code == 200
+    assert response.get_json() == {}
+    assert h2_stub.connections >= 1
+
+
+def test_warmup_opens_the_http2_connection(app, load_config, h2_stub):
+    """Test warmup opens the multiplexed connection instead of a pool's."""
+    load_config(
+        services={"orders": {"url": h2_stub.url, "enabled": True, "http2": True}},
+        route_mappings={"orders": "orders"},
+    )
+
+    report = app.extensions["warmup"].run()
+
+    assert report["services"]["orders"]["connections"] == 1
+    assert "error" not in report["services"]["orders"]
+    assert h2_stub.connections == 1
+
+
+def test_failed_response_gives_its_stream_back(app, client, load_config, h2_stub):
+    """Test a response abandoned by an error does not keep its stream slot."""
+    load_config(
+        services={"orders": {"url": h2_stub.url, "enabled": True, "http2": True}},
+        route_mappings={"orders": "orders"},
+        public_endpoints=["orders"],
+        route_policies={"orders": {"buffer": True}},
+    )
+    spooler = app.extensions["response_spooler"]
+    spooler.spool = lambda response: 1 / 0
+
+    assert client.get("/api/v1/orders/42").status_code == 500
+
+    session = app.extensions["config_registry"].pools.session_for(
+        "orders", h2_stub.url, http2=True
+    )
+    streams = session.get_adapter(h2_stub.url)._streams
+    assert streams._value == streams._initial_value
+
+
+def test_streams_open_independently_per_service(h2_stub):
+    """Test a connect in progress for one service does not hold up another."""
+    pools = ServicePools(pool_size=10, dns_cache=None)
+    orders = pools.session_for("orders", h2_stub.url, http2=True)
+    users = pools.session_for("users", h2_stub.url, http2=True)
+
+    opening = orders.get_adapter(h2_stub.url)._opening
+    opening.acquire()
+    try:
+        assert users.get(f"{h2_stub.url}/users", timeout=2).status_code == 200
+    finally:
+        opening.release()
+    orders.close()
+    users.close()
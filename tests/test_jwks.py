@@ -0,0 +1,73 @@
+"""Test RS256 validation against a cached JWKS."""
+
+import json
+
+import jwt
+import pytest
+
+from gateway_service.service import AuthService
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+
+class FakeJWKSResponse:
+    def __init__(self, jwks):
+        self._jwks = jwks
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._jwks
+
+
+@pytest.fixture
+def signing_key(app, monkeypatch):
+    """RSA key published as a one-key JWKS; counts fetches."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid="key-1", alg="RS256", use="sig")
+    fetched = []
+
+    def fake_request(self, method, url, **kwargs):
+        fetched.append(url)
+        return FakeJWKSResponse({"keys": [jwk]})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    app.extensions["jwks_cache"].url = "http://auth.local/.well-known/jwks.json"
+    app.extensions["jwks_cache"].refresh_interval = 3600
+    return private_key, fetched
+
+
+def test_rs256_tokens_validate_locally(app, signing_key):
+    """Test known keys are reused without further fetches."""
+    private_key, fetched = signing_key
+    token = jwt.encode(
+        {"user_id": 7}, private_key, algorithm="RS256", headers={"kid": "key-1"}
+    )
+
+    with app.test_request_context():
+        for _ in range(5):
+            assert AuthService.validate_token(token)["user_id"] == 7
+
+    assert len(fetched) <= 2  # background refresher plus first lookup at most
+
+
+def test_unknown_kid_refresh_is_rate_limited(app, signing_key):
+    """Test tokens with unknown kids cannot force repeated fetches."""
+    private_key, fetched = signing_key
+    token = jwt.encode(
+        {"user_id": 7}, private_key, algorithm="RS256", headers={"kid": "rotated"}
+    )
+    cache = app.extensions["jwks_cache"]
+    cache.refresh()
+    fetched.clear()
+
+    with app.test_request_context():
+        for _ in range(5):
+            assert AuthService.validate_token(token) is None
+
+    assert fetched == []
+    assert cache.stats()["unknown_kids"] == 5
@@ -0,0 +1,102 @@
+"""Test traffic mirroring."""
+
+import json
+import time
+from datetime import timedelta
+
+from gateway_service.service import MirrorJob, TrafficMirror
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+
+    def iter_content(self, chunk_size=1):
+        yield b"{}"
+
+    def close(self):
+        pass
+
+
+def make_job(body=b""):
+    return MirrorJob(
+        service="shadow",
+        method="GET",
+        path="payments/1",
+        headers={},
+        params={},
+        body=body,
+        primary_service="payments",
+        primary_status=200,
+        primary_latency=0.01,
+    )
+
+
+def test_mirror_drops_when_queue_full(app):
+    """Test a full queue drops copies instead of blocking."""
+    app.config.update(MIRROR_QUEUE_SIZE=1, MIRROR_WORKERS=0, MIRROR_MAX_BODY_BYTES=4)
+    mirror = TrafficMirror(app)
+
+    assert mirror.submit(make_job()) is True
+    assert mirror.submit(make_job()) is False
+    assert mirror.submit(make_job(body=b"too large")) is False
+    assert mirror.stats()["services"]["shadow"]["dropped"] == 2
+
+
+def test_proxy_mirrors_sampled_requests(client, load_config, monkeypatch):
+    """Test mirrored requests record a primary/shadow comparison."""
+    load_config(
+        services={
+            "payments": {"url": "http://payments.local", "enabled": True},
+            "shadow": {"url": "http://shadow.local", "enabled": True},
+        },
+        route_mappings={"payments": "payments"},
+        public_endpoints=["payments"],
+        route_policies={"payments": {"mirror": {"service": "shadow"}}},
+    )
+
+    def fake_request(self, method, url, **kwargs):
+        return FakeResponse(500 if url.startswith("http://shadow.local") else 200)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get("/api/v1/payments/1")
+    assert response.status_code == 200
+
+    for _ in range(50):
+        stats = json.loads(client.get("/metrics").data)["mirror"]["services"]
+        if stats.get("shadow", {}).get("mirrored"):
+            break
+        time.sleep(0.02)
+
+    assert stats["shadow"]["mirrored"] == 1
+    assert stats["shadow"]["status_mismatches"] == 1
+    assert stats["shadow"]["shadow_errors"] == 1
+
+
+def test_shadow_latency_excludes_body(app, load_config, monkeypatch):
+    """Test the shadow is timed to its headers, like the primary."""
+    load_config(
+        services={"shadow": {"url": "http://shadow.local", "enabled": True}},
+        route_mappings={},
+    )
+    app.config.update(MIRROR_WORKERS=0)
+    mirror = TrafficMirror(app)
+
+    class SlowBody(FakeResponse):
+        def iter_content(self, chunk_size=1):
+            time.sleep(0.2)
+            yield b"{}"
+
+    monkeypatch.setattr(
+        "requests.Session.request", lambda self, method, url, **kwargs: SlowBody()
+    )
+    mirror._send(make_job())
+
+    stats = mirror.stats()["services"]["shadow"]
+    assert stats["mirrored"] == 1
+    assert stats["shadow_avg_ms"] < 100
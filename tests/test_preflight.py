@@ -0,0 +1,54 @@
+"""Test the CORS preflight fast path and prepared error bodies."""
+
+import json
+
+from gateway_service.middleware import PreflightMiddleware
+
+PREFLIGHT = {"Access-Control-Request-Method": "POST"}
+
+
+def test_preflight_answered_before_flask(app, client):
+    """Test preflights get precomputed headers without reaching any view."""
+    app.config["CORS_ORIGINS"] = ["https://app.example"]
+    app.wsgi_app = PreflightMiddleware(app.wsgi_app.wsgi_app, app.config)
+
+    @app.before_request
+    def fail():
+        raise AssertionError("preflight reached Flask")
+
+    response = client.options(
+        "/api/v1/jobs", headers={"Origin": "https://app.example", **PREFLIGHT}
+    )
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == "https://app.example"
+    assert response.headers["Vary"] == "Origin"
+    assert "Authorization" in response.headers["Access-Control-Allow-Headers"]
+
+    response = client.options(
+        "/api/v1/jobs", headers={"Origin": "https://evil.example", **PREFLIGHT}
+    )
+    assert "Access-Control-Allow-Origin" not in response.headers
+    assert app.wsgi_app.answered == 2
+
+
+def test_wildcard_origin_cache_is_bounded(app):
+    """Test echoed origins stop being cached once the cache is full."""
+    app.config.update(CORS_ORIGINS=["*"], CORS_PREFLIGHT_CACHE_SIZE=2)
+    middleware = PreflightMiddleware(app.wsgi_app, app.config)
+
+    for index in range(5):
+        headers = dict(middleware.headers_for(f"https://{index}.example"))
+        assert headers["Access-Control-Allow-Origin"] == f"https://{index}.example"
+    assert len(middleware._cache) == 2
+
+
+def test_prepared_error_body(client):
+    """Test pre-serialized errors keep the JSON error format."""
+    response = client.get("/api/v1/unknown-endpoint")
+
+    assert response.status_code == 404
+    assert response.mimetype == "application/json"
+    data = json.loads(response.data)
+    assert data["error"] == "Service not found"
+    assert data["message"] == "No service configured for endpoint: unknown-endpoint"
+    assert data["request_id"]
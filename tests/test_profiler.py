@@ -0,0 +1,94 @@
+"""Test the sampling profiler and allocation tracking admin endpoints."""
+
+import threading
+import time
+
+import jwt
+import pytest
+
+
+@pytest.fixture
+def admin_headers(app):
+    token = jwt.encode({"user_id": 1, "role": "admin"}, app.config["SECRET_KEY"])
+    return {"Authorization": f"Bearer {token}"}
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_returns_collapsed_stacks(client, admin_headers):
+    """Test a profile captures stacks of other threads in collapsed format."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    try:
+        response = client.get(
+            "/gateway/admin/profile?seconds=0.3&interval=0.002", headers=admin_headers
+        )
+    finally:
+        stop.set()
+        worker.join()
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert int(response.headers["X-Profile-Samples"]) > 10
+    lines = response.get_data(as_text=True).splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_loop (tests/test_profiler.py:" in line for line in lines)
+
+
+def test_profile_rejects_concurrent_runs(app, client, admin_headers):
+    """Test only one profile runs per worker at a time."""
+    profiler = app.extensions["profiler"]
+    thread = threading.Thread(target=profiler.profile, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        response = client.get(
+            "/gateway/admin/profile?seconds=0.1", headers=admin_headers
+        )
+        assert response.status_code == 409
+    finally:
+        thread.join()
+
+
+def test_memory_snapshot_diff(app, client, admin_headers):
+    """Test allocation growth shows up in the diff against a marked baseline."""
+    assert client.get("/gateway/admin/memory", headers=admin_headers).status_code == 409
+
+    client.post(
+        "/gateway/admin/memory", json={"action": "start"}, headers=admin_headers
+    )
+    try:
+        client.post(
+            "/gateway/admin/memory", json={"action": "mark"}, headers=admin_headers
+        )
+        leak = [bytearray(1024) for _ in range(200)]  # noqa: F841
+
+        data = client.get(
+            "/gateway/admin/memory?limit=5", headers=admin_headers
+        ).get_json()
+        assert data["top"]
+        assert any(
+            "test_profiler.py" in site["site"] and site["size_diff"] >= 200 * 1024
+            for site in data["diff"]
+        )
+    finally:
+        client.post(
+            "/gateway/admin/memory", json={"action": "stop"}, headers=admin_headers
+        )
+    assert not app.extensions["allocations"].tracing
+
+
+def test_profile_rejects_non_finite_durations(app, client, admin_headers):
+    """Test NaN and infinite durations are refused before sampling starts."""
+    for query in ("seconds=nan", "seconds=inf", "seconds=1&interval=nan"):
+        response = client.get(f"/gateway/admin/profile?{query}", headers=admin_headers)
+        assert response.status_code == 400
+
+    with pytest.raises(ValueError):
+        app.extensions["profiler"].profile(float("nan"))
+    assert app.extensions["profiler"].runs == 0
@@ -0,0 +1,153 @@
+"""Test sparse fieldset projection of streamed JSON responses."""
+
+import json
+from datetime import timedelta
+
+import pytest
+
+from gateway_service.service import (
+    JSONProjector,
+    ProjectionError,
+    fields_key,
+    parse_fields,
+)
+
+JOBS = {
+    "items": [
+        {"id": i, "title": f"Job {i}", "company": {"name": "Acme", "logo": "x" * 50}}
+        for i in range(50)
+    ],
+    "next": "cursor-2",
+}
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, body, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.elapsed = timedelta(0)
+        self._body = body
+
+    def iter_content(self, chunk_size=1):
+        # Small chunks, so tokens are split across them
+        for i in range(0, len(self._body), 7):
+            yield self._body[i : i + 7]
+
+
+def project(body: bytes, fields: str, chunk: int = 5, **kwargs) -> bytes:
+    projector = JSONProjector(parse_fields(fields), **kwargs)
+    out = b"".join(
+        projector.feed(body[i : i + chunk]) for i in range(0, len(body), chunk)
+    )
+    return out + projector.close()
+
+
+def test_parse_fields():
+    """Test dotted names build a tree and bad names are rejected."""
+    assert parse_fields("id, company.name,company.logo") == {
+        "id": True,
+        "company": {"name": True, "logo": True},
+    }
+    assert parse_fields("company.name,company") == {"company": True}
+    assert fields_key(parse_fields("a,b")) == fields_key(parse_fields("b,a"))
+
+    for bad in ["", ",", "a..b", "a b", ",".join(f"f{i}" for i in range(101))]:
+        with pytest.raises(ProjectionError):
+            parse_fields(bad)
+
+
+@pytest.mark.parametrize("max_pending", [1, 64 * 1024])
+def test_projection_matches_selection(max_pending):
+    """Test lists are trimmed per element, however the body is chunked."""
+    body = json.dumps(JOBS, indent=1).encode()
+
+    result = json.loads(
+        project(body, "items.id,items.company.name,next", 3, max_pending=max_pending)
+    )
+
+    assert result["next"] == "cursor-2"
+    assert result["items"][7] == {"id": 7, "company": {"name": "Acme"}}
+    assert len(result["items"]) == 50
+
+
+def test_projection_keeps_escapes_and_unicode():
+    """Test strings with escapes and multi-byte characters survive chunking."""
+    doc = {'a"b': 'x\\"}]', "name": "Zürich ✓", "skip": ["}", "\\", {"a": 1}]}
+    body = json.dumps(doc, ensure_ascii=False).encode()
+
+    for max_pending in (1, 1024):
+        result = project(body, "name", 1, max_pending=max_pending)
+        assert json.loads(result) == {"name": "Zürich ✓"}
+        result = project(body, "skip", 1, max_pending=max_pending)
+        assert json.loads(result) == {"skip": doc["skip"]}
+
+
+def test_malformed_body_raises():
+    """Test truncated or invalid JSON is reported."""
+    for body in [b'{"items": [1, 2', b'{"a" 1}', b'{"a": 1} trailing']:
+        with pytest.raises(ProjectionError):
+            project(body, "a", max_pending=1)
+
+
+def test_route_projection(app, client, load_config, monkeypatch):
+    """Test ?fields= trims the response and keys its ETag to the projection."""
+    load_config(
+        services={"jobs": {"url": "http://jobs.local", "enabled": True}},
+        route_mappings={"jobs": "jobs"},
+        public_endpoints=["jobs"],
+        route_policies={"jobs": {"project": True}},
+    )
+    body = json.dumps(JOBS).encode()
+    seen = {}
+
+    def fake_request(self, method, url, params=None, headers=None, **kwargs):
+        if url.endswith("/health"):
+            return FakeResponse(b"{}")
+        seen.update(params=params, headers=headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(b"", 304, {"ETag": '"v1"'})
+        return FakeResponse(
+            body, headers={"ETag": '"v1"', "Content-Length": str(len(body))}
+        )
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get("/api/v1/jobs?fields=items.id,next&page=2")
+    assert response.status_code == 200
+    assert response.get_json()["items"][3] == {"id": 3}
+    assert seen["params"] == {"page": ["2"]}
+    assert "Content-Length" not in response.headers or int(
+        response.headers["Content-Length"]
+    ) == len(response.data)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"v1.p') and etag != '"v1"'
+
+    # The projected tag revalidates against the upstream's own
+    response = client.get(
+        "/api/v1/jobs?fields=items.id,next", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    response = client.get("/api/v1/jobs?fields=items..id")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid fields"
+
+
+def test_fields_pass_through_without_policy(app, client, load_config, monkeypatch):
+    """Test routes that did not opt in leave ?fields= to the upstream."""
+    load_config(
+        services={"jobs": {"url": "http://jobs.local", "enabled": True}},
+        route_mappings={"jobs": "jobs"},
+        public_endpoints=["jobs"],
+    )
+    body = json.dumps(JOBS).encode()
+    monkeypatch.setattr(
+        "requests.Session.request",
+        lambda self, method, url, **kw: FakeResponse(body),
+    )
+
+    response = client.get("/api/v1/jobs?fields=items.id")
+    assert response.get_json() == JOBS
@@ -0,0 +1,146 @@
+"""Test Range requests and the chunk cache for large downloads."""
+
+from datetime import timedelta
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from gateway_service.service import RangeNotSatisfiable, parse_range
+
+DOCUMENT = bytes(range(256)) * 40  # 10 KiB
+
+
+class FakeResponse:
+    """Upstream that honours single byte ranges, like a file server."""
+
+    def __init__(self, headers, cache_control="public, max-age=3600"):
+        self.status_code = 200
+        self.elapsed = timedelta(0)
+        self.headers = CaseInsensitiveDict(
+            {
+                "Content-Type": "application/pdf",
+                "ETag": '"doc-v1"',
+                "Cache-Control": cache_control,
+                "Accept-Ranges": "bytes",
+            }
+        )
+        self._body = DOCUMENT
+        span = parse_range(headers.get("Range"), len(DOCUMENT))
+        if span is not None:
+            start, end = span
+            self.status_code = 206
+            self._body = DOCUMENT[start : end + 1]
+            self.headers["Content-Range"] = f"bytes {start}-{end}/{len(DOCUMENT)}"
+        self.headers["Content-Length"] = str(len(self._body))
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), 700):
+            yield self._body[i : i + 700]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def documents(app, load_config, monkeypatch):
+    """Public documents route with a small-chunk cache; returns upstream calls."""
+    load_config(
+        services={"documents": {"url": "http://documents.local", "enabled": True}},
+        route_mappings={"documents": "documents"},
+        public_endpoints=["documents"],
+        route_policies={"documents": {"ranges": True}},
+    )
+    cache = app.extensions["range_cache"]
+    cache.chunk_size = cache.min_object_bytes = 1024
+    calls = []
+
+    def fake_request(self, method, url, headers=None, **kwargs):
+        if not url.endswith("/health"):
+            calls.append(dict(headers))
+        return FakeResponse(headers or {})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    yield calls
+    cache.clear()
+
+
+def test_parse_range():
+    """Test single ranges are clamped and others ignored."""
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_ranges_are_served_from_cache(client, documents):
+    """Test a downloaded object answers later ranges without the upstream."""
+    response = client.get("/api/v1/documents/report.pdf")
+    assert response.status_code == 200
+    assert response.data == DOCUMENT
+    assert documents[0]["Accept-Encoding"] == "identity"
+
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=100-2099"}
+    )
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-2099/{len(DOCUMENT)}"
+    assert response.data == DOCUMENT[100:2100]
+
+    # A changed representation on the client's side gets the whole object
+    response = client.get(
+        "/api/v1/documents/report.pdf",
+        headers={"Range": "bytes=0-9", "If-Range": '"doc-v0"'},
+    )
+    assert response.status_code == 200 and len(response.data) == len(DOCUMENT)
+
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=20000-"}
+    )
+    assert response.status_code == 416
+
+    response = client.head("/api/v1/documents/report.pdf")
+    assert response.headers["Content-Length"] == str(len(DOCUMENT))
+    assert len(documents) == 1
+
+
+def test_interrupted_download_keeps_its_chunks(client, documents):
+    """Test chunks stored from a passed-through range serve a resumed one."""
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=0-4095"}
+    )
+    assert response.status_code == 206
+    assert response.data == DOCUMENT[:4096]
+    assert documents[0]["Range"] == "bytes=0-4095"
+
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=1024-3071"}
+    )
+    assert response.data == DOCUMENT[1024:3072]
+    assert len(documents) == 1
+
+    # Chunks past the first download still come from the upstream
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=4096-"}
+    )
+    assert response.data == DOCUMENT[4096:]
+    assert len(documents) == 2
+
+
+def test_private_responses_are_not_cached(app, client, documents, monkeypatch):
+    """Test only responses a shared cache may store are kept."""
+
+    def fake_request(self, method, url, headers=None, **kwargs):
+        return FakeResponse(headers or {}, cache_control="private")
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    client.get("/api/v1/documents/report.pdf").data
+    response = client.get(
+        "/api/v1/documents/report.pdf", headers={"Range": "bytes=0-9"}
+    )
+
+    assert response.data == DOCUMENT[:10]
+    assert app.extensions["range_cache"].stats()["objects"] == 0
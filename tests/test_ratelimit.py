@@ -0,0 +1,133 @@
+"""Test the rate limit policy engine."""
+
+import pytest
+
+from gateway_service.middleware import rate_limit_identity
+from gateway_service.service import (
+    AuthService,
+    RateLimiter,
+    RateLimitIdentity,
+    compile_rate_limits,
+)
+from gateway_service.service.ratelimit import RateLimitError, RateLimitWindow
+from gateway_service.utils import get_client_ip
+
+
+class ScriptRedis:
+    """Runs the check-and-increment script's logic in Python, counting calls."""
+
+    def __init__(self):
+        self.counters = {}
+        self.calls = 0
+
+    def evalsha(self, sha, numkeys, *args):
+        self.calls += 1
+        keys, limits = args[:numkeys], args[numkeys:]
+        for index, key in enumerate(keys):
+            if self.counters.get(key, 0) >= limits[index * 2]:
+                return [0, index + 1, 500]
+        for key in keys:
+            self.counters[key] = self.counters.get(key, 0) + 1
+        return [1, 0, 0]
+
+
+POLICIES = [
+    {
+        "name": "login",
+        "route": "auth/login",
+        "methods": ["POST"],
+        "key": "ip",
+        "limits": ["5/m"],
+    },
+    {"name": "free", "plan": "free", "limits": ["2/s", "1000/h"]},
+    {"name": "admins", "role": "admin", "limits": []},
+]
+
+
+def test_window_parsing():
+    """Test limit strings in several units."""
+    assert RateLimitWindow.parse("10/s") == RateLimitWindow(10, 1)
+    assert RateLimitWindow.parse("1000/h") == RateLimitWindow(1000, 3600)
+    assert RateLimitWindow.parse("50/30s") == RateLimitWindow(50, 30)
+    assert str(RateLimitWindow(5, 60)) == "5/m"
+    with pytest.raises(RateLimitError):
+        RateLimitWindow.parse("ten per second")
+
+
+def test_policy_matching():
+    """Test route, method and claim matching with default and exemptions."""
+    table = compile_rate_limits(POLICIES, ["100/m"])
+    anonymous = RateLimitIdentity(ip="10.0.0.1")
+    free_user = RateLimitIdentity(ip="10.0.0.1", user_id="7", plan="free")
+    admin = RateLimitIdentity(ip="10.0.0.1", user_id="1", role="admin")
+
+    names = lambda policies: sorted(p.name for p in policies)  # noqa: E731
+    assert names(table.match("auth/login", "POST", anonymous)) == ["login"]
+    assert names(table.match("auth/login", "GET", anonymous)) == ["default"]
+    assert names(table.match("auth/login", "POST", free_user)) == ["free", "login"]
+    assert names(table.match("jobs/1", "GET", free_user)) == ["free"]
+    assert names(table.match("jobs/1", "GET", admin)) == ["admins"]
+
+
+def test_all_windows_checked_in_one_round_trip():
+    """Test several windows are evaluated together and rejections not counted."""
+    table = compile_rate_limits(POLICIES, ["100/m"])
+    identity = RateLimitIdentity(ip="10.0.0.1", user_id="7", plan="free")
+    policies = table.match("jobs/1", "GET", identity)
+    limiter, redis_client = RateLimiter(), ScriptRedis()
+
+    results = [limiter.check(redis_client, policies, identity, now=0) for _ in range(3)]
+
+    assert results[:2] == [None, None]
+    assert str(results[2].window) == "2/s"
+    assert results[2].retry_after == 1
+    assert redis_client.calls == 3
+    assert sorted(redis_client.counters.values()) == [2, 2]
+
+
+def test_forwarded_for_only_trusted_from_proxies(app):
+    """Test spoofed X-Forwarded-For entries are ignored."""
+    headers = {"X-Forwarded-For": "1.2.3.4, 203.0.113.9"}
+    environ = {"REMOTE_ADDR": "10.0.0.2"}
+
+    with app.test_request_context(headers=headers, environ_base=environ):
+        assert get_client_ip() == "10.0.0.2"
+
+    app.config["TRUSTED_PROXY_COUNT"] = 1
+    with app.test_request_context(headers=headers, environ_base=environ):
+        assert get_client_ip() == "203.0.113.9"
+
+
+def test_only_policy_api_keys_identify_callers(app, load_config):
+    """Test unknown API keys share the client IP's bucket."""
+    load_config(
+        rate_limit_policies=[
+            {"name": "partners", "api_key": "k1", "key": "api_key", "limits": ["9/s"]}
+        ]
+    )
+    environ = {"REMOTE_ADDR": "10.0.0.2"}
+
+    with app.test_request_context(headers={"X-API-Key": "k1"}, environ_base=environ):
+        assert rate_limit_identity().bucket("api_key").startswith("key:")
+    with app.test_request_context(headers={"X-API-Key": "k2"}, environ_base=environ):
+        assert rate_limit_identity().bucket("api_key") == "ip:10.0.0.2"
+
+
+def test_claims_resolved_only_when_policies_need_them(app, load_config, monkeypatch):
+    """Test the token is not validated for IP-keyed limits."""
+    validated = []
+    monkeypatch.setattr(
+        AuthService,
+        "validate_request_token",
+        staticmethod(lambda token: validated.append(token) or {"user_id": 7}),
+    )
+    headers = {"Authorization": "Bearer abc"}
+
+    load_config(rate_limit_policies=[{"name": "ips", "key": "ip", "limits": ["9/s"]}])
+    with app.test_request_context(headers=headers):
+        assert rate_limit_identity(with_claims=False).user_id is None
+    assert validated == []
+
+    with app.test_request_context(headers=headers):
+        assert rate_limit_identity().user_id == "7"
+    assert validated == ["abc"]
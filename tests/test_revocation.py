@@ -0,0 +1,55 @@
+"""Test token revocation through the local Bloom filter."""
+
+import jwt
+
+from gateway_service.service import AuthService, BloomFilter, RevocationList
+
+
+class FailingRedis:
+    """Redis stand-in whose lookups always fail."""
+
+    def zscore(self, key, member):
+        raise ConnectionError("redis down")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added item is found and the error rate stays low."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for index in range(1000):
+        bloom.add(f"jti-{index}")
+
+    assert all(f"jti-{index}" in bloom for index in range(1000))
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+def test_possible_match_fails_closed_without_redis(app):
+    """Test filter hits are treated as revoked when Redis cannot confirm."""
+    revocations = RevocationList(app.config)
+    revocations._client = FailingRedis()
+    revocations._filter.add("abc")
+
+    assert revocations.is_revoked("unrelated") is False
+    assert revocations.is_revoked("abc") is True
+    assert revocations.stats()["confirm_errors"] == 1
+
+
+def test_admin_revocation_rejects_token(app, client):
+    """Test a token revoked through the admin endpoint stops validating."""
+    secret = app.config["SECRET_KEY"]
+    admin_token = jwt.encode({"user_id": 1, "role": "admin"}, secret, algorithm="HS256")
+    user_token = jwt.encode({"user_id": 2, "jti": "t-42"}, secret, algorithm="HS256")
+
+    with app.test_request_context():
+        assert AuthService.validate_token(user_token) is not None
+
+    response = client.post(
+        "/gateway/admin/tokens/revoke",
+        json={"jti": "t-42"},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+
+    with app.test_request_context():
+        assert AuthService.validate_token(user_token) is None
+    assert app.extensions["token_revocations"].stats()["confirmed"] == 1
@@ -0,0 +1,130 @@
+"""Test node-wide shared state across worker processes."""
+
+import multiprocessing
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+
+from gateway_service.service import AuthService, HealthChecker
+from gateway_service.utils.shared_memory import SharedTable
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+
+    def iter_content(self, chunk_size=1):
+        yield b"{}"
+
+
+def _write_in_child(table):
+    table.set("from-child", b"hello", ttl=60)
+
+
+def test_table_is_shared_with_forked_processes():
+    """Test a value written by a child process is read by the parent."""
+    table = SharedTable(slots=64, value_size=32)
+    child = multiprocessing.get_context("fork").Process(
+        target=_write_in_child, args=(table,)
+    )
+    child.start()
+    child.join(5)
+
+    assert child.exitcode == 0
+    assert table.get("from-child") == b"hello"
+
+
+def test_table_expiry_eviction_and_size_limit():
+    """Test expired values are hidden and full buckets evict the oldest."""
+    table = SharedTable(slots=4, value_size=8, probes=4)
+    assert table.set("a", b"1", ttl=60)
+    assert not table.set("big", b"123456789", ttl=60)
+    assert table.get("a") == b"1"
+    assert table.get("a", now=time.time() + 61) is None
+
+    for index in range(4):
+        table.set(f"k{index}", b"x", ttl=100 + index)
+    assert table.get("a") is None
+    assert table.get("k3") == b"x"
+
+
+def test_seqlock_read_retries_while_writer_is_active():
+    """Test a slot with an odd sequence is treated as a miss."""
+    table = SharedTable(slots=1, value_size=8)
+    table.set("a", b"1", ttl=60)
+    table._map[0] = table._map[0] | 1
+
+    assert table.get("a") is None
+    table.set("a", b"2", ttl=60)
+    assert table.get("a") == b"2"
+
+
+def test_health_is_probed_once_and_shared(app, load_config, monkeypatch):
+    """Test a fresh shared answer replaces the per-request health probe."""
+    load_config(
+        services={"orders": {"url": "http://orders.local", "enabled": True}},
+        route_mappings={"orders": "orders"},
+    )
+    probes = []
+
+    def fake_request(self, method, url, **kwargs):
+        probes.append(url)
+        return FakeResponse(200)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    with app.app_context():
+        assert HealthChecker.check_service_health("orders")
+        assert HealthChecker.check_service_health("orders")
+    assert len(probes) == 1
+
+    app.extensions["shared_state"].record_health("orders", False)
+    with app.app_context():
+        assert not HealthChecker.check_service_health("orders")
+
+
+def test_breaker_opens_after_consecutive_failures(
+    app, client, load_config, monkeypatch
+):
+    """Test repeated upstream failures stop traffic until the cooldown."""
+    load_config(
+        services={"orders": {"url": "http://orders.local", "enabled": True}},
+        route_mappings={"orders": "orders"},
+        public_endpoints=["orders"],
+    )
+    monkeypatch.setattr(
+        "requests.Session.request",
+        lambda self, method, url, **kw: FakeResponse(
+            200 if url.endswith("/health") else 500
+        ),
+    )
+    shared = app.extensions["shared_state"]
+
+    for _ in range(shared.breaker_threshold):
+        assert client.get("/api/v1/orders/1").status_code == 500
+    assert shared.breaker_open("orders")
+    assert client.get("/api/v1/orders/1").status_code == 503
+
+    shared.record_result("orders", failed=False)
+    assert not shared.breaker_open("orders")
+
+
+def test_validated_tokens_are_shared(app):
+    """Test a token verified once is not verified again."""
+    secret = app.config["SECRET_KEY"]
+    token = jwt.encode(
+        {"user_id": 7, "exp": int(time.time()) + 300}, secret, algorithm="HS256"
+    )
+
+    with app.test_request_context():
+        assert AuthService.validate_token(token)["user_id"] == 7
+        with patch.object(AuthService, "decode_locally") as decode:
+            assert AuthService.validate_token(token)["user_id"] == 7
+    decode.assert_not_called()
+    assert app.extensions["shared_state"].stats()["token_hits"] == 1
@@ -0,0 +1,52 @@
+"""Test startup reporting helpers and lazy API docs."""
+
+import os
+
+import pytest
+from flask_restx import swagger
+
+from gateway_service.utils.startup import parse_importtime, process_memory
+
+
+def test_parse_importtime():
+    """Test -X importtime lines are parsed with their nesting depth."""
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     _json",
+            "import time:       450 |        570 |   json",
+            "import time:      1000 |       1570 | gateway_service",
+        ]
+    )
+    assert parse_importtime(output) == [
+        ("_json", 120, 120, 2),
+        ("json", 450, 570, 1),
+        ("gateway_service", 1000, 1570, 0),
+    ]
+
+
+def test_process_memory():
+    """Test memory of the current process is read from /proc."""
+    if not os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"):
+        pytest.skip("needs /proc/<pid>/smaps_rollup")
+    memory = process_memory(os.getpid())
+    assert memory["rss"] > 0
+    assert memory["shared"] + memory["private"] == memory["rss"]
+
+
+def test_swagger_built_on_first_docs_hit(app, client, monkeypatch):
+    """Test the Swagger spec is not built at startup, and only once."""
+    calls = []
+    as_dict = swagger.Swagger.as_dict
+
+    def counting_as_dict(self):
+        calls.append(self)
+        return as_dict(self)
+
+    monkeypatch.setattr(swagger.Swagger, "as_dict", counting_as_dict)
+
+    assert client.get("/docs/").status_code == 200
+    assert calls == []
+    assert client.get("/gateway/swagger.json").status_code == 200
+    assert client.get("/gateway/swagger.json").status_code == 200
+    assert len(calls) == 1
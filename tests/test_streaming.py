@@ -0,0 +1,227 @@
+"""Test SSE and WebSocket streaming passthrough."""
+
+import json
+import socket
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from gateway_service.service import StreamLimiter, WebSocketTunnel
+
+
+class FakeRaw:
+    """urllib3-like raw stream handing out one event per read."""
+
+    chunked = False
+
+    def __init__(self, events):
+        self._events = list(events)
+
+    def read1(self, amt):
+        return self._events.pop(0) if self._events else b""
+
+
+class FakeStream:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, events, content_type="text/event-stream"):
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+        self.elapsed = timedelta(0)
+        self.raw = FakeRaw(events)
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        yield b"{}"
+
+    def close(self):
+        self.closed = True
+
+
+def test_limiter_rejects_over_capacity():
+    """Test the per-worker stream cap never blocks and counts rejections."""
+    limiter = StreamLimiter(max_streams=1)
+
+    assert limiter.try_acquire() is True
+    assert limiter.try_acquire() is False
+    limiter.release()
+    assert limiter.try_acquire() is True
+    assert limiter.stats() == {"active": 1, "max_streams": 1, "rejected": 1}
+
+
+def test_sse_stream_passthrough(app, client, load_config, monkeypatch):
+    """Test events are relayed as they arrive and the slot is freed."""
+    load_config(
+        services={"notifications": {"url": "http://notify.local", "enabled": True}},
+        route_mappings={"notifications": "notifications"},
+        public_endpoints=["notifications"],
+        route_policies={"notifications": {"stream": True}},
+    )
+    streams = []
+
+    def fake_request(self, method, url, **kwargs):
+        stream = FakeStream([b"data: one\n\n", b"data: two\n\n"])
+        if "/events" in url:
+            assert kwargs["timeout"][1] is None
+            streams.append(stream)
+        return stream
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get("/api/v1/notifications/events")
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Buffering"] == "no"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert app.extensions["stream_limiter"].active == 1
+
+    assert response.data == b"data: one\n\ndata: two\n\n"
+    response.close()
+    assert streams[0].closed is True
+    assert app.extensions["stream_limiter"].active == 0
+
+    stats = json.loads(client.get("/metrics").data)["streaming"]
+    assert stats["active"] == 0
+
+
+def test_stream_limit_returns_503(app, client, load_config, monkeypatch):
+    """Test streams beyond the cap are refused instead of queued."""
+    load_config(
+        services={"chat": {"url": "http://chat.local", "enabled": True}},
+        route_mappings={"chat": "chat"},
+        public_endpoints=["chat"],
+        route_policies={"chat": {"stream": True}},
+    )
+    monkeypatch.setattr(
+        "requests.Session.request", lambda self, method, url, **kw: FakeStream([])
+    )
+    app.extensions["stream_limiter"].max_streams = 0
+
+    response = client.get("/api/v1/chat/stream")
+    assert response.status_code == 503
+    assert json.loads(response.data)["error"] == "Too many streams"
+
+
+def test_websocket_tunnel_relays_frames():
+    """Test the tunnel forwards the handshake and pumps both directions."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    handshake = {}
+
+    def upstream():
+        conn, _ = server.accept()
+        handshake["request"] = conn.recv(4096)
+        conn.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n\r\n")
+        conn.sendall(conn.recv(4096).upper())
+        conn.close()
+
+    threading.Thread(target=upstream, daemon=True).start()
+
+    browser, gateway_side = socket.socketpair()
+    tunnel = WebSocketTunnel(
+        gateway_side,
+        f"http://127.0.0.1:{server.getsockname()[1]}",
+        "chat/ws",
+        {"room": ["1"]},
+        {"Sec-WebSocket-Key": "abc"},
+        connect_timeout=2,
+    )
+    relay = threading.Thread(target=tunnel.run, daemon=True)
+    relay.start()
+
+    head = b""
+    while b"\r\n\r\n" not in head:
+        head += browser.recv(4096)
+    assert head.startswith(b"HTTP/1.1 101")
+    browser.sendall(b"frame")
+    assert browser.recv(4096) == b"FRAME"
+
+    relay.join(timeout=2)
+    assert tunnel.upstream_status == 101
+    assert handshake["request"].startswith(b"GET /chat/ws?room=1 HTTP/1.1\r\n")
+    assert b"Sec-WebSocket-Key: abc" in handshake["request"]
+    browser.close()
+    gateway_side.close()
+    server.close()
+
+
+class BufferingSocket:
+    """Socket that, like an SSLSocket, keeps part of what it read buffered."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def pending(self):
+        return len(self.buffer)
+
+    def recv(self, size):
+        if not self.buffer:
+            self.buffer = self.sock.recv(size)
+        data, self.buffer = self.buffer[:1], self.buffer[1:]
+        return data
+
+    def sendall(self, data):
+        self.sock.sendall(data)
+
+
+def test_websocket_pump_drains_buffered_data():
+    """Test data buffered inside the upstream socket is relayed without waiting."""
+    browser, gateway_side = socket.socketpair()
+    service, upstream_side = socket.socketpair()
+    upstream = BufferingSocket(upstream_side)
+    tunnel = WebSocketTunnel(gateway_side, "http://127.0.0.1", "ws", {}, {}, 2)
+    threading.Thread(target=tunnel._pump, args=(upstream,), daemon=True).start()
+
+    service.sendall(b"frame")
+    browser.settimeout(2)
+    received = b""
+    while len(received) < 5:
+        received += browser.recv(4096)
+
+    assert received == b"frame"
+    for sock in (browser, gateway_side, service, upstream_side):
+        sock.close()
+
+
+@pytest.mark.parametrize(
+    "answer, status",
+    [(None, 504), (b"", 502), (b"garbage\r\n\r\n", 502)],
+)
+def test_websocket_handshake_failures_are_answered(answer, status):
+    """Test a silent, closed or garbled upstream still gets the client a response."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def upstream():
+        conn, _ = server.accept()
+        conn.recv(4096)
+        if answer is None:
+            time.sleep(1)
+        else:
+            conn.sendall(answer)
+        conn.close()
+
+    threading.Thread(target=upstream, daemon=True).start()
+    browser, gateway_side = socket.socketpair()
+    tunnel = WebSocketTunnel(
+        gateway_side,
+        f"http://127.0.0.1:{server.getsockname()[1]}",
+        "chat/ws",
+        {},
+        {},
+        connect_timeout=0.2,
+    )
+    tunnel.run()
+
+    assert tunnel.upstream_status == status
+    assert browser.recv(4096).startswith(b"HTTP/1.1 %d " % status)
+    browser.close()
+    gateway_side.close()
+    server.close()
@@ -0,0 +1,120 @@
+"""Test W3C trace context propagation and span export."""
+
+import json
+from datetime import timedelta
+
+from gateway_service.service import Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+
+    def iter_content(self, chunk_size=1):
+        yield b"{}"
+
+
+def test_parse_traceparent():
+    """Test valid headers parse and malformed ones are ignored."""
+    assert parse_traceparent(PARENT) == (TRACE_ID, "00f067aa0ba902b7", True)
+    assert parse_traceparent(PARENT[:-2] + "00")[2] is False
+
+    assert parse_traceparent(None) is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(PARENT.upper()) is None
+    assert parse_traceparent("ff" + PARENT[2:]) is None
+    assert parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+    assert parse_traceparent(PARENT + "-extra") is None
+
+
+def test_trace_propagates_to_upstream(app, client, load_config, monkeypatch):
+    """Test the upstream sees the caller's trace with the gateway as parent."""
+    load_config(
+        services={"orders": {"url": "http://orders.local", "enabled": True}},
+        route_mappings={"orders": "orders"},
+        public_endpoints=["orders"],
+    )
+    seen = {}
+
+    def fake_request(self, method, url, headers=None, **kwargs):
+        if "/orders/" in url:
+            seen.update(headers)
+        return FakeResponse()
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    response = client.get(
+        "/api/v1/orders/1", headers={"traceparent": PARENT, "tracestate": "vendor=1"}
+    )
+
+    assert response.status_code == 200
+    trace_id, parent_id, sampled = parse_traceparent(seen["traceparent"])
+    assert trace_id == TRACE_ID
+    assert parent_id != "00f067aa0ba902b7"
+    assert sampled
+    assert seen["tracestate"] == "vendor=1"
+
+
+def test_file_exporter_writes_otlp_json(app, client, tmp_path):
+    """Test finished traces are exported as OTLP JSON with their spans."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer({"TRACE_EXPORTER": "file", "TRACE_FILE": str(path)})
+    app.extensions["tracer"] = tracer
+
+    client.get("/api/v1/unknown-endpoint", headers={"traceparent": PARENT})
+    assert tracer.flush() >= 2
+
+    payload = json.loads(path.read_text().splitlines()[0])
+    resource = payload["resourceSpans"][0]
+    spans = {span["name"]: span for span in resource["scopeSpans"][0]["spans"]}
+    root = spans["GET /api/v1/<path:path>"]
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert spans["route"]["parentSpanId"] == root["spanId"]
+    assert resource["resource"]["attributes"][0]["value"]["stringValue"] == "turbogate"
+
+
+def test_tail_sampling_keeps_errors_only(tmp_path):
+    """Test unsampled traces are exported only when they fail or are slow."""
+    tracer = Tracer(
+        {
+            "TRACE_EXPORTER": "file",
+            "TRACE_FILE": str(tmp_path / "traces.jsonl"),
+            "TRACE_SAMPLE_RATE": 0.0,
+            "TRACE_SLOW_MS": 10_000,
+        }
+    )
+    tracer._worker.ensure_running = lambda: None
+
+    ok = tracer.start({}, "GET /ok")
+    assert not ok.sampled
+    assert not tracer.finish(ok, 200)
+
+    failed = tracer.start({}, "GET /fail")
+    failed.span("upstream").end(error=True)
+    assert tracer.finish(failed, 200)
+    assert tracer.finish(tracer.start({}, "GET /error"), 502)
+    assert tracer.stats()["tail_sampled"] == 2
+
+
+def test_full_queue_drops_spans():
+    """Test traces beyond the queue size are dropped instead of blocking."""
+    tracer = Tracer(
+        {"TRACE_EXPORTER": "file", "TRACE_FILE": "unused", "TRACE_QUEUE_SIZE": 2}
+    )
+    tracer._worker.ensure_running = lambda: None
+
+    first = tracer.start({}, "GET /a")
+    first.span("route")
+    assert tracer.finish(first, 200)
+    assert not tracer.finish(tracer.start({}, "GET /b"), 200)
+    stats = tracer.stats()
+    assert stats["queued"] == 2
+    assert stats["dropped"] == 1
@@ -0,0 +1,116 @@
+"""Test weighted canary routing."""
+
+import json
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+
+from gateway_service.service import TrafficSplitError
+from gateway_service.service.traffic import UpstreamMetrics, compile_traffic_split
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, url):
+        self.status_code = 200
+        self.headers = {"Content-Type": "application/json"}
+        self.elapsed = timedelta(0)
+        self._body = json.dumps({"url": url}).encode()
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+    def close(self):
+        self.closed = True
+
+
+def test_split_weights_and_stickiness():
+    """Test weighted choice honours weights and sticky keys."""
+    split = compile_traffic_split(
+        "payments", {"splits": {"payments": 90, "payments-canary": 10}}
+    )
+    assert split.weights() == {"payments": 90, "payments-canary": 10}
+
+    counts = Counter(split.choose() for _ in range(2000))
+    assert 100 < counts["payments-canary"] < 320
+
+    assert len({split.choose("user-42") for _ in range(20)}) == 1
+
+
+def test_split_rejects_bad_sticky():
+    """Test unknown stickiness modes are rejected."""
+    with pytest.raises(TrafficSplitError):
+        compile_traffic_split("payments", {"splits": {"a": 1}, "sticky": "cookie"})
+
+
+def test_upstream_metrics_percentiles():
+    """Test per-version metrics summarise latency buckets."""
+    metrics = UpstreamMetrics()
+    for _ in range(9):
+        metrics.record("payments", 0.004, error=False)
+    metrics.record("payments", 0.3, error=True)
+
+    summary = metrics.snapshot()["payments"]
+    assert summary["requests"] == 10
+    assert summary["error_rate"] == 0.1
+    assert summary["p50_ms"] == 5.0
+    assert summary["p99_ms"] == 500.0
+
+
+def test_proxy_routes_by_sticky_header(client, load_config, monkeypatch):
+    """Test a header-sticky split sends traffic to the chosen version."""
+    load_config(
+        services={
+            "payments": {"url": "http://payments.local", "enabled": True},
+            "payments-canary": {"url": "http://canary.local", "enabled": True},
+        },
+        route_mappings={
+            "payments": {
+                "splits": {"payments": 0, "payments-canary": 100},
+                "sticky": "header:X-Client-ID",
+            }
+        },
+        public_endpoints=["payments"],
+    )
+    monkeypatch.setattr(
+        "requests.Session.request",
+        lambda self, method, url, **kwargs: FakeResponse(url),
+    )
+
+    response = client.get("/api/v1/payments/1", headers={"X-Client-ID": "abc"})
+    assert response.status_code == 200
+    assert json.loads(response.data)["url"] == "http://canary.local/payments/1"
+
+    upstreams = json.loads(client.get("/metrics").data)["upstreams"]
+    assert upstreams["payments-canary"]["requests"] == 1
+
+
+def test_failure_after_response_is_recorded_once(app, client, load_config, monkeypatch):
+    """Test an error after the upstream answered does not count as a failed call."""
+    load_config(
+        services={"payments": {"url": "http://payments.local", "enabled": True}},
+        route_mappings={"payments": "payments"},
+        public_endpoints=["payments"],
+        route_policies={"payments": {"buffer": True}},
+    )
+    responses = []
+    monkeypatch.setattr(
+        "requests.Session.request",
+        lambda self, method, url, **kwargs: responses.append(FakeResponse(url))
+        or responses[-1],
+    )
+
+    def broken_spool(response):
+        raise RuntimeError("spool failed")
+
+    monkeypatch.setattr(app.extensions["response_spooler"], "spool", broken_spool)
+
+    assert client.get("/api/v1/payments/1").status_code == 500
+    assert responses[-1].closed is True
+
+    upstreams = json.loads(client.get("/metrics").data)["upstreams"]
+    assert upstreams["payments"]["requests"] == 1
+    assert upstreams["payments"]["error_rate"] == 0
@@ -0,0 +1,143 @@
+"""Test worker warmup, the DNS cache and the readiness endpoint."""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gateway_service.service import DNSCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    """A keep-alive HTTP server counting accepted connections."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.accepted = 0
+    accept = server.get_request
+
+    def counting_accept():
+        server.accepted += 1
+        return accept()
+
+    server.get_request = counting_accept
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_warmup_opens_pooled_connections(app, client, load_config, upstream):
+    """Test warmup opens keep-alive connections that real requests reuse."""
+    url = f"http://localhost:{upstream.server_port}"
+    load_config(
+        services={"jobs": {"url": url, "enabled": True}},
+        route_mappings={"jobs": "jobs"},
+        public_endpoints=["jobs"],
+    )
+    warmup = app.extensions["warmup"]
+    warmup.connections = 3
+
+    assert client.get("/gateway/ready").status_code == 503
+    report = warmup.run()
+
+    assert report["services"]["jobs"]["connections"] == 3
+    assert report["services"]["jobs"]["addresses"]
+    assert warmup.ready
+    assert client.get("/gateway/ready").get_json()["status"] == "ready"
+
+    response = client.get("/api/v1/jobs")
+    assert response.status_code == 200
+    assert upstream.accepted == 3  # served over a warmed connection
+
+
+def test_warmup_survives_unreachable_service(app, load_config):
+    """Test an unreachable upstream is reported without failing warmup."""
+    load_config(
+        services={"jobs": {"url": "http://127.0.0.1:9", "enabled": True}},
+        route_mappings={"jobs": "jobs"},
+    )
+
+    report = app.extensions["warmup"].run()
+
+    assert "error" in report["services"]["jobs"]
+    assert app.extensions["warmup"].ready
+
+
+def test_warmup_reports_adapter_errors(app, load_config, monkeypatch, upstream):
+    """Test a failing pool lookup is reported alongside what did work."""
+    load_config(
+        services={
+            "jobs": {"url": f"http://localhost:{upstream.server_port}", "enabled": True}
+        },
+        route_mappings={"jobs": "jobs"},
+    )
+
+    def broken_pool(*args, **kwargs):
+        raise ValueError("no pool")
+
+    monkeypatch.setattr(
+        "requests.adapters.HTTPAdapter.get_connection_with_tls_context", broken_pool
+    )
+    report = app.extensions["warmup"].run()
+
+    assert report["services"]["jobs"]["error"] == "no pool"
+    assert report["services"]["jobs"]["addresses"]
+    assert report["services"]["jobs"]["connections"] == 0
+
+
+def test_dns_cache_serves_stale_answers(monkeypatch):
+    """Test cached answers are reused, and kept while the resolver fails."""
+    calls = []
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        calls.append(host)
+        if len(calls) > 1:
+            raise socket.gaierror("resolver down")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.7", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    cache = DNSCache(ttl=0, stale_ttl=60)
+
+    assert cache.resolve("jobs.internal", 80) == ["10.0.0.7"]
+    assert cache.resolve("jobs.internal", 80) == ["10.0.0.7"]
+    assert cache.resolve("127.0.0.1", 80) == ["127.0.0.1"]
+    assert cache.stats()["errors"] == 1
+
+    cache.stale_ttl = 0
+    cache._entries[("jobs.internal", 80)] = (0, 0, ["10.0.0.7"])
+    with pytest.raises(socket.gaierror):
+        cache.resolve("jobs.internal", 80)
+
+
+def test_cached_connections_resolve_the_configured_host(monkeypatch):
+    """Test connections look up the host they were created for, FQDN dot included."""
+    cache = DNSCache()
+    monkeypatch.setattr(cache, "resolve", lambda host, port: [f"{host}:{port}"])
+    connected = []
+    monkeypatch.setattr(
+        "gateway_service.service.dns.connection.create_connection",
+        lambda address, *args, **kwargs: connected.append(address) or socket.socket(),
+    )
+    pool = cache.pool_classes["https"]("jobs.internal.", 8443)
+
+    sock = pool._new_conn()._new_conn()
+    sock.close()
+
+    assert connected == [("jobs.internal.:8443", 8443)]